@@ -77,6 +77,10 @@ def stop(context):
         app.log("  FurnitureAI Professional v3.0 - STOP")
         app.log("=" * 60)
         
+        # Ferma i comandi caricati (es. worker di nesting)
+        if _ui_manager:
+            _ui_manager.stop_commands()
+        
         # Cleanup Startup Manager
         if _startup_manager:
             _startup_manager.cleanup()
@@ -4,7 +4,7 @@ Comando Lista Tagli - Genera ed esporta cutlist
 
 import adsk.core
 import adsk.fusion
-from ..core.cutlist import CutList
+from ..core.cutlist import CutList, watch_design_changes, unwatch_design_changes
 
 class CutlistCommand(adsk.core.CommandCreatedEventHandler):
     """Comando lista tagli"""
@@ -24,6 +24,7 @@ class CutlistCommandExecuteHandler(adsk.core.CommandEventHandler):
         """Genera cutlist"""
         app = adsk.core.Application.get()
         design = adsk.fusion.Design.cast(app.activeProduct)
+        watch_design_changes(app)
         
         cutlist = CutList(design.rootComponent)
         result = cutlist.generate()
@@ -34,3 +35,8 @@ class CutlistCommandExecuteHandler(adsk.core.CommandEventHandler):
             f"Totale parti: {result['total_parts']}\n"
             f"Area totale: {result['statistics']['total_area']} m²"
         )
+
+
+def stop():
+    """Hook di stop dell'add-in: rimuove gli eventi di modifica design"""
+    unwatch_design_changes()
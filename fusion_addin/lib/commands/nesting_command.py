@@ -2,10 +2,26 @@
 Comando Nesting - Ottimizzazione layout pannelli
 """
 
+import queue
+
 import adsk.core
 import adsk.fusion
 from ..core.nesting import NestingOptimizer
-from ..core.visualization import NestingVisualizer
+from ..core.nesting_cache import NestingCache, DEFAULT_CACHE_DIR
+from ..core.nesting_worker import NestingWorkerClient, restore_result
+
+# Custom event con cui il thread di ricezione del worker sveglia il thread UI
+NESTING_EVENT_ID = 'FurnitureAI_NestingWorkerEvent'
+
+# Command definition nativa creata da execute()
+NESTING_COMMAND_ID = 'FAI_Nesting_Native'
+
+# Worker fuori processo, avviato al primo comando e condiviso
+_worker = None
+_events = queue.Queue()
+_active_jobs = set()
+_handlers = []
+
 
 class NestingCommand(adsk.core.CommandCreatedEventHandler):
     """Comando nesting"""
@@ -22,8 +38,20 @@ class NestingCommandExecuteHandler(adsk.core.CommandEventHandler):
     """Esecutore nesting"""
     
     def notify(self, args):
-        """Esegui ottimizzazione"""
+        """Accoda l'ottimizzazione al worker senza bloccare Fusion"""
         app = adsk.core.Application.get()
+        ui = app.userInterface
+        
+        if _active_jobs:
+            answer = ui.messageBox(
+                "Ottimizzazione nesting in corso. Annullarla?",
+                "Nesting",
+                adsk.core.MessageBoxButtonTypes.YesNoButtonType
+            )
+            if answer == adsk.core.DialogResults.DialogYes:
+                for job_id in list(_active_jobs):
+                    _worker.cancel(job_id)
+            return
         
         # Esempio con dati fittizi
         parts = [
@@ -31,11 +59,127 @@ class NestingCommandExecuteHandler(adsk.core.CommandEventHandler):
             {'width': 764, 'height': 580, 'quantity': 2, 'name': 'Ripiano'}
         ]
         
-        optimizer = NestingOptimizer()
-        result = optimizer.optimize(parts)
+        worker = _get_worker(app)
+        if worker is None:
+            # Worker non disponibile: ottimizzazione nel thread UI
+            optimizer = NestingOptimizer(cache=NestingCache())
+            _show_result(ui, optimizer.optimize(parts))
+            return
+        
+        _active_jobs.add(worker.submit(parts, NestingOptimizer()))
+        try:
+            ui.progressBar.show("Nesting in corso...", 0, 100, False)
+        except Exception:
+            pass
+
+class NestingWorkerEventHandler(adsk.core.CustomEventHandler):
+    """Riceve nel thread UI gli eventi accodati dal worker"""
+    
+    def notify(self, args):
+        """Aggiorna avanzamento e mostra i risultati"""
+        ui = adsk.core.Application.get().userInterface
         
-        app.userInterface.messageBox(
-            f"Ottimizzazione completata:\n"
-            f"Pannelli necessari: {result['sheets_count']}\n"
-            f"Efficienza: {result['statistics']['efficiency_percent']}%"
-        )
+        while True:
+            try:
+                event = _events.get_nowait()
+            except queue.Empty:
+                break
+            
+            kind = event['event']
+            if kind == 'progress':
+                stats = event['statistics']
+                try:
+                    ui.progressBar.progressValue = int(stats['parts_placed'] * 100 / max(stats['parts_total'], 1))
+                except Exception:
+                    pass
+                continue
+            if kind not in ('done', 'cancelled', 'error'):
+                continue
+            
+            _active_jobs.discard(event['job_id'])
+            if not _active_jobs:
+                try:
+                    ui.progressBar.hide()
+                except Exception:
+                    pass
+            
+            if kind == 'done':
+                _show_result(ui, restore_result(event['result']))
+            elif kind == 'cancelled':
+                ui.messageBox("Ottimizzazione nesting annullata")
+            else:
+                ui.messageBox(f"❌ Errore ottimizzazione nesting:\n{event['message']}")
+
+
+def _get_worker(app):
+    """
+    Worker di nesting condiviso, avviato al primo utilizzo
+    
+    Returns:
+        NestingWorkerClient: Client connesso o None se il worker non parte
+    """
+    global _worker
+    
+    if _worker is None:
+        event = app.registerCustomEvent(NESTING_EVENT_ID)
+        handler = NestingWorkerEventHandler()
+        event.add(handler)
+        _handlers.append(handler)
+        
+        def on_event(worker_event):
+            # Thread di ricezione: niente API Fusion tranne fireCustomEvent
+            _events.put(worker_event)
+            app.fireCustomEvent(NESTING_EVENT_ID, '')
+        
+        _worker = NestingWorkerClient(on_event, cache_dir=DEFAULT_CACHE_DIR)
+    
+    return _worker if _worker.start() else None
+
+
+def _show_result(ui, result):
+    """Mostra il riepilogo di un risultato di nesting"""
+    ui.messageBox(
+        f"Ottimizzazione completata:\n"
+        f"Pannelli necessari: {result['sheets_count']}\n"
+        f"Efficienza: {result['statistics']['efficiency_percent']}%"
+    )
+
+
+def execute():
+    """Avvia il comando nesting (chiamato da UIManager al clic sul pulsante)"""
+    cmd_defs = adsk.core.Application.get().userInterface.commandDefinitions
+    cmd_def = cmd_defs.itemById(NESTING_COMMAND_ID)
+    if cmd_def:
+        cmd_def.deleteMe()
+    
+    cmd_def = cmd_defs.addButtonDefinition(NESTING_COMMAND_ID, 'Nesting', 'Ottimizzazione layout pannelli')
+    on_created = NestingCommand()
+    cmd_def.commandCreated.add(on_created)
+    _handlers.append(on_created)
+    cmd_def.execute()
+
+
+def stop():
+    """Hook di stop dell'add-in (vedi UIManager.stop_commands())"""
+    stop_worker()
+    try:
+        cmd_def = adsk.core.Application.get().userInterface.commandDefinitions.itemById(NESTING_COMMAND_ID)
+        if cmd_def:
+            cmd_def.deleteMe()
+    except Exception:
+        pass
+
+
+def stop_worker():
+    """Chiude il worker e rimuove il custom event (da chiamare allo stop dell'add-in)"""
+    global _worker
+    
+    if _worker is not None:
+        _worker.stop()
+        _worker = None
+        try:
+            adsk.core.Application.get().unregisterCustomEvent(NESTING_EVENT_ID)
+        except Exception:
+            pass
+    _active_jobs.clear()
+    _handlers.clear()
@@ -4,6 +4,11 @@ from .door_generator import DoorGenerator
 from .drawer_generator import DrawerGenerator
 from .cutlist import CutList
 from .nesting import NestingOptimizer
+from .nesting_session import NestingSession
+from .nesting_cache import NestingCache
+from .nesting_pipeline import NestingPipeline
+from .nesting_worker import NestingWorkerClient
+from .nesting_polygon import PolygonNestingOptimizer
 from .visualization import NestingVisualizer
 
 # Anchor and Placement System
@@ -19,6 +24,11 @@ __all__ = [
     'DrawerGenerator',
     'CutList',
     'NestingOptimizer',
+    'NestingSession',
+    'NestingCache',
+    'NestingPipeline',
+    'NestingWorkerClient',
+    'PolygonNestingOptimizer',
     'NestingVisualizer',
     'AnchorPoint',
     'CabinetPlacer',
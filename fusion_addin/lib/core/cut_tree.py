@@ -0,0 +1,248 @@
+"""
+Albero di taglio a ghigliottina
+Struttura binaria dei tagli di un pannello, programma sega e sequenza di taglio
+"""
+
+# Tipi di taglio: 'rip' è un taglio parallelo al lato X del pannello
+# (linea orizzontale, y costante), 'crosscut' è perpendicolare (x costante)
+CUT_KINDS = ('rip', 'crosscut')
+
+# Versione del formato JSON compatto prodotto da serialize_cut_tree()
+CUT_TREE_FORMAT = 1
+
+_KIND_CODES = {'rip': 'R', 'crosscut': 'C'}
+_CODE_KINDS = {code: kind for kind, code in _KIND_CODES.items()}
+
+
+def free_node(x, y, width, height):
+    """
+    Crea una foglia libera dell'albero
+    
+    La foglia è anche il rettangolo libero usato dal motore guillotine:
+    quando vi si piazza un pezzo viene trasformata in nodo di taglio.
+    
+    Returns:
+        dict: Nodo con 'type' = 'free' e geometria
+    """
+    return {'type': 'free', 'x': x, 'y': y, 'width': width, 'height': height}
+
+
+def split_node(node, kind, offset, kerf):
+    """
+    Taglia una foglia libera in due figli disgiunti
+    
+    Il primo figlio è la parte prima del taglio (sotto per 'rip', a
+    sinistra per 'crosscut'), il secondo quella dopo la lama.
+    
+    Args:
+        node: Foglia libera (trasformata in place in nodo di taglio)
+        kind: 'rip' o 'crosscut'
+        offset: Distanza del taglio dall'origine del nodo (mm)
+        kerf: Spessore lama (mm)
+    
+    Returns:
+        tuple: (primo, secondo); il secondo è None se la lama consuma
+            tutto il materiale residuo
+    """
+    first_rect, second_rect = _child_rects(node, kind, offset, kerf)
+    
+    first = free_node(*first_rect)
+    second = free_node(*second_rect) if second_rect[2] > 0 and second_rect[3] > 0 else None
+    
+    node['type'] = 'cut'
+    node['kind'] = kind
+    node['offset'] = offset
+    node['kerf'] = kerf
+    node['first'] = first
+    node['second'] = second
+    
+    return first, second
+
+
+def _child_rects(node, kind, offset, kerf):
+    """Geometria (x, y, width, height) dei due figli di un taglio"""
+    x, y, width, height = node['x'], node['y'], node['width'], node['height']
+    
+    if kind == 'rip':
+        return (
+            (x, y, width, offset),
+            (x, y + offset + kerf, width, height - offset - kerf)
+        )
+    return (
+        (x, y, offset, height),
+        (x + offset + kerf, y, width - offset - kerf, height)
+    )
+
+
+def iter_nodes(tree, node_type=None):
+    """
+    Visita in pre-ordine dei nodi dell'albero
+    
+    Args:
+        tree: Radice dell'albero
+        node_type: Filtra per tipo ('cut', 'part', 'free')
+    
+    Yields:
+        dict: Nodi dell'albero
+    """
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if node is None:
+            continue
+        if node_type is None or node['type'] == node_type:
+            yield node
+        if node['type'] == 'cut':
+            stack.append(node['second'])
+            stack.append(node['first'])
+
+
+def serialize_cut_tree(tree, kerf):
+    """
+    Converte l'albero nel formato JSON compatto (programma sega)
+    
+    I nodi non contengono coordinate: sono ricavate da offset e lama a
+    partire dal rettangolo della radice. Formato dei nodi:
+    ['R'|'C', offset, primo, secondo] per i tagli, ['P', tipo, ruotato]
+    per i pezzi e null per gli sfridi.
+    
+    Args:
+        tree: Radice dell'albero
+        kerf: Spessore lama (mm)
+    
+    Returns:
+        dict: Programma con 'v', 'x', 'y', 'w', 'h', 'k' e 't'
+    """
+    def encode(node):
+        if node is None or node['type'] == 'free':
+            return None
+        if node['type'] == 'part':
+            placement = node['placement']
+            return ['P', placement.id, 1 if placement.rotated else 0]
+        return [_KIND_CODES[node['kind']], node['offset'], encode(node['first']), encode(node['second'])]
+    
+    return {
+        'v': CUT_TREE_FORMAT,
+        'x': tree['x'],
+        'y': tree['y'],
+        'w': tree['width'],
+        'h': tree['height'],
+        'k': kerf,
+        't': encode(tree)
+    }
+
+
+def deserialize_cut_tree(program, make_placement):
+    """
+    Ricostruisce l'albero da un programma di serialize_cut_tree()
+    
+    Args:
+        program: Programma sega in formato compatto
+        make_placement: Funzione (x, y, width, height, tipo, ruotato) ->
+            Placement per i nodi pezzo
+    
+    Returns:
+        dict: Radice dell'albero
+    """
+    if program.get('v') != CUT_TREE_FORMAT:
+        raise ValueError(f"Formato albero di taglio non supportato: {program.get('v')}")
+    
+    kerf = program['k']
+    root = free_node(program['x'], program['y'], program['w'], program['h'])
+    
+    stack = [(root, program['t'])]
+    while stack:
+        node, code = stack.pop()
+        if code is None:
+            continue
+        if code[0] == 'P':
+            node['type'] = 'part'
+            node['placement'] = make_placement(
+                node['x'], node['y'], node['width'], node['height'], code[1], bool(code[2])
+            )
+            continue
+        
+        first, second = split_node(node, _CODE_KINDS[code[0]], code[1], kerf)
+        stack.append((first, code[2]))
+        if second is not None:
+            stack.append((second, code[3]))
+    
+    return root
+
+
+def cut_sequence(tree):
+    """
+    Sequenza di taglio che minimizza rotazioni e riposizionamenti
+    
+    I tagli sono raggruppati per stadio: nello stadio 0 si eseguono sul
+    pannello intero tutti i tagli dello stesso tipo della radice, poi i
+    pezzi ottenuti vengono ruotati una sola volta e si esegue lo stadio
+    successivo, e così via. Dentro ogni pezzo i tagli paralleli sono
+    ordinati per posizione, così la guida avanza sempre nello stesso verso.
+    
+    Args:
+        tree: Radice dell'albero
+    
+    Returns:
+        list: Tagli con 'stage', 'kind', 'position' (coordinata del taglio),
+            'start', 'length' e 'rotate' (True se serve ruotare prima)
+    """
+    sequence = []
+    pieces = [tree] if tree is not None and tree['type'] == 'cut' else []
+    stage = 0
+    
+    while pieces:
+        next_pieces = []
+        stage_start = len(sequence)
+        
+        for piece in pieces:
+            kind = piece['kind']
+            chain = []
+            stack = [piece]
+            while stack:
+                node = stack.pop()
+                chain.append(node)
+                for child in (node['first'], node['second']):
+                    if child is None or child['type'] != 'cut':
+                        continue
+                    if child['kind'] == kind:
+                        stack.append(child)
+                    else:
+                        next_pieces.append(child)
+            
+            for node in sorted(chain, key=_cut_position):
+                sequence.append(_cut_entry(node, stage))
+        
+        if stage > 0:
+            # Una sola rotazione all'inizio di ogni stadio successivo al primo
+            sequence[stage_start]['rotate'] = True
+        
+        pieces = next_pieces
+        stage += 1
+    
+    return sequence
+
+
+def _cut_position(node):
+    """Coordinata assoluta della linea di taglio"""
+    if node['kind'] == 'rip':
+        return node['y'] + node['offset']
+    return node['x'] + node['offset']
+
+
+def _cut_entry(node, stage):
+    """Voce della sequenza di taglio per un nodo"""
+    if node['kind'] == 'rip':
+        start, length = node['x'], node['width']
+    else:
+        start, length = node['y'], node['height']
+    
+    return {
+        'stage': stage,
+        'kind': node['kind'],
+        'position': _cut_position(node),
+        'start': start,
+        'length': length,
+        'kerf': node['kerf'],
+        'rotate': False
+    }
@@ -5,7 +5,31 @@ Calcola dimensioni nette e listarelle necessarie per ogni pannello
 
 import adsk.core
 import adsk.fusion
-from collections import defaultdict
+from collections import defaultdict, namedtuple
+from types import MappingProxyType
+
+# Bit dei bordi con listarella nella maschera della firma parte
+EDGE_BAND_BITS = {'front': 1, 'back': 2, 'left': 4, 'right': 8}
+
+# Direzioni venatura ammesse nell'attributo 'FurnitureAI'/'grain' dei corpi
+GRAIN_DIRECTIONS = ('length', 'width')
+
+# Etichette della venatura negli export
+GRAIN_LABELS = {'length': 'Lunghezza', 'width': 'Larghezza'}
+
+# Lista tagli immutabile prodotta da una sola visita dei corpi: 'parts' e
+# 'statistics' sono mapping in sola lettura (parti come in generate()),
+# 'token' lo stato del design da cui è stata calcolata (vedi
+# CutList._design_token())
+CutListSnapshot = namedtuple('CutListSnapshot', ['token', 'parts', 'statistics', 'total_parts'])
+
+# Contatore delle modifiche al design fuori dalla timeline (materiali,
+# visibilità, quote): incrementato dagli eventi registrati con
+# watch_design_changes() o da mark_design_changed()
+_design_revision = 0
+
+# Eventi Fusion e handler registrati da watch_design_changes()
+_watch_handlers = []
 
 class CutList:
     """Generatore di lista tagli da componenti Fusion"""
@@ -19,6 +43,7 @@ class CutList:
         """
         self.component = component
         self.parts = []
+        self._snapshot = None
     
     def generate(self, include_hardware=False):
         """
@@ -28,8 +53,34 @@ class CutList:
             include_hardware: Include ferramenta nella lista (default False)
         
         Returns:
-            dict: Lista tagli organizzata per materiale e dimensioni
+            dict: Lista tagli organizzata per materiale e dimensioni (copia
+                modificabile e serializzabile in JSON della snapshot)
+        """
+        snapshot = self.snapshot(include_hardware)
+        return {
+            'parts': _thaw(snapshot.parts),
+            'statistics': _thaw(snapshot.statistics),
+            'total_parts': snapshot.total_parts
+        }
+    
+    def snapshot(self, include_hardware=False):
+        """
+        Lista tagli immutabile, condivisa da statistiche ed export
+        
+        La visita dei corpi (bounding box via API Fusion) avviene solo se
+        lo stato del design è cambiato dall'ultima snapshot; export CSV,
+        Excel e statistiche ripetuti riusano la stessa snapshot.
+        
+        Args:
+            include_hardware: Include ferramenta nella lista (default False)
+        
+        Returns:
+            CutListSnapshot: Snapshot della lista tagli
         """
+        token = self._design_token(include_hardware)
+        if self._snapshot is not None and token is not None and self._snapshot.token == token:
+            return self._snapshot
+        
         self.parts = []
         
         # Analizza tutti i corpi del componente
@@ -45,11 +96,51 @@ class CutList:
         # Calcola statistiche
         stats = self._calculate_statistics(organized)
         
-        return {
-            'parts': organized,
-            'statistics': stats,
-            'total_parts': len(self.parts)
-        }
+        self._snapshot = CutListSnapshot(token, _freeze(organized), _freeze(stats), len(self.parts))
+        return self._snapshot
+    
+    def invalidate(self):
+        """
+        Scarta la snapshot corrente
+        
+        Da chiamare dopo modifiche che il token non rileva (es. attributi
+        di venatura modificati da script); mark_design_changed() invalida
+        le snapshot di tutte le liste tagli.
+        """
+        self._snapshot = None
+    
+    def _design_token(self, include_hardware=False):
+        """
+        Token dello stato di modifica del design
+        
+        Combina numero di elementi e posizione del marker della timeline
+        (feature aggiunte, soppresse o annullate) con il contatore delle
+        modifiche incrementato dagli eventi di comando e documento (quote,
+        materiali, corpi nascosti: vedi watch_design_changes()). Non visita
+        corpi né parametri: il costo è costante a ogni snapshot().
+        
+        Args:
+            include_hardware: Opzione della lista tagli
+        
+        Returns:
+            tuple: Token confrontabile, None se non determinabile (design
+                senza timeline): la snapshot viene sempre ricalcolata
+        """
+        try:
+            design = self.component.parentDesign
+            timeline = design.timeline
+            if timeline is None:
+                return None
+            
+            return (
+                self.component.entityToken,
+                include_hardware,
+                timeline.count,
+                timeline.markerPosition,
+                _design_revision
+            )
+        except Exception:
+            return None
     
     def _analyze_bodies(self, component):
         """
@@ -118,6 +209,7 @@ class CutList:
                 'material': material_name,
                 'area': round(area, 4),
                 'edge_bands': edge_bands,
+                'grain': self._determine_grain(body),
                 'quantity': 1
             }
         except:
@@ -154,32 +246,74 @@ class CutList:
         
         return edges
     
+    def _determine_grain(self, body):
+        """
+        Determina la direzione della venatura
+        
+        Args:
+            body: BRepBody da analizzare
+        
+        Returns:
+            str: 'length' o 'width' dall'attributo 'FurnitureAI'/'grain' del
+                corpo, None se il pannello non ha venatura
+        """
+        try:
+            attribute = body.attributes.itemByName('FurnitureAI', 'grain')
+        except Exception:
+            return None
+        if attribute and attribute.value in GRAIN_DIRECTIONS:
+            return attribute.value
+        return None
+    
+    def _part_signature(self, part):
+        """
+        Firma hashable di una parte: parti con la stessa firma sono identiche in produzione
+        
+        Args:
+            part: Informazioni parte (vedi _extract_part_info())
+        
+        Returns:
+            tuple: (materiale, spessore, lunghezza, larghezza, maschera
+                bordi, venatura)
+        """
+        edges = part['edge_bands']
+        edge_mask = 0
+        for edge, bit in EDGE_BAND_BITS.items():
+            if edges.get(edge):
+                edge_mask |= bit
+        
+        return (
+            part['material'], part['thickness'], part['length'], part['width'],
+            edge_mask, part.get('grain')
+        )
+    
     def _organize_parts(self):
         """
         Organizza le parti per materiale e dimensioni
         
+        Le parti con la stessa firma (vedi _part_signature()), quindi anche
+        stessi bordi e venatura, diventano una riga con quantità e nomi; la
+        ricerca per firma in un dizionario rende l'aggregazione lineare nel
+        numero di corpi.
+        
         Returns:
             dict: Parti organizzate
         """
         organized = defaultdict(lambda: defaultdict(list))
+        groups = {}
         
         for part in self.parts:
-            material = part['material']
-            thickness = part['thickness']
+            key = self._part_signature(part)
             
-            # Cerca se esiste già una parte con stesse dimensioni
-            found = False
-            for existing in organized[material][thickness]:
-                if (existing['length'] == part['length'] and 
-                    existing['width'] == part['width']):
-                    existing['quantity'] += 1
-                    existing['names'].append(part['name'])
-                    found = True
-                    break
+            existing = groups.get(key)
+            if existing is not None:
+                existing['quantity'] += 1
+                existing['names'].append(part['name'])
+                continue
             
-            if not found:
-                part['names'] = [part['name']]
-                organized[material][thickness].append(part)
+            entry = dict(part, names=[part['name']])
+            groups[key] = entry
+            organized[part['material']][part['thickness']].append(entry)
         
         # Converti defaultdict in dict normale
         result = {}
@@ -223,12 +357,13 @@ class CutList:
         
         return stats
     
-    def export_to_csv(self, filepath):
+    def export_to_csv(self, filepath, snapshot=None):
         """
         Esporta la lista tagli in formato CSV
         
         Args:
             filepath: Path del file di output
+            snapshot: CutListSnapshot da esportare (default: snapshot())
         
         Returns:
             bool: Successo operazione
@@ -236,7 +371,7 @@ class CutList:
         try:
             import csv
             
-            cutlist = self.generate()
+            cutlist = (snapshot or self.snapshot())._asdict()
             
             with open(filepath, 'w', newline='', encoding='utf-8') as f:
                 writer = csv.writer(f)
@@ -245,7 +380,7 @@ class CutList:
                 writer.writerow([
                     'Materiale', 'Spessore', 'Lunghezza', 'Larghezza',
                     'Quantità', 'Area m²', 'Bordo Fronte', 'Bordo Retro',
-                    'Bordo Sx', 'Bordo Dx', 'Nome'
+                    'Bordo Sx', 'Bordo Dx', 'Venatura', 'Nome'
                 ])
                 
                 # Dati
@@ -264,6 +399,7 @@ class CutList:
                                 'Sì' if edges.get('back') else 'No',
                                 'Sì' if edges.get('left') else 'No',
                                 'Sì' if edges.get('right') else 'No',
+                                GRAIN_LABELS.get(part.get('grain'), 'No'),
                                 ', '.join(part['names'])
                             ])
                 
@@ -281,12 +417,13 @@ class CutList:
             print(f"❌ Errore export CSV: {e}")
             return False
     
-    def export_to_excel(self, filepath):
+    def export_to_excel(self, filepath, snapshot=None):
         """
         Esporta la lista tagli in formato Excel
         
         Args:
             filepath: Path del file di output
+            snapshot: CutListSnapshot da esportare (default: snapshot())
         
         Returns:
             bool: Successo operazione
@@ -296,7 +433,7 @@ class CutList:
             from openpyxl import Workbook
             from openpyxl.styles import Font, PatternFill, Alignment
             
-            cutlist = self.generate()
+            cutlist = (snapshot or self.snapshot())._asdict()
             
             wb = Workbook()
             ws = wb.active
@@ -305,7 +442,7 @@ class CutList:
             # Header con formattazione
             headers = [
                 'Materiale', 'Spessore', 'Lunghezza', 'Larghezza',
-                'Quantità', 'Area m²', 'Listarelle', 'Nome'
+                'Quantità', 'Area m²', 'Listarelle', 'Venatura', 'Nome'
             ]
             
             header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
@@ -336,7 +473,8 @@ class CutList:
                         ws.cell(row, 5, part['quantity'])
                         ws.cell(row, 6, part['area'])
                         ws.cell(row, 7, ', '.join(edge_str) if edge_str else 'Nessuno')
-                        ws.cell(row, 8, ', '.join(part['names']))
+                        ws.cell(row, 8, GRAIN_LABELS.get(part.get('grain'), 'No'))
+                        ws.cell(row, 9, ', '.join(part['names']))
                         
                         row += 1
             
@@ -349,3 +487,94 @@ class CutList:
         except Exception as e:
             print(f"❌ Errore export Excel: {e}")
             return False
+
+
+def mark_design_changed():
+    """Segnala una modifica al design: le snapshot esistenti non sono più valide"""
+    global _design_revision
+    _design_revision += 1
+
+
+def watch_design_changes(app):
+    """
+    Registra gli eventi Fusion che incrementano il contatore delle modifiche
+    
+    Ogni comando terminato (modifica quote, assegnazione materiali,
+    visibilità corpi) e ogni cambio di documento attivo chiama
+    mark_design_changed(). Chiamate ripetute non registrano altri handler.
+    
+    Args:
+        app: adsk.core.Application
+    
+    Returns:
+        bool: True se gli eventi sono registrati
+    """
+    if _watch_handlers:
+        return True
+    
+    class CommandTerminatedHandler(adsk.core.ApplicationCommandEventHandler):
+        def notify(self, args):
+            mark_design_changed()
+    
+    class DocumentActivatedHandler(adsk.core.DocumentEventHandler):
+        def notify(self, args):
+            mark_design_changed()
+    
+    try:
+        for event, handler in (
+            (app.userInterface.commandTerminated, CommandTerminatedHandler()),
+            (app.documentActivated, DocumentActivatedHandler())
+        ):
+            event.add(handler)
+            _watch_handlers.append((event, handler))
+    except Exception as e:
+        print(f"⚠️ Eventi di modifica design non disponibili: {e}")
+        unwatch_design_changes()
+        return False
+    return True
+
+
+def unwatch_design_changes():
+    """Rimuove gli handler registrati da watch_design_changes()"""
+    while _watch_handlers:
+        event, handler = _watch_handlers.pop()
+        try:
+            event.remove(handler)
+        except Exception:
+            pass
+    mark_design_changed()
+
+
+def _freeze(value):
+    """
+    Copia in sola lettura di dizionari e liste annidati
+    
+    Args:
+        value: Valore da congelare
+    
+    Returns:
+        MappingProxyType per i dizionari, tuple per le liste, il valore
+        stesso altrimenti
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value):
+    """
+    Copia modificabile di un valore congelato da _freeze()
+    
+    Args:
+        value: Valore congelato
+    
+    Returns:
+        dict per i mapping, list per le tuple, il valore stesso altrimenti
+    """
+    if isinstance(value, MappingProxyType):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
@@ -3,161 +3,1981 @@ Ottimizzazione nesting per pannelli - riduce scarti di materiale
 Algoritmo di impacchettamento 2D per taglio pannelli
 """
 
+import hashlib
+import json
 import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
 from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 
+# Try relative import first (for Fusion 360), fallback to absolute (for testing)
+try:
+    from .cut_tree import free_node, split_node, iter_nodes, serialize_cut_tree, deserialize_cut_tree, cut_sequence
+except ImportError:
+    from cut_tree import free_node, split_node, iter_nodes, serialize_cut_tree, deserialize_cut_tree, cut_sequence
+
+# Rectangle descrive un tipo di parte (id = indice nella PartTable);
+# Placement.id è l'indice del tipo e Placement.name il nome condiviso del tipo
 Rectangle = namedtuple('Rectangle', ['width', 'height', 'id', 'quantity', 'name'])
 Placement = namedtuple('Placement', ['x', 'y', 'width', 'height', 'id', 'name', 'rotated'])
 
+# Versione degli algoritmi di packing: va incrementata a ogni modifica che
+# cambia i layout prodotti, invalida le voci della cache su disco
+NESTING_ENGINE_VERSION = 4
+
+# Motori di packing disponibili per optimize()
+ENGINES = ('guillotine', 'maxrects', 'staged', 'skyline')
+
+# Motori che impaccano l'intero job in blocco: ignorano bin_mode e
+# sort_order e non possono inserire i pezzi uno alla volta
+BATCH_ENGINES = ('staged',)
+
+# Nel motore 'staged' una fascia viene riempita prima con i pezzi alti
+# almeno questa frazione della fascia, poi con gli altri
+STAGED_STRIP_RATIO = 0.7
+
+# Euristiche di scelta della posizione per il motore MaxRects
+MAXRECTS_HEURISTICS = ('best_short_side', 'best_area', 'bottom_left', 'contact_point')
+
+# Strategie di scelta del foglio: 'single' tiene aperto solo l'ultimo foglio,
+# le altre valutano ogni pezzo su tutti i fogli aperti
+BIN_MODES = ('single', 'first_fit', 'best_fit', 'worst_fit')
+
+# Con reuse_patterns il layout a schemi ripetuti viene tenuto solo se usa al
+# massimo questa frazione di fogli in più del packing normale (arrotondata
+# per difetto: sui job piccoli nessun foglio in più)
+PATTERN_SHEET_TOLERANCE = 0.02
+
+# Ordinamenti dei pezzi prima del packing greedy (tutti decrescenti)
+SORT_ORDERS = {
+    'area': lambda r: r.width * r.height,
+    'max_side': lambda r: (max(r.width, r.height), min(r.width, r.height)),
+    'perimeter': lambda r: r.width + r.height,
+    'width': lambda r: (r.width, r.height),
+    'height': lambda r: (r.height, r.width),
+}
+
+class PartTable:
+    """
+    Tabella compatta dei tipi di parte (struct-of-arrays)
+    
+    Ogni tipo di parte occupa una riga con larghezza, altezza, quantità e
+    nome; i pezzi non vengono mai espansi in oggetti singoli. I motori di
+    packing consumano la sequenza di pezzi prodotta da iter_pieces(), che
+    restituisce ripetutamente lo stesso Rectangle del tipo: memoria e costo
+    di ordinamento crescono con il numero di tipi, non di pezzi.
+    """
+    
+    def __init__(self):
+        """Inizializza una tabella vuota"""
+        self.widths = array('d')
+        self.heights = array('d')
+        self.counts = array('l')
+        self.names = []
+        self._rects = []
+    
+    @classmethod
+    def from_parts(cls, parts):
+        """
+        Crea la tabella da una lista di dizionari parte
+        
+        Args:
+            parts: Lista di dizionari con 'width', 'height', 'quantity', 'name'
+        
+        Returns:
+            PartTable: Tabella con un tipo per ogni dizionario
+        """
+        table = cls()
+        for part in parts:
+            table.add(part['width'], part['height'], part.get('quantity', 1), part.get('name'))
+        return table
+    
+    def add(self, width, height, count=1, name=None):
+        """
+        Aggiunge un tipo di parte
+        
+        Args:
+            width: Larghezza (mm)
+            height: Altezza (mm)
+            count: Quantità di pezzi
+            name: Nome del tipo (default 'Parte_<indice>')
+        
+        Returns:
+            int: Indice del tipo
+        """
+        type_id = len(self.names)
+        if name is None:
+            name = f"Parte_{type_id}"
+        
+        self.widths.append(width)
+        self.heights.append(height)
+        self.counts.append(count)
+        self.names.append(name)
+        self._rects.append(Rectangle(width, height, type_id, count, name))
+        return type_id
+    
+    def __len__(self):
+        """Numero di tipi di parte"""
+        return len(self.names)
+    
+    def rect(self, type_id):
+        """Rectangle condiviso del tipo indicato"""
+        return self._rects[type_id]
+    
+    def total_count(self):
+        """Numero totale di pezzi"""
+        return sum(self.counts)
+    
+    def total_area(self):
+        """Area totale dei pezzi (mm²)"""
+        return sum(w * h * c for w, h, c in zip(self.widths, self.heights, self.counts))
+    
+    def canonical(self):
+        """
+        Forma canonica della tabella
+        
+        Unisce i tipi con stesse dimensioni e nome e li ordina: due liste di
+        parti con lo stesso multinsieme di pezzi producono la stessa tabella.
+        
+        Returns:
+            PartTable: Nuova tabella canonica
+        """
+        merged = {}
+        for w, h, c, name in zip(self.widths, self.heights, self.counts, self.names):
+            key = (w, h, name)
+            merged[key] = merged.get(key, 0) + c
+        
+        table = PartTable()
+        for (w, h, name), count in sorted(merged.items()):
+            table.add(w, h, count, name)
+        return table
+    
+    def iter_pieces(self, sort_order='area', seed=None, type_ids=None):
+        """
+        Genera la sequenza dei pezzi da piazzare
+        
+        Per gli ordinamenti deterministici vengono ordinati solo i tipi
+        (ordinamento stabile, come sull'elenco espanso). Per 'random' si
+        mescola un array compatto di indici di tipo.
+        
+        Args:
+            sort_order: Chiave di SORT_ORDERS o 'random'
+            seed: Seme per sort_order='random'
+            type_ids: Limita la sequenza ai tipi indicati (default: tutti)
+        
+        Yields:
+            Rectangle: Rettangolo del tipo, una volta per pezzo
+        """
+        rects = self._rects
+        if type_ids is None:
+            type_ids = range(len(rects))
+        
+        if sort_order == 'random':
+            sequence = array('l')
+            for type_id in type_ids:
+                sequence.extend([type_id] * self.counts[type_id])
+            random.Random(seed).shuffle(sequence)
+            for type_id in sequence:
+                yield rects[type_id]
+            return
+        
+        order = sorted(type_ids, key=lambda i: SORT_ORDERS[sort_order](rects[i]), reverse=True)
+        for type_id in order:
+            rect = rects[type_id]
+            for _ in range(self.counts[type_id]):
+                yield rect
+
+
 class NestingOptimizer:
     """Ottimizzatore di nesting per pannelli"""
     
-    def __init__(self, sheet_width=2800, sheet_height=2070):
+    def __init__(self, sheet_width=2800, sheet_height=2070, cache=None, stock=None):
+        """
+        Inizializza l'ottimizzatore
+        
+        Args:
+            sheet_width: Larghezza pannello standard (mm)
+            sheet_height: Altezza pannello standard (mm)
+            cache: NestingCache opzionale per riusare i risultati su disco
+            stock: Magazzino pannelli per optimize_stock(): lista di
+                dizionari con 'width', 'height' e opzionalmente 'count'
+                (None = illimitato), 'cost' e 'name'; default: solo il
+                pannello standard
+        """
+        self.sheet_width = sheet_width
+        self.sheet_height = sheet_height
+        self.stock = stock
+        self.blade_width = 4  # Larghezza lama sega (mm)
+        self.margin = 10  # Margine sicurezza (mm)
+        self.max_stages = 3  # Stadi di taglio del motore 'staged' (2 o 3)
+        self.cache = cache
+    
+    def optimize(self, parts, allow_rotation=True, engine='guillotine', heuristic='best_short_side',
+                 bin_mode='single', sort_order='area', seed=None, repack_time_s=0.0,
+                 reuse_patterns=False):
+        """
+        Ottimizza il posizionamento delle parti
+        
+        Args:
+            parts: Lista di dizionari con 'width', 'height', 'quantity', 'name'
+                oppure PartTable
+            allow_rotation: Permetti rotazione pezzi di 90°
+            engine: Motore di packing ('guillotine', 'maxrects', 'staged' o
+                'skyline', il più rapido, per anteprime); con 'guillotine' e
+                'staged' ogni foglio ha anche l'albero di taglio ('cut_tree',
+                vedi saw_program())
+            heuristic: Euristica MaxRects ('best_short_side', 'best_area',
+                'bottom_left', 'contact_point'); ignorata da 'guillotine'
+            bin_mode: Scelta del foglio ('single', 'first_fit', 'best_fit',
+                'worst_fit'); ignorata dai motori in BATCH_ENGINES
+            sort_order: Ordinamento dei pezzi (chiave di SORT_ORDERS o
+                'random'); ignorato dai motori in BATCH_ENGINES
+            seed: Seme per sort_order='random'
+            repack_time_s: Tempo massimo del ripasso branch-and-bound sugli
+                ultimi fogli (0 = disattivato, vedi _repack_tail())
+            reuse_patterns: Impacca una sola volta il sottoinsieme ripetuto
+                dei pezzi (produzione in serie) e ne ripete i fogli, vedi
+                _pack_patterns(); il layout viene confrontato con il packing
+                normale e tenuto solo entro PATTERN_SHEET_TOLERANCE
+        
+        Returns:
+            dict: Risultati ottimizzazione con layout, statistiche e schemi
+                di taglio ('patterns', vedi sheet_patterns()); con
+                reuse_patterns le statistiche riportano anche
+                'pattern_sheets', 'plain_sheets' e 'patterns_used'
+        """
+        self._validate_options(engine, heuristic, bin_mode, sort_order)
+        
+        # Tabella compatta dei tipi di parte
+        table = parts if isinstance(parts, PartTable) else PartTable.from_parts(parts)
+        
+        sheets, table, stats, from_cache = self._optimize_table(table, {
+            'allow_rotation': allow_rotation,
+            'engine': engine,
+            'heuristic': heuristic,
+            'bin_mode': bin_mode,
+            'sort_order': sort_order,
+            'seed': seed,
+            'repack_time_s': repack_time_s,
+            'reuse_patterns': reuse_patterns
+        })
+        
+        return {
+            'sheets': sheets,
+            'statistics': stats,
+            'parts_count': table.total_count(),
+            'sheets_count': len(sheets),
+            'part_table': table,
+            'patterns': sheet_patterns(sheets),
+            'from_cache': from_cache
+        }
+    
+    def _optimize_table(self, table, options, on_piece=None, on_sheet=None):
+        """
+        Passi comuni a optimize() e al worker: cache, packing, ripasso e statistiche
+        
+        Args:
+            table: PartTable da impaccare
+            options: Opzioni complete di optimize() (tutte le chiavi)
+            on_piece: Funzione chiamata con il numero di pezzi già consumati
+                prima di ogni pezzo (può sollevare un'eccezione per
+                interrompere); con reuse_patterns solo prima dell'avvio
+            on_sheet: Funzione chiamata con ogni foglio chiuso dal motore
+        
+        Returns:
+            tuple: (sheets, tabella usata, statistiche, letto dalla cache)
+        """
+        allow_rotation = options['allow_rotation']
+        
+        # Si impacca sempre la tabella canonica: il risultato dipende solo
+        # dal multinsieme dei pezzi (come la chiave di cache), con o senza
+        # cache; gli id dei tipi vengono poi riportati alla tabella ricevuta
+        packed = table.canonical()
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self._cache_key(packed, options)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                sheets = self._restore_sheets(cached['sheets'], packed)
+                self._map_part_types(sheets, packed, table)
+                eliminated = cached.get('sheets_eliminated', 0)
+                stats = self._calculate_stats(sheets, table, allow_rotation, eliminated)
+                stats.update(cached.get('pattern_report') or {})
+                return sheets, table, stats, True
+        
+        pattern_report = None
+        if options['reuse_patterns']:
+            if on_piece is not None:
+                on_piece(0)
+            sheets = self._pack_patterns(
+                packed, allow_rotation, options['engine'], options['heuristic'],
+                options['bin_mode'], options['sort_order'], options['seed']
+            )
+            
+            # Gli schemi ripetuti possono costare fogli: confronto con il
+            # packing normale dell'intero job
+            plain = self._pack(
+                packed.iter_pieces(options['sort_order'], options['seed']), allow_rotation,
+                options['engine'], options['heuristic'], options['bin_mode']
+            )
+            tolerance = math.floor(len(plain) * PATTERN_SHEET_TOLERANCE)
+            pattern_report = {
+                'pattern_sheets': len(sheets),
+                'plain_sheets': len(plain),
+                'patterns_used': len(sheets) <= len(plain) + tolerance
+            }
+            if not pattern_report['patterns_used']:
+                sheets = plain
+            
+            if on_sheet is not None:
+                for sheet in sheets:
+                    on_sheet(sheet)
+        else:
+            # Sequenza ordinata dei pezzi (default: area decrescente, strategia greedy)
+            pieces = packed.iter_pieces(options['sort_order'], options['seed'])
+            if on_piece is not None:
+                pieces = self._watched_pieces(pieces, on_piece)
+            
+            # Esegui nesting con il motore richiesto
+            max_open = 1 if options['bin_mode'] == 'single' else None
+            sheets = []
+            for sheet in self._pack_stream(pieces, allow_rotation, options['engine'],
+                                           options['heuristic'], options['bin_mode'], max_open):
+                sheets.append(sheet)
+                if on_sheet is not None:
+                    on_sheet(sheet)
+        
+        eliminated = 0
+        if options['repack_time_s'] > 0:
+            eliminated = self._repack_tail(sheets, allow_rotation, options['repack_time_s'])
+        
+        if cache_key is not None:
+            self.cache.put(cache_key, {
+                'sheets': self._serialize_sheets(sheets),
+                'sheets_eliminated': eliminated,
+                'pattern_report': pattern_report
+            })
+        self._map_part_types(sheets, packed, table)
+        
+        # Calcola statistiche
+        stats = self._calculate_stats(sheets, table, allow_rotation, eliminated)
+        stats.update(pattern_report or {})
+        return sheets, table, stats, False
+    
+    @staticmethod
+    def _map_part_types(sheets, canonical, table):
+        """
+        Riporta gli id dei piazzamenti dalla tabella canonica a quella ricevuta
+        
+        I pezzi di un tipo canonico vengono assegnati ai tipi originali con
+        stesse dimensioni e nome nell'ordine della tabella, fino a esaurirne
+        la quantità; anche le foglie dell'albero di taglio sono aggiornate.
+        
+        Args:
+            sheets: Lista di sheet (modificata in place)
+            canonical: Tabella canonica usata dal packing (vedi PartTable.canonical())
+            table: Tabella originale
+        """
+        keys = list(zip(table.widths, table.heights, table.names))
+        canonical_keys = list(zip(canonical.widths, canonical.heights, canonical.names))
+        if keys == canonical_keys:
+            return
+        
+        owners = {}
+        for type_id, key in enumerate(keys):
+            owners.setdefault(key, []).append(type_id)
+        queues = [owners[key] for key in canonical_keys]
+        remaining = list(table.counts)
+        
+        for sheet in sheets:
+            placements = []
+            for placement in sheet['placements']:
+                queue = queues[placement.id]
+                while len(queue) > 1 and remaining[queue[0]] <= 0:
+                    queue.pop(0)
+                type_id = queue[0]
+                remaining[type_id] -= 1
+                placements.append(placement._replace(id=type_id, name=table.names[type_id]))
+            sheet['placements'] = placements
+            
+            if sheet.get('cut_tree') is not None:
+                by_position = {(p.x, p.y): p for p in placements}
+                for node in iter_nodes(sheet['cut_tree'], 'part'):
+                    node['placement'] = by_position[(node['placement'].x, node['placement'].y)]
+    
+    @staticmethod
+    def _watched_pieces(pieces, on_piece):
+        """Pezzi in sequenza, con on_piece(pezzi consumati) prima di ciascuno"""
+        for placed, rect in enumerate(pieces):
+            on_piece(placed)
+            yield rect
+    
+    def optimize_iter(self, parts, allow_rotation=True, engine='guillotine', heuristic='best_short_side',
+                      bin_mode='single', sort_order='area', seed=None, max_open_sheets=1):
+        """
+        Versione in streaming di optimize(): restituisce i fogli appena chiusi
+        
+        In memoria restano solo i fogli aperti, quindi anche job di centinaia
+        di pannelli occupano memoria limitata e il primo pannello può andare
+        in produzione mentre i successivi sono ancora in calcolo.
+        
+        Args:
+            parts: Lista di dizionari con 'width', 'height', 'quantity', 'name'
+                oppure PartTable
+            allow_rotation: Permetti rotazione pezzi di 90°
+            engine: Motore di packing
+            heuristic: Euristica MaxRects
+            bin_mode: Scelta del foglio tra quelli aperti
+            sort_order: Ordinamento dei pezzi
+            seed: Seme per sort_order='random'
+            max_open_sheets: Fogli aperti contemporaneamente (sempre 1 in
+                modalità 'single'; None = illimitato, tutto alla fine)
+        
+        Yields:
+            dict: 'sheet' chiuso e 'statistics' progressive
+        """
+        self._validate_options(engine, heuristic, bin_mode, sort_order)
+        
+        table = parts if isinstance(parts, PartTable) else PartTable.from_parts(parts)
+        max_open = 1 if bin_mode == 'single' else max_open_sheets
+        
+        sheets_closed = 0
+        parts_placed = 0
+        used_area = 0
+        
+        for sheet in self._pack_stream(table.iter_pieces(sort_order, seed), allow_rotation,
+                                       engine, heuristic, bin_mode, max_open):
+            sheets_closed += 1
+            parts_placed += len(sheet['placements'])
+            used_area += sum(p.width * p.height for p in sheet['placements'])
+            total_sheet_area = sheets_closed * self.sheet_width * self.sheet_height
+            efficiency = used_area / total_sheet_area * 100
+            
+            yield {
+                'sheet': sheet,
+                'statistics': {
+                    'sheets_closed': sheets_closed,
+                    'parts_placed': parts_placed,
+                    'parts_total': table.total_count(),
+                    'used_area_m2': round(used_area / 1000000, 4),
+                    'total_area_m2': round(total_sheet_area / 1000000, 4),
+                    'efficiency_percent': round(efficiency, 2)
+                }
+            }
+    
+    def optimize_parallel(self, parts, time_budget_s=2.0, workers=None, allow_rotation=True,
+                          random_starts=16):
+        """
+        Ricerca multi-start in parallelo entro un budget di tempo
+        
+        Esegue in un pool di processi molte combinazioni di ordinamento,
+        motore, euristica e modalità fogli e restituisce il risultato
+        migliore: meno pannelli, a parità l'ultimo pannello più vuoto.
+        Se i processi non sono disponibili (es. Python integrato in Fusion)
+        le strategie vengono eseguite in sequenza nello stesso budget.
+        Alla fine della ricerca le strategie ancora in corso nel pool
+        vengono interrotte al pezzo successivo (vedi _optimize_strategy()).
+        
+        Args:
+            parts: Lista di dizionari con 'width', 'height', 'quantity', 'name'
+                oppure PartTable
+            time_budget_s: Tempo massimo di ricerca (secondi)
+            workers: Numero di processi (default: numero di CPU)
+            allow_rotation: Permetti rotazione pezzi di 90°
+            random_starts: Numero di ordinamenti casuali aggiuntivi
+        
+        Returns:
+            dict: Risultato di optimize() con 'strategy' e
+                'strategies_evaluated'
+        """
+        deadline = time.perf_counter() + time_budget_s
+        if not isinstance(parts, PartTable):
+            parts = PartTable.from_parts(parts)
+        strategies = self._parallel_strategies(random_starts)
+        settings = self._settings()
+        lower_bound = max(self.lower_bounds(parts, allow_rotation))
+        
+        best = None
+        evaluated = 0
+        
+        executor = None
+        if _processes_available():
+            try:
+                stop = multiprocessing.Event()
+                executor = ProcessPoolExecutor(
+                    max_workers=workers or os.cpu_count() or 1,
+                    initializer=_init_search_worker,
+                    initargs=(stop,)
+                )
+            except (OSError, ValueError, NotImplementedError):
+                executor = None
+        
+        if executor is not None:
+            try:
+                pending = {
+                    executor.submit(_optimize_strategy, settings, parts, allow_rotation, strategy)
+                    for strategy in strategies
+                }
+                while pending:
+                    remaining = deadline - time.perf_counter()
+                    # Stop a scadenza o quando si raggiunge il limite inferiore
+                    if remaining <= 0 or (best is not None and best['sheets_count'] <= lower_bound):
+                        break
+                    done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        result = future.result()
+                        if result is None:
+                            continue
+                        evaluated += 1
+                        if best is None or _result_rank(result) < _result_rank(best):
+                            best = result
+            except Exception as e:
+                print(f"⚠️ Pool nesting non disponibile, ricerca sequenziale: {e}")
+            finally:
+                # Le strategie in corso terminano al pezzo successivo
+                stop.set()
+                executor.shutdown(wait=False, cancel_futures=True)
+        
+        # Fallback sequenziale (o completamento se il pool è fallito)
+        if best is None:
+            for strategy in strategies:
+                result = _optimize_strategy(settings, parts, allow_rotation, strategy)
+                evaluated += 1
+                if best is None or _result_rank(result) < _result_rank(best):
+                    best = result
+                if time.perf_counter() >= deadline or best['sheets_count'] <= lower_bound:
+                    break
+        
+        best['strategies_evaluated'] = evaluated
+        best['reached_lower_bound'] = best['sheets_count'] <= lower_bound
+        return best
+    
+    def optimize_stock(self, parts, stock=None, allow_rotation=True, engine='maxrects',
+                       heuristic='best_short_side', workers=None):
+        """
+        Nesting su formati di pannello diversi al costo minimo
+        
+        Il layout viene costruito un pannello alla volta: per ogni formato
+        disponibile in magazzino si riempie un pannello candidato con i
+        pezzi rimasti (in parallelo, un candidato per formato) e si sceglie
+        quello con il costo per m² di pezzi piazzati più basso. Se un
+        candidato completa il job viene preferito quando costa meno del
+        migliore più il pannello più economico ancora necessario dopo.
+        Gli sfridi riutilizzabili si inseriscono come formati con
+        'count' 1 e costo basso o nullo.
+        
+        Args:
+            parts: Lista di dizionari con 'width', 'height', 'quantity', 'name'
+                oppure PartTable
+            stock: Magazzino pannelli (default: self.stock, vedi __init__)
+            allow_rotation: Permetti rotazione pezzi di 90°
+            engine: Motore di packing ('guillotine', 'maxrects' o 'skyline')
+            heuristic: Euristica MaxRects
+            workers: Numero di processi (default: numero di CPU, al massimo
+                uno per formato); con un solo processo niente pool
+        
+        Returns:
+            dict: Risultato nel formato di optimize(); ogni foglio ha
+                'width', 'height' e 'stock', le statistiche 'total_cost' e
+                'by_stock'
+        """
+        self._validate_options(engine, heuristic, 'single', 'area')
+        if engine in BATCH_ENGINES:
+            raise ValueError(f"Il motore {engine} non supporta formati misti")
+        
+        stock = self._normalize_stock(stock if stock is not None else self.stock)
+        table = parts if isinstance(parts, PartTable) else PartTable.from_parts(parts)
+        all_pieces = list(table.iter_pieces())
+        pieces = all_pieces
+        remaining = bytearray(b'\x01') * len(all_pieces)
+        available = [entry['count'] for entry in stock]
+        settings = self._settings()
+        
+        # I pezzi arrivano ai processi una volta sola (inizializzatore del
+        # pool); a ogni pannello si inviano solo formato e maschera dei rimasti
+        executor = None
+        workers = workers or min(len(stock), os.cpu_count() or 1)
+        if workers > 1 and len(stock) > 1 and _processes_available():
+            try:
+                executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=_init_stock_worker,
+                    initargs=(settings, all_pieces, allow_rotation, engine, heuristic)
+                )
+            except (OSError, ValueError, NotImplementedError):
+                executor = None
+        
+        sheets = []
+        try:
+            while pieces:
+                indices = [i for i, count in enumerate(available) if count is None or count > 0]
+                if not indices:
+                    print(f"⚠️ Magazzino pannelli esaurito: {len(pieces)} pezzi non piazzati")
+                    break
+                
+                entries = [stock[i] for i in indices]
+                filled = None
+                if executor is not None:
+                    mask = bytes(remaining)
+                    try:
+                        filled = list(executor.map(_fill_stock_sheet_masked, entries, [mask] * len(entries)))
+                    except Exception as e:
+                        print(f"⚠️ Pool nesting non disponibile, valutazione sequenziale: {e}")
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        executor = None
+                if filled is None:
+                    filled = [
+                        _fill_stock_sheet(settings, entry, pieces, allow_rotation, engine, heuristic)
+                        for entry in entries
+                    ]
+                
+                choice = self._choose_stock_sheet(indices, filled, stock, len(pieces))
+                if choice is None:
+                    print(f"⚠️ {len(pieces)} pezzi non entrano in nessun pannello disponibile")
+                    break
+                
+                index, sheet, placed = choice
+                sheet['id'] = len(sheets)
+                sheets.append(sheet)
+                if available[index] is not None:
+                    available[index] -= 1
+                
+                placed = set(placed)
+                positions = [i for i, keep in enumerate(remaining) if keep]
+                for i in placed:
+                    remaining[positions[i]] = 0
+                pieces = [rect for i, rect in enumerate(pieces) if i not in placed]
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        
+        stats = self._calculate_stats(sheets, table, allow_rotation)
+        costs = {entry['name']: entry['cost'] for entry in stock}
+        by_stock = {}
+        for sheet in sheets:
+            item = by_stock.setdefault(sheet['stock'], {'sheets': 0, 'cost': 0})
+            item['sheets'] += 1
+            item['cost'] = round(item['cost'] + costs[sheet['stock']], 2)
+        stats['total_cost'] = round(sum(item['cost'] for item in by_stock.values()), 2)
+        stats['by_stock'] = by_stock
+        
+        return {
+            'sheets': sheets,
+            'statistics': stats,
+            'parts_count': table.total_count(),
+            'sheets_count': len(sheets),
+            'part_table': table
+        }
+    
+    def _normalize_stock(self, stock):
+        """
+        Completa e valida il magazzino pannelli
+        
+        Args:
+            stock: Lista di formati oppure None (solo pannello standard)
+        
+        Returns:
+            list: Formati con 'name', 'width', 'height', 'count' e 'cost'
+                (default: area in m², cioè costo proporzionale all'area)
+        """
+        if stock is None:
+            stock = [{'width': self.sheet_width, 'height': self.sheet_height}]
+        if not stock:
+            raise ValueError("Magazzino pannelli vuoto")
+        
+        normalized = []
+        for entry in stock:
+            width = entry['width']
+            height = entry['height']
+            if width <= 2 * self.margin or height <= 2 * self.margin:
+                raise ValueError(f"Formato pannello non valido: {width}x{height}")
+            normalized.append({
+                'name': entry.get('name') or f"{width}x{height}",
+                'width': width,
+                'height': height,
+                'count': entry.get('count'),
+                'cost': entry.get('cost', width * height / 1000000)
+            })
+        return normalized
+    
+    def _choose_stock_sheet(self, indices, filled, stock, remaining):
+        """
+        Sceglie il pannello candidato da aggiungere al layout
+        
+        Args:
+            indices: Indici dei formati valutati
+            filled: Risultati di _fill_stock_sheet() nello stesso ordine
+            stock: Magazzino normalizzato
+            remaining: Numero di pezzi ancora da piazzare
+        
+        Returns:
+            tuple: (indice formato, sheet, indici dei pezzi piazzati) oppure
+                None se nessun candidato piazza pezzi
+        """
+        candidates = []
+        for index, (sheet, placed, area) in zip(indices, filled):
+            if placed:
+                candidates.append((stock[index]['cost'], area, index, sheet, placed))
+        if not candidates:
+            return None
+        
+        # Costo per area piazzata, a parità più area
+        best = min(candidates, key=lambda c: (c[0] / c[1], -c[1]))
+        
+        finishing = [c for c in candidates if len(c[4]) == remaining]
+        if finishing and best not in finishing:
+            cheapest = min(finishing, key=lambda c: c[0])
+            # Il migliore per rapporto richiede almeno un altro pannello
+            min_cost = min(stock[i]['cost'] for i in indices)
+            if cheapest[0] <= best[0] + min_cost:
+                best = cheapest
+        
+        return best[2], best[3], best[4]
+    
+    def lower_bounds(self, parts, allow_rotation=True):
+        """
+        Limiti inferiori sul numero di pannelli
+        
+        Le dimensioni includono il taglio lama e l'area utile esclude i
+        margini, coerentemente con i test di ingombro dei motori.
+        
+        - L1: area totale dei pezzi / area utile del pannello
+        - L2: i pezzi "grandi" (oltre metà pannello in entrambe le direzioni,
+          per ogni orientazione ammessa) non possono condividere un pannello;
+          l'area degli altri pezzi che non entra nello spazio residuo dei
+          pannelli dei pezzi grandi richiede pannelli aggiuntivi
+          (schema alla Martello-Toth per item grandi)
+        
+        Args:
+            parts: Lista parti oppure PartTable
+            allow_rotation: Permetti rotazione pezzi di 90°
+        
+        Returns:
+            tuple: (L1, L2)
+        """
+        table = parts if isinstance(parts, PartTable) else PartTable.from_parts(parts)
+        
+        bin_w = self.sheet_width - 2 * self.margin
+        bin_h = self.sheet_height - 2 * self.margin
+        bin_area = bin_w * bin_h
+        if bin_area <= 0:
+            return (0, 0)
+        
+        total_area = 0
+        big_count = 0
+        big_area = 0
+        
+        for w, h, count in zip(table.widths, table.heights, table.counts):
+            fw = w + self.blade_width
+            fh = h + self.blade_width
+            
+            fits = fw <= bin_w and fh <= bin_h
+            fits_rotated = allow_rotation and fh <= bin_w and fw <= bin_h
+            if not (fits or fits_rotated):
+                # Pezzo fuori misura: non viene piazzato
+                continue
+            
+            area = fw * fh * count
+            total_area += area
+            
+            big = fw > bin_w / 2 and fh > bin_h / 2
+            if allow_rotation:
+                big = big and fh > bin_w / 2 and fw > bin_h / 2
+            if big:
+                big_count += count
+                big_area += area
+        
+        l1 = math.ceil(total_area / bin_area)
+        
+        residual = big_count * bin_area - big_area
+        overflow = (total_area - big_area) - residual
+        l2 = big_count + max(0, math.ceil(overflow / bin_area))
+        
+        return (l1, l2)
+    
+    def saw_program(self, sheet):
+        """
+        Programma sega di un foglio prodotto dal motore guillotine
+        
+        Args:
+            sheet: Foglio con 'cut_tree'
+        
+        Returns:
+            dict: 'sheet' (id), 'sheet_size', 'program' (albero in formato
+                JSON compatto), 'sequence' (tagli in ordine di esecuzione,
+                vedi cut_tree.cut_sequence) e 'rotations'
+        """
+        tree = sheet.get('cut_tree')
+        if tree is None:
+            raise ValueError(f"Il pannello {sheet['id']} non ha un albero di taglio a ghigliottina")
+        
+        sequence = cut_sequence(tree)
+        return {
+            'sheet': sheet['id'],
+            'sheet_size': (self.sheet_width, self.sheet_height),
+            'program': serialize_cut_tree(tree, self.blade_width),
+            'sequence': sequence,
+            'rotations': sum(1 for cut in sequence if cut['rotate'])
+        }
+    
+    def _parallel_strategies(self, random_starts):
+        """
+        Elenca le strategie della ricerca multi-start
+        
+        Le strategie deterministiche vengono prima, così con budget ridotti
+        si valutano comunque le combinazioni più promettenti.
+        
+        Args:
+            random_starts: Numero di ordinamenti casuali
+        
+        Returns:
+            list: Dizionari con i parametri di optimize()
+        """
+        strategies = []
+        for sort_order in SORT_ORDERS:
+            for heuristic in MAXRECTS_HEURISTICS:
+                for bin_mode in ('best_fit', 'single'):
+                    strategies.append({
+                        'engine': 'maxrects',
+                        'heuristic': heuristic,
+                        'bin_mode': bin_mode,
+                        'sort_order': sort_order,
+                        'seed': None
+                    })
+            strategies.append({
+                'engine': 'guillotine',
+                'heuristic': 'best_short_side',
+                'bin_mode': 'best_fit',
+                'sort_order': sort_order,
+                'seed': None
+            })
+        
+        strategies.append({
+            'engine': 'staged',
+            'heuristic': 'best_short_side',
+            'bin_mode': 'single',
+            'sort_order': 'area',
+            'seed': None
+        })
+        
+        for seed in range(random_starts):
+            strategies.append({
+                'engine': 'maxrects',
+                'heuristic': MAXRECTS_HEURISTICS[seed % len(MAXRECTS_HEURISTICS)],
+                'bin_mode': 'best_fit',
+                'sort_order': 'random',
+                'seed': seed
+            })
+        
+        return strategies
+    
+    def optimize_progressive(self, parts, deadline_s=5.0, allow_rotation=True, seed=0):
+        """
+        Ottimizzazione anytime: genera layout sempre migliori fino alla scadenza
+        
+        Il primo risultato è il greedy MaxRects best-fit, disponibile subito.
+        Poi una ricerca ruin-and-recreate svuota il foglio più debole (più
+        qualche foglio casuale) e reinserisce i pezzi negli altri fogli;
+        ogni soluzione strettamente migliore viene restituita appena trovata.
+        
+        Args:
+            parts: Lista di dizionari con 'width', 'height', 'quantity', 'name'
+                oppure PartTable
+            deadline_s: Tempo massimo di miglioramento (secondi)
+            allow_rotation: Permetti rotazione pezzi di 90°
+            seed: Seme della ricerca casuale
+        
+        Yields:
+            dict: Risultato nel formato di optimize() con 'iteration' e
+                'elapsed_s'
+        """
+        start = time.perf_counter()
+        deadline = start + deadline_s
+        rng = random.Random(seed)
+        
+        table = parts if isinstance(parts, PartTable) else PartTable.from_parts(parts)
+        lower_bound = max(self.lower_bounds(table, allow_rotation))
+        current = self._pack(table.iter_pieces(), allow_rotation, 'maxrects', 'best_short_side', 'best_fit')
+        best_rank = self._solution_rank(current)
+        iteration = 0
+        
+        yield self._progressive_result(current, table, iteration, start, allow_rotation)
+        
+        # Inutile continuare una volta raggiunto il limite inferiore
+        while time.perf_counter() < deadline and len(current) > lower_bound:
+            iteration += 1
+            trial = self._ruin_and_recreate(current, table, allow_rotation, rng)
+            rank = self._solution_rank(trial)
+            
+            # Accetta anche mosse laterali per uscire dai plateau
+            if rank <= self._solution_rank(current):
+                current = trial
+            if rank < best_rank:
+                best_rank = rank
+                yield self._progressive_result(current, table, iteration, start, allow_rotation)
+    
+    def optimize_anytime(self, parts, deadline_s=5.0, callback=None, allow_rotation=True, seed=0):
+        """
+        Esegue optimize_progressive() e restituisce il miglior risultato
+        
+        Args:
+            parts: Lista parti oppure PartTable
+            deadline_s: Tempo massimo di miglioramento (secondi)
+            callback: Funzione chiamata con ogni risultato migliore; se
+                restituisce True la ricerca si interrompe (es. l'operatore
+                ha accettato il layout)
+            allow_rotation: Permetti rotazione pezzi di 90°
+            seed: Seme della ricerca casuale
+        
+        Returns:
+            dict: Miglior risultato trovato
+        """
+        best = None
+        for result in self.optimize_progressive(parts, deadline_s, allow_rotation, seed):
+            best = result
+            if callback is not None and callback(result):
+                break
+        return best
+    
+    def _ruin_and_recreate(self, sheets, table, allow_rotation, rng):
+        """
+        Una mossa ruin-and-recreate su una copia della soluzione
+        
+        Args:
+            sheets: Soluzione corrente (non modificata)
+            table: PartTable dei pezzi
+            allow_rotation: Permetti rotazione
+            rng: Generatore casuale
+        
+        Returns:
+            list: Nuova soluzione
+        """
+        weakest = min(range(len(sheets)), key=lambda i: sheets[i]['used_area'])
+        ruined = {weakest}
+        extra = rng.randint(0, min(2, len(sheets) - 1))
+        while len(ruined) < 1 + extra:
+            ruined.add(rng.randrange(len(sheets)))
+        
+        trial = []
+        pieces = []
+        for i, sheet in enumerate(sheets):
+            if i in ruined:
+                pieces.extend(table.rect(p.id) for p in sheet['placements'])
+            else:
+                trial.append(self._copy_sheet(sheet))
+        
+        # Ricrea: area decrescente con perturbazione casuale dell'ordine
+        noise = rng.uniform(0, 0.3)
+        pieces.sort(key=lambda r: r.width * r.height * (1 + rng.uniform(-noise, noise)), reverse=True)
+        
+        heuristic = rng.choice(MAXRECTS_HEURISTICS)
+        for rect in pieces:
+            target, placement = self._select_sheet(
+                rect, trial, allow_rotation, 'maxrects', heuristic, 'best_fit'
+            )
+            if placement is None:
+                target = self._new_sheet(len(trial))
+                placement, _ = self._find_in_sheet(rect, target, allow_rotation, 'maxrects', heuristic)
+                if placement is None:
+                    continue
+                trial.append(target)
+            self._commit_placement(target, placement, 'maxrects')
+        
+        for sheet_id, sheet in enumerate(trial):
+            sheet['id'] = sheet_id
+        return trial
+    
+    def _copy_sheet(self, sheet):
+        """
+        Copia un foglio per modificarlo senza toccare l'originale
+        
+        I rettangoli liberi non vengono mai modificati in place dallo split,
+        quindi basta copiare le liste.
+        """
+        copy = dict(sheet)
+        copy['placements'] = list(sheet['placements'])
+        copy['free_rectangles'] = list(sheet['free_rectangles'])
+        return copy
+    
+    def _clone_sheet(self, sheet):
+        """
+        Copia indipendente di un foglio, albero di taglio compreso
+        
+        A differenza di _copy_sheet() duplica anche i nodi dell'albero, che
+        lo split guillotine trasforma in place, e il profilo skyline.
+        """
+        clone = self._copy_sheet(sheet)
+        
+        tree = sheet.get('cut_tree')
+        if tree is not None:
+            root = dict(tree)
+            leaves = {}
+            stack = [(tree, root)]
+            while stack:
+                original, node = stack.pop()
+                if node['type'] == 'free':
+                    leaves[id(original)] = node
+                elif node['type'] == 'cut':
+                    for side in ('first', 'second'):
+                        if original[side] is not None:
+                            node[side] = dict(original[side])
+                            stack.append((original[side], node[side]))
+            clone['cut_tree'] = root
+            clone['free_rectangles'] = [leaves[id(leaf)] for leaf in sheet['free_rectangles']]
+        
+        if sheet.get('skyline') is not None:
+            clone['skyline'] = tuple(array('d', line) for line in sheet['skyline'])
+        return clone
+    
+    def _solution_rank(self, sheets):
+        """
+        Chiave di confronto tra soluzioni (minore è migliore)
+        
+        Meno fogli; a parità, foglio più debole più vuoto (è il prossimo
+        candidato a essere eliminato).
+        """
+        if not sheets:
+            return (0, 0)
+        return (len(sheets), min(sheet['used_area'] for sheet in sheets))
+    
+    def _progressive_result(self, sheets, table, iteration, start, allow_rotation):
+        """Risultato nel formato di optimize() per la ricerca anytime"""
+        return {
+            'sheets': sheets,
+            'statistics': self._calculate_stats(sheets, table, allow_rotation),
+            'parts_count': table.total_count(),
+            'sheets_count': len(sheets),
+            'part_table': table,
+            'iteration': iteration,
+            'elapsed_s': round(time.perf_counter() - start, 4)
+        }
+    
+    def _validate_options(self, engine, heuristic, bin_mode, sort_order):
+        """Verifica le opzioni di optimize() (ValueError se non valide)"""
+        if engine not in ENGINES:
+            raise ValueError(f"Motore nesting sconosciuto: {engine}")
+        if engine == 'maxrects' and heuristic not in MAXRECTS_HEURISTICS:
+            raise ValueError(f"Euristica MaxRects sconosciuta: {heuristic}")
+        if bin_mode not in BIN_MODES:
+            raise ValueError(f"Modalità fogli sconosciuta: {bin_mode}")
+        if engine == 'staged' and self.max_stages not in (2, 3):
+            raise ValueError(f"Numero di stadi non supportato: {self.max_stages}")
+        if sort_order != 'random' and sort_order not in SORT_ORDERS:
+            raise ValueError(f"Ordinamento sconosciuto: {sort_order}")
+    
+    def _settings(self):
+        """Parametri dell'ottimizzatore necessari a ricrearlo in un altro processo"""
+        return {
+            'sheet_width': self.sheet_width,
+            'sheet_height': self.sheet_height,
+            'blade_width': self.blade_width,
+            'margin': self.margin,
+            'max_stages': self.max_stages
+        }
+    
+    def _cache_key(self, table, options):
+        """
+        Hash canonico di un job di nesting
+        
+        Comprende il multinsieme dei pezzi, i parametri del foglio e della
+        lama, le opzioni di optimize() e NESTING_ENGINE_VERSION. Del ripasso
+        conta solo se è attivo: il suo risultato dipende dal tempo
+        disponibile sulla macchina, non dal valore di repack_time_s.
+        
+        Args:
+            table: PartTable canonica
+            options: Opzioni di optimize()
+        
+        Returns:
+            str: Digest SHA-256 esadecimale
+        """
+        payload = {
+            'engine_version': NESTING_ENGINE_VERSION,
+            'settings': self._settings(),
+            'options': dict(options, repack_time_s=options['repack_time_s'] > 0),
+            'parts': [
+                [w, h, c, name]
+                for w, h, c, name in zip(table.widths, table.heights, table.counts, table.names)
+            ]
+        }
+        canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+    
+    def _serialize_sheets(self, sheets):
+        """
+        Converte i fogli in una struttura JSON compatta
+        
+        Lo spazio libero non viene salvato: si ricostruisce dai piazzamenti
+        oppure, per il motore guillotine, dall'albero di taglio.
+        
+        Args:
+            sheets: Lista di sheet
+        
+        Returns:
+            list: Fogli serializzabili
+        """
+        data = []
+        for sheet in sheets:
+            item = {
+                'id': sheet['id'],
+                'placements': [
+                    [p.x, p.y, p.width, p.height, p.id, p.rotated]
+                    for p in sheet['placements']
+                ]
+            }
+            if sheet.get('cut_tree') is not None:
+                item['cut_tree'] = serialize_cut_tree(sheet['cut_tree'], self.blade_width)
+            data.append(item)
+        return data
+    
+    def _restore_sheets(self, data, table):
+        """
+        Ricostruisce i fogli salvati con _serialize_sheets
+        
+        Args:
+            data: Fogli serializzati
+            table: PartTable a cui si riferiscono gli indici di tipo
+        
+        Returns:
+            list: Lista di sheet con spazio libero ricostruito
+        """
+        sheets = []
+        for item in data:
+            sheet = self._new_sheet(item['id'])
+            sheet['placements'] = [
+                Placement(x, y, w, h, type_id, table.names[type_id], rotated)
+                for x, y, w, h, type_id, rotated in item['placements']
+            ]
+            self._rebuild_free_space(sheet)
+            
+            if 'cut_tree' in item:
+                sheet['cut_tree'] = deserialize_cut_tree(
+                    item['cut_tree'],
+                    lambda x, y, w, h, type_id, rotated: Placement(
+                        x, y, w, h, type_id, table.names[type_id], rotated
+                    )
+                )
+                sheet['free_rectangles'] = list(iter_nodes(sheet['cut_tree'], 'free'))
+                self._update_free_index(sheet)
+            sheets.append(sheet)
+        return sheets
+    
+    def _rebuild_free_space(self, sheet):
+        """
+        Ricalcola spazio libero, area usata e indice di un foglio dai pezzi
+        
+        Lo spazio libero viene ricostruito con lo split MaxRects, valido per
+        qualunque insieme di piazzamenti non sovrapposti; l'albero di taglio
+        non corrisponde più ai pezzi e viene scartato.
+        
+        Args:
+            sheet: Foglio da ricostruire (modificato in place)
+        """
+        fresh = self._new_sheet(sheet['id'])
+        
+        for placement in sheet['placements']:
+            self._maxrects_split(fresh['free_rectangles'], placement)
+            fresh['used_area'] += (
+                (placement.width + self.blade_width) * (placement.height + self.blade_width)
+            )
+        
+        sheet['free_rectangles'] = fresh['free_rectangles']
+        sheet['used_area'] = fresh['used_area']
+        sheet['cut_tree'] = None
+        # Il profilo skyline viene ricalcolato dai pezzi al prossimo uso
+        sheet.pop('skyline', None)
+        self._update_free_index(sheet)
+    
+    def _pack(self, rectangles, allow_rotation, engine, heuristic, bin_mode):
+        """
+        Ciclo di packing comune a tutti i motori
+        
+        In modalità 'single' è aperto solo l'ultimo foglio: quando un pezzo
+        non entra il foglio viene chiuso definitivamente. Nelle modalità
+        open-bin ogni pezzo viene valutato su tutti i fogli aperti; i fogli
+        il cui rettangolo libero più grande non può contenere il pezzo
+        vengono scartati in O(1) tramite l'indice 'max_free'.
+        
+        Args:
+            rectangles: Sequenza di Rectangle (uno per pezzo)
+            allow_rotation: Permetti rotazione
+            engine: Motore di packing
+            heuristic: Euristica MaxRects
+            bin_mode: Strategia di scelta del foglio (vedi BIN_MODES)
+        
+        Returns:
+            list: Lista di sheet (pannelli) con placements
+        """
+        max_open = 1 if bin_mode == 'single' else None
+        return list(self._pack_stream(rectangles, allow_rotation, engine, heuristic, bin_mode, max_open))
+    
+    def _pack_patterns(self, table, allow_rotation, engine, heuristic, bin_mode, sort_order, seed, repeat=None):
+        """
+        Packing con riuso del sottoinsieme ripetuto dei pezzi
+        
+        Se tutte le quantità hanno un divisore comune g (es. g mobili
+        identici) si impacca una sola volta la tabella con quantità divise
+        per g: i suoi fogli, tranne il più vuoto, vengono ripetuti g volte.
+        I pezzi del foglio più vuoto, moltiplicati per g, vengono impaccati
+        insieme con lo stesso procedimento e un divisore minore, così lo
+        sfrido non si ripete g volte. Se il sottoinsieme non supera un
+        foglio si usa un divisore minore (più mobili per sottoinsieme).
+        
+        Args:
+            table: PartTable dei pezzi
+            allow_rotation: Permetti rotazione
+            engine: Motore di packing
+            heuristic: Euristica MaxRects
+            bin_mode: Strategia di scelta del foglio
+            sort_order: Ordinamento dei pezzi
+            seed: Seme per sort_order='random'
+            repeat: Numero di ripetizioni (default: MCD delle quantità)
+        
+        Returns:
+            list: Lista di sheet, con le copie di uno schema consecutive
+        """
+        if repeat is None:
+            repeat = 0
+            for count in table.counts:
+                repeat = math.gcd(repeat, count)
+        
+        while repeat > 1 and table.total_area() / repeat <= self._usable_area():
+            repeat //= _smallest_factor(repeat)
+        
+        if repeat > 1:
+            base = PartTable()
+            for w, h, c, name in zip(table.widths, table.heights, table.counts, table.names):
+                base.add(w, h, c // repeat, name)
+            base_sheets = self._pack(
+                base.iter_pieces(sort_order, seed), allow_rotation, engine, heuristic, bin_mode
+            )
+        
+        if repeat <= 1 or len(base_sheets) < 2:
+            # Niente da ripetere: packing dell'intero job
+            return self._pack(
+                table.iter_pieces(sort_order, seed), allow_rotation, engine, heuristic, bin_mode
+            )
+        
+        weakest = min(range(len(base_sheets)), key=lambda i: base_sheets[i]['used_area'])
+        
+        rest_counts = [0] * len(table)
+        for placement in base_sheets[weakest]['placements']:
+            rest_counts[placement.id] += repeat
+        rest = PartTable()
+        for w, h, c, name in zip(table.widths, table.heights, rest_counts, table.names):
+            rest.add(w, h, c, name)
+        
+        sheets = []
+        for index, sheet in enumerate(base_sheets):
+            if index == weakest:
+                continue
+            sheets.append(sheet)
+            # Copie indipendenti: ripasso e sessioni modificano i fogli in place
+            sheets.extend(self._clone_sheet(sheet) for _ in range(repeat - 1))
+        sheets.extend(self._pack_patterns(
+            rest, allow_rotation, engine, heuristic, bin_mode, sort_order, seed,
+            repeat // _smallest_factor(repeat)
+        ))
+        
+        for sheet_id, sheet in enumerate(sheets):
+            sheet['id'] = sheet_id
+        return sheets
+    
+    def _pack_stream(self, rectangles, allow_rotation, engine, heuristic, bin_mode, max_open):
+        """
+        Ciclo di packing che restituisce i fogli man mano che vengono chiusi
+        
+        Al massimo max_open fogli restano aperti: aprendone uno nuovo oltre
+        il limite si chiude (e si restituisce) il più vecchio. Con max_open
+        None tutti i fogli restano aperti fino alla fine.
+        
+        Args:
+            rectangles: Sequenza di Rectangle (uno per pezzo)
+            allow_rotation: Permetti rotazione
+            engine: Motore di packing
+            heuristic: Euristica MaxRects
+            bin_mode: Strategia di scelta del foglio (vedi BIN_MODES)
+            max_open: Numero massimo di fogli aperti (None = illimitato)
+        
+        Yields:
+            dict: Sheet chiuso, in ordine di id
+        """
+        if engine == 'staged':
+            yield from self._pack_staged(rectangles, allow_rotation)
+            return
+        
+        open_sheets = []
+        next_id = 0
+        for rect in rectangles:
+            target, placement = self._select_sheet(
+                rect, open_sheets, allow_rotation, engine, heuristic, bin_mode
+            )
+            
+            # Se non entra in nessun foglio aperto, crea nuovo foglio
+            if placement is None:
+                target = self._new_sheet(next_id)
+                placement, _ = self._find_in_sheet(rect, target, allow_rotation, engine, heuristic)
+                if placement is None:
+                    # Pezzo più grande dell'area utile del foglio
+                    continue
+                
+                next_id += 1
+                open_sheets.append(target)
+                if max_open is not None and len(open_sheets) > max_open:
+                    yield open_sheets.pop(0)
+            
+            self._commit_placement(target, placement, engine)
+        
+        yield from open_sheets
+    
+    def _pack_staged(self, rectangles, allow_rotation):
+        """
+        Motore a stadi per sezionatrici: fasce, colonne e pezzi impilati
+        
+        Stadio 1: il pannello è diviso in fasce orizzontali (tagli 'rip')
+        alte quanto il pezzo più alto rimasto. Stadio 2: ogni fascia è
+        riempita da sinistra con un problema di zaino sulle larghezze e
+        divisa in colonne (tagli 'crosscut'). Stadio 3 (max_stages=3): sopra
+        ogni pezzo più basso della fascia si impilano altri pezzi non più
+        larghi della colonna, con uno zaino sulle altezze. Le fasce vengono
+        infine assegnate ai pannelli con uno zaino sulle altezze delle fasce.
+        
+        Le composizioni di fascia sono memorizzate per altezza e pezzi
+        disponibili: fasce uguali successive (pezzi ripetuti) non ricalcolano
+        lo zaino.
+        
+        Args:
+            rectangles: Sequenza di Rectangle (uno per pezzo)
+            allow_rotation: Permetti rotazione
+        
+        Yields:
+            dict: Sheet con placements e cut_tree, in ordine di id
+        """
+        kerf = self.blade_width
+        usable_width = self.sheet_width - 2 * self.margin
+        usable_height = self.sheet_height - 2 * self.margin
+        
+        pool = self._staged_pool(rectangles, allow_rotation, usable_width, usable_height)
+        
+        strips = []
+        memo = {}
+        while any(entry['count'] for entry in pool):
+            strips.append(self._build_strip(pool, usable_width, memo))
+        
+        # Fasce più alte in basso; ogni pannello parte dalla fascia più alta
+        strips.sort(key=lambda strip: strip['height'], reverse=True)
+        sheet_id = 0
+        while strips:
+            first = strips.pop(0)
+            capacity = usable_height - (first['height'] + kerf)
+            chosen = _subset_sum([math.ceil(s['height'] + kerf) for s in strips], math.floor(capacity))
+            
+            sheet_strips = [first] + [strips[i] for i in sorted(chosen)]
+            for i in sorted(chosen, reverse=True):
+                del strips[i]
+            
+            yield self._build_staged_sheet(sheet_id, sheet_strips)
+            sheet_id += 1
+    
+    def _staged_pool(self, rectangles, allow_rotation, usable_width, usable_height):
+        """
+        Raggruppa i pezzi per tipo con l'orientamento usato nelle fasce
+        
+        Con la rotazione ammessa i pezzi sono coricati (lato lungo in
+        orizzontale) per ottenere fasce basse. I pezzi che non entrano nel
+        pannello vengono scartati, come negli altri motori.
+        
+        Returns:
+            list: Voci con 'rect', 'width', 'height', 'rotated', 'count',
+                ordinate per altezza e larghezza decrescenti
+        """
+        kerf = self.blade_width
+        entries = {}
+        
+        for rect in rectangles:
+            entry = entries.get(rect.id)
+            if entry is None:
+                fits = rect.width + kerf <= usable_width and rect.height + kerf <= usable_height
+                fits_rotated = (allow_rotation and rect.height + kerf <= usable_width and
+                                rect.width + kerf <= usable_height)
+                
+                rotated = fits_rotated and (not fits or rect.height > rect.width)
+                entry = {
+                    'rect': rect,
+                    'width': rect.height if rotated else rect.width,
+                    'height': rect.width if rotated else rect.height,
+                    'rotated': rotated,
+                    'count': 0,
+                    'fits': fits or fits_rotated
+                }
+                entries[rect.id] = entry
+            entry['count'] += 1
+        
+        pool = [entry for entry in entries.values() if entry.pop('fits')]
+        pool.sort(key=lambda e: (e['height'], e['width']), reverse=True)
+        return pool
+    
+    def _build_strip(self, pool, usable_width, memo):
+        """
+        Compone una fascia a partire dal pezzo più alto rimasto
+        
+        Args:
+            pool: Voci di _staged_pool() (contatori aggiornati in place)
+            usable_width: Larghezza utile del pannello
+            memo: Composizioni già calcolate per (altezza, pezzi disponibili)
+        
+        Returns:
+            dict: Fascia con 'height' e 'columns' (liste di voci dal basso)
+        """
+        kerf = self.blade_width
+        available = [entry for entry in pool if entry['count'] > 0]
+        first = available[0]
+        height = first['height']
+        
+        # Copie utilizzabili al massimo in una fascia: oltre non cambiano lo zaino
+        caps = [
+            min(entry['count'], int(usable_width // (entry['width'] + kerf)))
+            for entry in available
+        ]
+        key = (height, tuple((id(entry), cap) for entry, cap in zip(available, caps)))
+        
+        pattern = memo.get(key)
+        if pattern is None:
+            pattern = [first]
+            capacity = usable_width - (first['width'] + kerf)
+            caps[0] -= 1
+            
+            # Prima i pezzi alti quasi quanto la fascia, poi gli altri
+            tall = [i for i, e in enumerate(available) if e['height'] >= STAGED_STRIP_RATIO * height]
+            short = [i for i, e in enumerate(available) if e['height'] < STAGED_STRIP_RATIO * height]
+            for group in (tall, short):
+                chosen = _bounded_subset_sum(
+                    [math.ceil(available[i]['width'] + kerf) for i in group],
+                    [caps[i] for i in group],
+                    math.floor(capacity)
+                )
+                for i, copies in zip(group, chosen):
+                    pattern.extend([available[i]] * copies)
+                    capacity -= copies * (available[i]['width'] + kerf)
+                    caps[i] -= copies
+            
+            memo[key] = pattern
+        
+        for entry in pattern:
+            entry['count'] -= 1
+        
+        columns = [[entry] for entry in pattern]
+        if self.max_stages >= 3:
+            for column in columns:
+                self._stack_column(column, height, pool)
+        
+        return {'height': height, 'columns': columns}
+    
+    def _stack_column(self, column, height, pool):
+        """
+        Impila pezzi sopra il primo pezzo di una colonna (terzo stadio)
+        
+        Args:
+            column: Colonna con il pezzo di base (estesa in place)
+            height: Altezza della fascia
+            pool: Voci di _staged_pool() (contatori aggiornati in place)
+        """
+        kerf = self.blade_width
+        column_width = column[0]['width']
+        # La colonna occupa height + kerf, il pezzo di base height_0 + kerf
+        capacity = height - column[0]['height']
+        
+        candidates = [
+            entry for entry in pool
+            if entry['count'] > 0 and entry['width'] <= column_width and entry['height'] + kerf <= capacity
+        ]
+        if not candidates:
+            return
+        
+        # I più larghi prima: meno rifilo a fianco del pezzo
+        candidates.sort(key=lambda e: (e['width'], e['height']), reverse=True)
+        chosen = _bounded_subset_sum(
+            [math.ceil(e['height'] + kerf) for e in candidates],
+            [e['count'] for e in candidates],
+            math.floor(capacity)
+        )
+        for entry, copies in zip(candidates, chosen):
+            column.extend([entry] * copies)
+            entry['count'] -= copies
+    
+    def _build_staged_sheet(self, sheet_id, strips):
+        """
+        Costruisce foglio, piazzamenti e albero di taglio da una pila di fasce
+        
+        Args:
+            sheet_id: Indice del foglio
+            strips: Fasce dal basso verso l'alto
+        
+        Returns:
+            dict: Sheet completo con cut_tree
+        """
+        kerf = self.blade_width
+        sheet = self._new_sheet(sheet_id)
+        free = []
+        
+        def cut(node, kind, offset):
+            """Taglia node solo se offset è minore della sua estensione"""
+            size = node['height'] if kind == 'rip' else node['width']
+            if offset < size:
+                return split_node(node, kind, offset, kerf)
+            return node, None
+        
+        remaining = sheet['cut_tree']
+        for strip in strips:
+            strip_node, remaining = cut(remaining, 'rip', strip['height'])
+            
+            for column in strip['columns']:
+                column_node, strip_node = cut(strip_node, 'crosscut', column[0]['width'])
+                
+                for entry in column:
+                    cell, column_node = cut(column_node, 'rip', entry['height'])
+                    part, trim = cut(cell, 'crosscut', entry['width'])
+                    if trim is not None:
+                        free.append(trim)
+                    
+                    rect = entry['rect']
+                    placement = Placement(
+                        x=part['x'], y=part['y'], width=entry['width'], height=entry['height'],
+                        id=rect.id, name=rect.name, rotated=entry['rotated']
+                    )
+                    part['type'] = 'part'
+                    part['placement'] = placement
+                    sheet['placements'].append(placement)
+                    sheet['used_area'] += (placement.width + kerf) * (placement.height + kerf)
+                
+                if column_node is not None:
+                    free.append(column_node)
+            
+            if strip_node is not None:
+                free.append(strip_node)
+        
+        if remaining is not None:
+            free.append(remaining)
+        
+        sheet['free_rectangles'] = free
+        self._update_free_index(sheet)
+        return sheet
+    
+    def _repack_tail(self, sheets, allow_rotation, time_limit_s):
+        """
+        Ripasso sugli ultimi fogli: prova a svuotarli nei fogli precedenti
+        
+        I pezzi del foglio più vuoto (poi, se non basta, dei due più vuoti)
+        vengono reinseriti nello spazio libero degli altri fogli con un
+        branch-and-bound esatto entro il tempo massimo. Ogni foglio svuotato
+        viene eliminato e il ripasso ricomincia dal nuovo foglio più vuoto.
+        I fogli con albero di taglio restano a ghigliottina.
+        
+        Args:
+            sheets: Lista di sheet (modificata in place)
+            allow_rotation: Permetti rotazione
+            time_limit_s: Tempo massimo complessivo (secondi)
+        
+        Returns:
+            int: Numero di fogli eliminati
+        """
+        deadline = time.perf_counter() + time_limit_s
+        eliminated = 0
+        tail_size = 1
+        
+        while tail_size <= 2 and len(sheets) > tail_size and time.perf_counter() < deadline:
+            by_usage = sorted(range(len(sheets)), key=lambda i: sheets[i]['used_area'])
+            tail = set(by_usage[:tail_size])
+            targets = [sheet for i, sheet in enumerate(sheets) if i not in tail]
+            pieces = [p for i in sorted(tail) for p in sheets[i]['placements']]
+            
+            moves = self._branch_and_bound(pieces, targets, allow_rotation, deadline)
+            if moves is None:
+                tail_size += 1
+                continue
+            
+            rebuild = []
+            for target_index, placement in moves:
+                target = targets[target_index]
+                if target.get('cut_tree') is not None:
+                    self._commit_placement(target, placement, 'guillotine')
+                else:
+                    target['placements'].append(placement)
+                    if target not in rebuild:
+                        rebuild.append(target)
+            for target in rebuild:
+                self._rebuild_free_space(target)
+            
+            sheets[:] = targets
+            eliminated += tail_size
+            tail_size = 1
+        
+        for sheet_id, sheet in enumerate(sheets):
+            sheet['id'] = sheet_id
+        return eliminated
+    
+    def _branch_and_bound(self, pieces, targets, allow_rotation, deadline):
+        """
+        Cerca un inserimento di tutti i pezzi nello spazio libero dei fogli
+        
+        Ricerca in profondità sui pezzi in ordine di area decrescente; per
+        ogni pezzo si provano tutti i rettangoli liberi di tutti i fogli
+        (prima i fit più stretti). Un ramo viene potato quando l'area dei
+        pezzi rimasti supera l'area libera; gli stati già falliti (pezzo
+        corrente + spazio libero di ogni foglio) sono memorizzati.
+        
+        Lo spazio libero è modellato con tuple immutabili: foglie disgiunte
+        con lo split di _cut_leaf() per i fogli con albero di taglio,
+        rettangoli MaxRects per gli altri.
+        
+        Args:
+            pieces: Placement da reinserire
+            targets: Fogli di destinazione (non modificati)
+            allow_rotation: Permetti rotazione
+            deadline: Istante limite (time.perf_counter())
+        
+        Returns:
+            list: Coppie (indice foglio, Placement) oppure None se non
+                trovato entro il tempo
+        """
+        kerf = self.blade_width
+        
+        # Pezzi nell'orientamento originale, dal più grande
+        items = sorted(
+            (
+                (p.height, p.width, p.id, p.name) if p.rotated else (p.width, p.height, p.id, p.name)
+                for p in pieces
+            ),
+            key=lambda item: (item[0] + kerf) * (item[1] + kerf),
+            reverse=True
+        )
+        suffix_area = [0] * (len(items) + 1)
+        for i in range(len(items) - 1, -1, -1):
+            w, h = items[i][0], items[i][1]
+            suffix_area[i] = suffix_area[i + 1] + (w + kerf) * (h + kerf)
+        
+        guillotine = [target.get('cut_tree') is not None for target in targets]
+        frees = []
+        for target, is_tree in zip(targets, guillotine):
+            if is_tree:
+                rects = target['free_rectangles']
+            else:
+                fresh = self._new_sheet(target['id'])
+                for placement in target['placements']:
+                    self._maxrects_split(fresh['free_rectangles'], placement)
+                rects = fresh['free_rectangles']
+            frees.append(tuple(sorted((r['x'], r['y'], r['width'], r['height']) for r in rects)))
+        areas = [self._usable_area() - target['used_area'] for target in targets]
+        
+        failed = set()
+        timed_out = [False]
+        
+        def search(index, frees, areas):
+            if index == len(items):
+                return []
+            if time.perf_counter() > deadline:
+                timed_out[0] = True
+                return None
+            
+            key = (index, frees)
+            if key in failed or suffix_area[index] > sum(areas):
+                return None
+            
+            width, height, type_id, name = items[index]
+            orientations = [(width, height, False)]
+            if allow_rotation and width != height:
+                orientations.append((height, width, True))
+            
+            candidates = set()
+            for t, free in enumerate(frees):
+                for rect in free:
+                    for pw, ph, rotated in orientations:
+                        if pw + kerf <= rect[2] and ph + kerf <= rect[3]:
+                            score = min(rect[2] - pw, rect[3] - ph)
+                            candidates.add((score, t, rect, pw, ph, rotated))
+            
+            for _, t, rect, pw, ph, rotated in sorted(candidates):
+                placement = Placement(
+                    x=rect[0], y=rect[1], width=pw, height=ph, id=type_id, name=name, rotated=rotated
+                )
+                child_free = self._split_free_tuple(frees[t], rect, placement, guillotine[t])
+                child_frees = frees[:t] + (child_free,) + frees[t + 1:]
+                child_areas = list(areas)
+                child_areas[t] -= (pw + kerf) * (ph + kerf)
+                
+                moves = search(index + 1, child_frees, child_areas)
+                if moves is not None:
+                    return [(t, placement)] + moves
+                if timed_out[0]:
+                    return None
+            
+            failed.add(key)
+            return None
+        
+        return search(0, tuple(frees), areas)
+    
+    def _split_free_tuple(self, free, rect, placement, guillotine):
+        """
+        Spazio libero di un foglio dopo un piazzamento, in forma immutabile
+        
+        Args:
+            free: Tupla ordinata di rettangoli (x, y, width, height)
+            rect: Rettangolo che riceve il pezzo
+            placement: Placement nell'angolo in basso a sinistra di rect
+            guillotine: True per lo split a ghigliottina di _cut_leaf()
+        
+        Returns:
+            tuple: Nuova tupla ordinata di rettangoli
+        """
+        kerf = self.blade_width
+        
+        if guillotine:
+            x, y, width, height = rect
+            fw = placement.width + kerf
+            fh = placement.height + kerf
+            if width - fw <= height - fh:
+                leaves = [(x + fw, y, width - fw, placement.height), (x, y + fh, width, height - fh)]
+            else:
+                leaves = [(x, y + fh, placement.width, height - fh), (x + fw, y, width - fw, height)]
+            
+            rects = [r for r in free if r != rect]
+            rects.extend(leaf for leaf in leaves if leaf[2] > 0 and leaf[3] > 0)
+            return tuple(sorted(rects))
+        
+        rects = [{'x': x, 'y': y, 'width': w, 'height': h} for x, y, w, h in free]
+        self._maxrects_split(rects, placement)
+        return tuple(sorted((r['x'], r['y'], r['width'], r['height']) for r in rects))
+    
+    def _select_sheet(self, rect, sheets, allow_rotation, engine, heuristic, bin_mode):
+        """
+        Sceglie il foglio aperto e la posizione per un rettangolo
+        
+        Args:
+            rect: Rectangle da piazzare
+            sheets: Fogli già creati
+            allow_rotation: Permetti rotazione
+            engine: Motore di packing
+            heuristic: Euristica MaxRects
+            bin_mode: Strategia di scelta del foglio
+        
+        Returns:
+            tuple: (sheet, Placement) oppure (None, None)
+        """
+        candidates = sheets[-1:] if bin_mode == 'single' else sheets
+        usable_area = self._usable_area()
+        
+        best_sheet = None
+        best_placement = None
+        best_key = None
+        
+        for sheet in candidates:
+            if not self._may_fit(rect, sheet, allow_rotation):
+                continue
+            
+            placement, score = self._find_in_sheet(rect, sheet, allow_rotation, engine, heuristic)
+            if placement is None:
+                continue
+            
+            if bin_mode in ('single', 'first_fit'):
+                return sheet, placement
+            
+            # best_fit: foglio più pieno; worst_fit: foglio più vuoto
+            remaining = usable_area - sheet['used_area']
+            key = (remaining if bin_mode == 'best_fit' else -remaining, score)
+            if best_key is None or key < best_key:
+                best_key = key
+                best_sheet = sheet
+                best_placement = placement
+        
+        return best_sheet, best_placement
+    
+    def _find_in_sheet(self, rect, sheet, allow_rotation, engine, heuristic):
         """
-        Inizializza l'ottimizzatore
+        Cerca la posizione migliore in un foglio con il motore richiesto
         
-        Args:
-            sheet_width: Larghezza pannello standard (mm)
-            sheet_height: Altezza pannello standard (mm)
+        Returns:
+            tuple: (Placement o None, punteggio)
         """
-        self.sheet_width = sheet_width
-        self.sheet_height = sheet_height
-        self.blade_width = 4  # Larghezza lama sega (mm)
-        self.margin = 10  # Margine sicurezza (mm)
+        if engine == 'maxrects':
+            return self._maxrects_find_placement(rect, sheet, allow_rotation, heuristic)
+        if engine == 'skyline':
+            return self._skyline_find_placement(rect, sheet, allow_rotation)
+        return self._find_placement(
+            rect, sheet['free_rectangles'], allow_rotation,
+            cut_leaves=sheet.get('cut_tree') is not None
+        )
     
-    def optimize(self, parts, allow_rotation=True):
+    def _commit_placement(self, sheet, placement, engine):
         """
-        Ottimizza il posizionamento delle parti
+        Registra un piazzamento e aggiorna spazio libero e indice del foglio
         
         Args:
-            parts: Lista di dizionari con 'width', 'height', 'quantity', 'name'
-            allow_rotation: Permetti rotazione pezzi di 90°
+            sheet: Foglio di destinazione
+            placement: Placement da registrare
+            engine: Motore di packing
+        """
+        sheet['placements'].append(placement)
+        if engine == 'guillotine' and sheet.get('cut_tree') is not None:
+            self._guillotine_split(sheet, placement)
+        elif engine == 'skyline':
+            self._skyline_raise(
+                self._skyline(sheet),
+                placement.x,
+                placement.x + placement.width + self.blade_width,
+                placement.y + placement.height + self.blade_width
+            )
+            sheet['free_rectangles'] = self._skyline_free_rectangles(sheet['skyline'])
+            sheet['cut_tree'] = None
+        else:
+            # Lo split MaxRects non produce tagli a ghigliottina
+            self._maxrects_split(sheet['free_rectangles'], placement)
+            sheet['cut_tree'] = None
         
-        Returns:
-            dict: Risultati ottimizzazione con layout e statistiche
+        sheet['used_area'] += (
+            (placement.width + self.blade_width) * (placement.height + self.blade_width)
+        )
+        self._update_free_index(sheet)
+    
+    def _update_free_index(self, sheet):
         """
-        # Converti in rettangoli
-        rectangles = []
-        for i, part in enumerate(parts):
-            for q in range(part.get('quantity', 1)):
-                rect = Rectangle(
-                    width=part['width'],
-                    height=part['height'],
-                    id=f"{i}_{q}",
-                    quantity=1,
-                    name=part.get('name', f"Parte_{i}")
-                )
-                rectangles.append(rect)
+        Aggiorna l'indice del rettangolo libero più grande del foglio
         
-        # Ordina per area decrescente (strategia greedy)
-        rectangles.sort(key=lambda r: r.width * r.height, reverse=True)
+        'max_free' contiene (larghezza massima, altezza massima, area massima)
+        tra i rettangoli liberi: è un limite superiore di ciò che il foglio
+        può ancora accogliere.
         
-        # Esegui nesting con algoritmo guillotine
-        sheets = self._guillotine_pack(rectangles, allow_rotation)
+        Per i fogli skyline le colonne libere sopra il profilo non bastano
+        (un pezzo può scavalcare più segmenti): si usano la larghezza totale
+        dei segmenti non pieni, l'altezza sopra il segmento più basso e l'area
+        libera complessiva sopra il profilo.
         
-        # Calcola statistiche
-        stats = self._calculate_stats(sheets, rectangles)
+        Args:
+            sheet: Foglio da aggiornare
+        """
+        if 'skyline' in sheet:
+            free = sheet['free_rectangles']
+            sheet['max_free'] = (
+                sum(r['width'] for r in free),
+                max((r['height'] for r in free), default=0),
+                sum(r['width'] * r['height'] for r in free)
+            )
+            return
         
-        return {
-            'sheets': sheets,
-            'statistics': stats,
-            'parts_count': len(rectangles),
-            'sheets_count': len(sheets)
-        }
+        max_w = 0
+        max_h = 0
+        max_area = 0
+        for free_rect in sheet['free_rectangles']:
+            w = free_rect['width']
+            h = free_rect['height']
+            if w > max_w:
+                max_w = w
+            if h > max_h:
+                max_h = h
+            if w * h > max_area:
+                max_area = w * h
+        sheet['max_free'] = (max_w, max_h, max_area)
     
-    def _guillotine_pack(self, rectangles, allow_rotation):
+    def _may_fit(self, rect, sheet, allow_rotation):
         """
-        Algoritmo di packing guillotine
+        Test O(1) sull'indice 'max_free': False se il pezzo non può entrare
         
         Args:
-            rectangles: Lista di Rectangle
+            rect: Rectangle da piazzare
+            sheet: Foglio candidato
             allow_rotation: Permetti rotazione
         
         Returns:
-            list: Lista di sheet (pannelli) con placements
+            bool: True se il foglio potrebbe contenere il pezzo
         """
-        sheets = []
-        current_sheet = {
-            'id': 0,
-            'placements': [],
-            'free_rectangles': [
-                {
-                    'x': self.margin,
-                    'y': self.margin,
-                    'width': self.sheet_width - 2 * self.margin,
-                    'height': self.sheet_height - 2 * self.margin
-                }
-            ]
-        }
+        max_w, max_h, max_area = sheet['max_free']
+        # Le foglie dell'albero di taglio accolgono pezzi a filo dei tagli
+        kerf = 0 if sheet.get('cut_tree') is not None else self.blade_width
+        fw = rect.width + kerf
+        fh = rect.height + kerf
         
-        for rect in rectangles:
-            placed = False
-            
-            # Prova a piazzare nel foglio corrente
-            placement = self._find_placement(rect, current_sheet['free_rectangles'], allow_rotation)
-            
-            if placement:
-                current_sheet['placements'].append(placement)
-                self._split_free_rectangle(
-                    current_sheet['free_rectangles'],
-                    placement
-                )
-                placed = True
-            
-            # Se non entra, crea nuovo foglio
-            if not placed:
-                sheets.append(current_sheet)
-                
-                current_sheet = {
-                    'id': len(sheets),
-                    'placements': [],
-                    'free_rectangles': [
-                        {
-                            'x': self.margin,
-                            'y': self.margin,
-                            'width': self.sheet_width - 2 * self.margin,
-                            'height': self.sheet_height - 2 * self.margin
-                        }
-                    ]
-                }
-                
-                # Riprova sul nuovo foglio
-                placement = self._find_placement(rect, current_sheet['free_rectangles'], allow_rotation)
-                if placement:
-                    current_sheet['placements'].append(placement)
-                    self._split_free_rectangle(
-                        current_sheet['free_rectangles'],
-                        placement
-                    )
+        if fw * fh > max_area:
+            return False
+        if fw <= max_w and fh <= max_h:
+            return True
+        return allow_rotation and fh <= max_w and fw <= max_h
+    
+    def _usable_area(self):
+        """Area utile di un foglio al netto dei margini (mm²)"""
+        return (self.sheet_width - 2 * self.margin) * (self.sheet_height - 2 * self.margin)
+    
+    
+    def _new_sheet(self, sheet_id):
+        """
+        Crea un foglio vuoto con l'intera area utile come spazio libero
         
-        # Aggiungi l'ultimo foglio
-        if current_sheet['placements']:
-            sheets.append(current_sheet)
+        L'area utile è anche la radice dell'albero di taglio ('cut_tree'),
+        che il motore guillotine suddivide a ogni piazzamento.
         
-        return sheets
+        Args:
+            sheet_id: Indice del foglio
+        
+        Returns:
+            dict: Foglio con placements, free_rectangles e cut_tree
+        """
+        usable_width = self.sheet_width - 2 * self.margin
+        usable_height = self.sheet_height - 2 * self.margin
+        root = free_node(self.margin, self.margin, usable_width, usable_height)
+        
+        return {
+            'id': sheet_id,
+            'width': self.sheet_width,
+            'height': self.sheet_height,
+            'placements': [],
+            'free_rectangles': [root],
+            'cut_tree': root,
+            'used_area': 0,
+            'max_free': (usable_width, usable_height, usable_width * usable_height)
+        }
     
-    def _find_placement(self, rect, free_rects, allow_rotation):
+    def _find_placement(self, rect, free_rects, allow_rotation, cut_leaves=False):
         """
         Trova il miglior posizionamento per un rettangolo
         
+        Il pezzo occupa la sua misura più una lama. Nelle foglie dell'albero
+        di taglio un lato interno all'area utile è già un taglio: la lama oltre
+        quel lato è già stata tolta e il pezzo può arrivarci a filo.
+        
         Args:
             rect: Rectangle da piazzare
             free_rects: Lista di rettangoli liberi
             allow_rotation: Permetti rotazione
+            cut_leaves: True se free_rects sono foglie dell'albero di taglio
         
         Returns:
-            Placement o None
+            tuple: (Placement o None, punteggio)
         """
         best_placement = None
         best_score = float('inf')
+        right = self.sheet_width - self.margin
+        top = self.sheet_height - self.margin
         
         for free_rect in free_rects:
+            # Spazio per il pezzo più la sua lama
+            free_w = free_rect['width']
+            free_h = free_rect['height']
+            if cut_leaves:
+                if free_rect['x'] + free_w < right:
+                    free_w += self.blade_width
+                if free_rect['y'] + free_h < top:
+                    free_h += self.blade_width
+            
             # Prova senza rotazione
-            if (rect.width + self.blade_width <= free_rect['width'] and 
-                rect.height + self.blade_width <= free_rect['height']):
+            if (rect.width + self.blade_width <= free_w and 
+                rect.height + self.blade_width <= free_h):
                 
                 # Score: preferisci fit più stretto
-                score = (free_rect['width'] - rect.width) + (free_rect['height'] - rect.height)
+                score = (free_w - rect.width) + (free_h - rect.height)
                 
                 if score < best_score:
                     best_score = score
@@ -173,10 +1993,10 @@ class NestingOptimizer:
             
             # Prova con rotazione
             if allow_rotation:
-                if (rect.height + self.blade_width <= free_rect['width'] and 
-                    rect.width + self.blade_width <= free_rect['height']):
+                if (rect.height + self.blade_width <= free_w and 
+                    rect.width + self.blade_width <= free_h):
                     
-                    score = (free_rect['width'] - rect.height) + (free_rect['height'] - rect.width)
+                    score = (free_w - rect.height) + (free_h - rect.width)
                     
                     if score < best_score:
                         best_score = score
@@ -190,82 +2010,413 @@ class NestingOptimizer:
                             rotated=True
                         )
         
-        return best_placement
+        return best_placement, (best_score,)
+    
+    def _guillotine_split(self, sheet, placement):
+        """
+        Taglia la foglia libera che contiene il placement
+        
+        Le foglie dell'albero di taglio sono disgiunte, quindi il placement
+        (sempre nell'angolo in basso a sinistra di una foglia) ne tocca una
+        sola, individuata dall'origine.
+        
+        Args:
+            sheet: Foglio con cut_tree (modificato in place)
+            placement: Placement appena effettuato
+        """
+        free_rects = sheet['free_rectangles']
+        index = next(
+            i for i, r in enumerate(free_rects)
+            if r['x'] == placement.x and r['y'] == placement.y
+        )
+        free_rects.extend(self._cut_leaf(free_rects.pop(index), placement))
+    
+    def _cut_leaf(self, leaf, placement):
+        """
+        Separa un pezzo da una foglia con due tagli a ghigliottina
+        
+        Il primo taglio attraversa tutta la foglia lungo l'asse con lo sfrido
+        minore (split "shorter leftover axis"), così lo sfrido maggiore resta
+        un rettangolo intero; il secondo taglio separa il pezzo dalla fascia.
+        Se il pezzo arriva a filo di un lato della foglia (già tagliato) il
+        taglio lungo quel lato non serve.
+        
+        Args:
+            leaf: Foglia libera (trasformata in place in nodo di taglio)
+            placement: Placement nell'angolo in basso a sinistra della foglia
+        
+        Returns:
+            list: Nuove foglie libere (0, 1 o 2)
+        """
+        kerf = self.blade_width
+        fills_w = placement.width >= leaf['width']
+        fills_h = placement.height >= leaf['height']
+        leftover_w = leaf['width'] - placement.width - kerf
+        leftover_h = leaf['height'] - placement.height - kerf
+        
+        if fills_w and fills_h:
+            part, side, rest = leaf, None, None
+        elif fills_w:
+            part, rest = split_node(leaf, 'rip', placement.height, kerf)
+            side = None
+        elif fills_h:
+            part, side = split_node(leaf, 'crosscut', placement.width, kerf)
+            rest = None
+        elif leftover_w <= leftover_h:
+            strip, rest = split_node(leaf, 'rip', placement.height, kerf)
+            part, side = split_node(strip, 'crosscut', placement.width, kerf)
+        else:
+            strip, rest = split_node(leaf, 'crosscut', placement.width, kerf)
+            part, side = split_node(strip, 'rip', placement.height, kerf)
+        
+        part['type'] = 'part'
+        part['placement'] = placement
+        
+        return [node for node in (side, rest) if node is not None]
+    
+    def _skyline(self, sheet):
+        """
+        Profilo skyline del foglio, creato alla prima richiesta
+        
+        Il profilo è l'inviluppo superiore dei pezzi: due array paralleli
+        con l'ascissa di inizio e la quota di ogni segmento (l'ultimo arriva
+        al bordo destro dell'area utile). Un foglio che ha già pezzi (es.
+        ricostruito da una sessione) parte dall'inviluppo dei suoi pezzi.
+        
+        Args:
+            sheet: Foglio (modificato in place)
+        
+        Returns:
+            tuple: (xs, ys) come array('d')
+        """
+        skyline = sheet.get('skyline')
+        if skyline is None:
+            skyline = (array('d', [self.margin]), array('d', [self.margin]))
+            for p in sheet['placements']:
+                self._skyline_raise(
+                    skyline, p.x, p.x + p.width + self.blade_width, p.y + p.height + self.blade_width
+                )
+            sheet['skyline'] = skyline
+        return skyline
+    
+    def _skyline_find_placement(self, rect, sheet, allow_rotation):
+        """
+        Posizione bottom-left sul profilo skyline
+        
+        Ogni inizio di segmento è una posizione candidata; il pezzo appoggia
+        sul segmento più alto tra quelli che copre. Vince il bordo superiore
+        più basso, poi la x minore. Costo O(k) per orientazione con k
+        segmenti (più i segmenti scavalcati).
+        
+        Args:
+            rect: Rectangle da piazzare
+            sheet: Foglio corrente
+            allow_rotation: Permetti rotazione
+        
+        Returns:
+            tuple: (Placement o None, punteggio)
+        """
+        xs, ys = self._skyline(sheet)
+        right = self.sheet_width - self.margin
+        top = self.sheet_height - self.margin
+        count = len(xs)
+        
+        orientations = [(rect.width, rect.height, False)]
+        if allow_rotation and rect.width != rect.height:
+            orientations.append((rect.height, rect.width, True))
+        
+        best_placement = None
+        best_score = (float('inf'),)
+        
+        for width, height, rotated in orientations:
+            fw = width + self.blade_width
+            fh = height + self.blade_width
+            
+            for i in range(count):
+                x = xs[i]
+                if x + fw > right:
+                    break
+                
+                y = ys[i]
+                j = i + 1
+                while j < count and xs[j] < x + fw:
+                    if ys[j] > y:
+                        y = ys[j]
+                    j += 1
+                
+                if y + fh > top:
+                    continue
+                
+                score = (y + fh, x)
+                if score < best_score:
+                    best_score = score
+                    best_placement = Placement(
+                        x=x, y=y, width=width, height=height,
+                        id=rect.id, name=rect.name, rotated=rotated
+                    )
+        
+        return best_placement, best_score
+    
+    def _skyline_raise(self, skyline, x0, x1, level):
+        """
+        Alza il profilo almeno a level nell'intervallo [x0, x1)
+        
+        Args:
+            skyline: (xs, ys) da _skyline() (modificati in place)
+            x0: Inizio intervallo
+            x1: Fine intervallo
+            level: Nuova quota minima
+        """
+        xs, ys = skyline
+        x1 = min(x1, self.sheet_width - self.margin)
+        
+        # Punti di rottura agli estremi dell'intervallo
+        i = bisect_right(xs, x0) - 1
+        if xs[i] < x0:
+            i += 1
+            xs.insert(i, x0)
+            ys.insert(i, ys[i - 1])
+        
+        j = bisect_left(xs, x1)
+        if x1 < self.sheet_width - self.margin and (j == len(xs) or xs[j] != x1):
+            xs.insert(j, x1)
+            ys.insert(j, ys[j - 1])
+        
+        for k in range(i, j):
+            if ys[k] < level:
+                ys[k] = level
+        
+        # Unisci segmenti adiacenti alla stessa quota (da destra, così gli
+        # indici ancora da visitare non cambiano)
+        for k in range(min(j + 1, len(xs) - 1), max(i, 1) - 1, -1):
+            if ys[k] == ys[k - 1]:
+                del xs[k]
+                del ys[k]
+    
+    def _skyline_free_rectangles(self, skyline):
+        """
+        Colonne libere sopra ogni segmento del profilo
+        
+        Args:
+            skyline: (xs, ys) da _skyline()
+        
+        Returns:
+            list: Rettangoli liberi disgiunti
+        """
+        xs, ys = skyline
+        top = self.sheet_height - self.margin
+        ends = list(xs[1:]) + [self.sheet_width - self.margin]
+        
+        return [
+            {'x': x, 'y': y, 'width': end - x, 'height': top - y}
+            for x, y, end in zip(xs, ys, ends)
+            if y < top
+        ]
+    
+    def _maxrects_find_placement(self, rect, sheet, allow_rotation, heuristic):
+        """
+        Trova il miglior posizionamento MaxRects per un rettangolo
+        
+        Args:
+            rect: Rectangle da piazzare
+            sheet: Foglio corrente (free_rectangles e placements)
+            allow_rotation: Permetti rotazione
+            heuristic: Euristica di scelta
+        
+        Returns:
+            tuple: (Placement o None, punteggio)
+        """
+        best_placement = None
+        best_score = (float('inf'), float('inf'))
+        
+        orientations = [(rect.width, rect.height, False)]
+        if allow_rotation and rect.width != rect.height:
+            orientations.append((rect.height, rect.width, True))
+        
+        for free_rect in sheet['free_rectangles']:
+            for width, height, rotated in orientations:
+                # Ingombro del pezzo comprensivo del taglio lama
+                fw = width + self.blade_width
+                fh = height + self.blade_width
+                if fw > free_rect['width'] or fh > free_rect['height']:
+                    continue
+                
+                score = self._maxrects_score(
+                    free_rect, fw, fh, sheet['placements'], heuristic
+                )
+                
+                if score < best_score:
+                    best_score = score
+                    best_placement = Placement(
+                        x=free_rect['x'],
+                        y=free_rect['y'],
+                        width=width,
+                        height=height,
+                        id=rect.id,
+                        name=rect.name,
+                        rotated=rotated
+                    )
+        
+        return best_placement, best_score
+    
+    def _maxrects_score(self, free_rect, fw, fh, placements, heuristic):
+        """
+        Calcola il punteggio (minore è migliore) di un posizionamento
+        
+        Args:
+            free_rect: Rettangolo libero candidato
+            fw, fh: Ingombro del pezzo (con taglio lama)
+            placements: Piazzamenti già presenti sul foglio
+            heuristic: Euristica di scelta
+        
+        Returns:
+            tuple: (punteggio primario, punteggio secondario)
+        """
+        leftover_w = free_rect['width'] - fw
+        leftover_h = free_rect['height'] - fh
+        short_side = min(leftover_w, leftover_h)
+        long_side = max(leftover_w, leftover_h)
+        
+        if heuristic == 'best_area':
+            area_fit = free_rect['width'] * free_rect['height'] - fw * fh
+            return (area_fit, short_side)
+        
+        if heuristic == 'bottom_left':
+            return (free_rect['y'] + fh, free_rect['x'])
+        
+        if heuristic == 'contact_point':
+            contact = self._contact_score(free_rect['x'], free_rect['y'], fw, fh, placements)
+            return (-contact, short_side)
+        
+        # best_short_side
+        return (short_side, long_side)
+    
+    def _contact_score(self, x, y, fw, fh, placements):
+        """
+        Lunghezza del perimetro a contatto con bordi del foglio e altri pezzi
+        
+        Args:
+            x, y: Posizione candidata
+            fw, fh: Ingombro del pezzo (con taglio lama)
+            placements: Piazzamenti già presenti sul foglio
+        
+        Returns:
+            float: Lunghezza di contatto (mm)
+        """
+        score = 0
+        
+        # Contatto con i bordi dell'area utile
+        if x == self.margin or x + fw == self.sheet_width - self.margin:
+            score += fh
+        if y == self.margin or y + fh == self.sheet_height - self.margin:
+            score += fw
+        
+        # Contatto con gli ingombri dei pezzi già piazzati
+        for p in placements:
+            px2 = p.x + p.width + self.blade_width
+            py2 = p.y + p.height + self.blade_width
+            if px2 == x or p.x == x + fw:
+                score += max(0, min(y + fh, py2) - max(y, p.y))
+            if py2 == y or p.y == y + fh:
+                score += max(0, min(x + fw, px2) - max(x, p.x))
+        
+        return score
     
-    def _split_free_rectangle(self, free_rects, placement):
+    def _maxrects_split(self, free_rects, placement):
         """
-        Divide i rettangoli liberi dopo un piazzamento
+        Suddivide i rettangoli liberi intersecati dal piazzamento (MaxRects)
+        
+        Ogni rettangolo libero intersecato viene sostituito dalle fasce
+        massimali a sinistra, destra, sotto e sopra l'ingombro del pezzo;
+        infine vengono rimossi i rettangoli contenuti in altri.
         
         Args:
             free_rects: Lista di rettangoli liberi (modificata in place)
             placement: Placement appena effettuato
         """
+        px = placement.x
+        py = placement.y
+        px2 = placement.x + placement.width + self.blade_width
+        py2 = placement.y + placement.height + self.blade_width
+        
         new_free_rects = []
         
         for free_rect in free_rects:
-            # Controlla se il placement interseca questo rettangolo libero
-            if self._intersects(placement, free_rect):
-                # Crea nuovi rettangoli dalle parti rimanenti
-                
-                # Rettangolo a destra
-                if placement.x + placement.width + self.blade_width < free_rect['x'] + free_rect['width']:
-                    new_free_rects.append({
-                        'x': placement.x + placement.width + self.blade_width,
-                        'y': free_rect['y'],
-                        'width': (free_rect['x'] + free_rect['width']) - (placement.x + placement.width + self.blade_width),
-                        'height': free_rect['height']
-                    })
-                
-                # Rettangolo sopra
-                if placement.y + placement.height + self.blade_width < free_rect['y'] + free_rect['height']:
-                    new_free_rects.append({
-                        'x': free_rect['x'],
-                        'y': placement.y + placement.height + self.blade_width,
-                        'width': free_rect['width'],
-                        'height': (free_rect['y'] + free_rect['height']) - (placement.y + placement.height + self.blade_width)
-                    })
-            else:
-                # Non interseca, mantieni il rettangolo libero
+            fx = free_rect['x']
+            fy = free_rect['y']
+            fx2 = fx + free_rect['width']
+            fy2 = fy + free_rect['height']
+            
+            # Nessuna sovrapposizione con l'ingombro: mantieni
+            if px >= fx2 or px2 <= fx or py >= fy2 or py2 <= fy:
                 new_free_rects.append(free_rect)
+                continue
+            
+            # Fascia a sinistra
+            if px > fx:
+                new_free_rects.append({'x': fx, 'y': fy, 'width': px - fx, 'height': fy2 - fy})
+            # Fascia a destra
+            if px2 < fx2:
+                new_free_rects.append({'x': px2, 'y': fy, 'width': fx2 - px2, 'height': fy2 - fy})
+            # Fascia sotto
+            if py > fy:
+                new_free_rects.append({'x': fx, 'y': fy, 'width': fx2 - fx, 'height': py - fy})
+            # Fascia sopra
+            if py2 < fy2:
+                new_free_rects.append({'x': fx, 'y': py2, 'width': fx2 - fx, 'height': fy2 - py2})
         
-        # Sostituisci la lista
         free_rects.clear()
-        free_rects.extend(new_free_rects)
+        free_rects.extend(self._prune_free_rectangles(new_free_rects))
     
-    def _intersects(self, placement, free_rect):
+    def _prune_free_rectangles(self, free_rects):
         """
-        Controlla se un placement interseca un rettangolo libero
+        Rimuove i rettangoli liberi contenuti in altri rettangoli liberi
         
         Args:
-            placement: Placement
-            free_rect: Dizionario rettangolo libero
+            free_rects: Lista di rettangoli liberi
         
         Returns:
-            bool: True se interseca
+            list: Rettangoli liberi massimali
         """
-        return not (
-            placement.x + placement.width <= free_rect['x'] or
-            placement.x >= free_rect['x'] + free_rect['width'] or
-            placement.y + placement.height <= free_rect['y'] or
-            placement.y >= free_rect['y'] + free_rect['height']
-        )
+        # Ordina per area decrescente: un rettangolo può essere contenuto
+        # solo in uno di area maggiore o uguale già accettato
+        candidates = sorted(free_rects, key=lambda r: r['width'] * r['height'], reverse=True)
+        kept = []
+        
+        for rect in candidates:
+            x2 = rect['x'] + rect['width']
+            y2 = rect['y'] + rect['height']
+            contained = False
+            for other in kept:
+                if (other['x'] <= rect['x'] and other['y'] <= rect['y'] and
+                        other['x'] + other['width'] >= x2 and
+                        other['y'] + other['height'] >= y2):
+                    contained = True
+                    break
+            if not contained:
+                kept.append(rect)
+        
+        return kept
     
-    def _calculate_stats(self, sheets, rectangles):
+    def _calculate_stats(self, sheets, table, allow_rotation=True, sheets_eliminated=0):
         """
         Calcola statistiche di utilizzo
         
         Args:
             sheets: Lista di sheet
-            rectangles: Lista di Rectangle
+            table: PartTable dei pezzi
+            allow_rotation: Rotazione ammessa (per i limiti inferiori)
+            sheets_eliminated: Fogli eliminati dal ripasso di _repack_tail()
         
         Returns:
             dict: Statistiche
         """
-        total_sheet_area = len(sheets) * self.sheet_width * self.sheet_height
+        l1, l2 = self.lower_bounds(table, allow_rotation)
+        lower_bound = max(l1, l2)
         
-        used_area = 0
-        for rect in rectangles:
-            used_area += rect.width * rect.height
+        total_sheet_area = sum(sheet['width'] * sheet['height'] for sheet in sheets)
+        
+        used_area = table.total_area()
         
         efficiency = (used_area / total_sheet_area * 100) if total_sheet_area > 0 else 0
         waste = total_sheet_area - used_area
@@ -277,5 +2428,280 @@ class NestingOptimizer:
             'used_area_m2': round(used_area / 1000000, 4),
             'waste_area_m2': round(waste / 1000000, 4),
             'efficiency_percent': round(efficiency, 2),
-            'waste_percent': round(100 - efficiency, 2)
+            'waste_percent': round(100 - efficiency, 2),
+            'lower_bound_l1': l1,
+            'lower_bound_l2': l2,
+            'lower_bound_sheets': lower_bound,
+            'gap_to_lower_bound': len(sheets) - lower_bound,
+            'sheets_eliminated': sheets_eliminated
         }
+
+
+def layout_signature(sheet):
+    """
+    Forma canonica del layout di un foglio
+    
+    Dipende solo da formato e pezzi (posizione, dimensioni, tipo e
+    rotazione), non dall'ordine di piazzamento né dall'id del foglio.
+    
+    Args:
+        sheet: Dizionario sheet dal nesting
+    
+    Returns:
+        tuple: Chiave hashable, uguale per fogli con layout identico
+    """
+    return (
+        sheet.get('width'),
+        sheet.get('height'),
+        sheet.get('stock'),
+        tuple(sorted((p.x, p.y, p.width, p.height, p.id, p.rotated) for p in sheet['placements']))
+    )
+
+
+def sheet_patterns(sheets):
+    """
+    Raggruppa i fogli con layout identico in schemi "schema × quantità"
+    
+    Di ogni schema si conserva solo il primo foglio, quindi anche uno
+    stream di fogli (optimize_iter()) si riduce ai soli schemi distinti.
+    
+    Args:
+        sheets: Iterabile di sheet
+    
+    Returns:
+        list: Schemi con 'sheet' (primo foglio), 'count' e 'sheet_ids',
+            nell'ordine di prima comparsa
+    """
+    patterns = {}
+    for sheet in sheets:
+        key = layout_signature(sheet)
+        pattern = patterns.get(key)
+        if pattern is None:
+            patterns[key] = {'sheet': sheet, 'count': 1, 'sheet_ids': [sheet['id']]}
+        else:
+            pattern['count'] += 1
+            pattern['sheet_ids'].append(sheet['id'])
+    return list(patterns.values())
+
+
+def _processes_available():
+    """
+    Verifica se è possibile avviare processi worker Python
+    
+    Nel Python integrato in Fusion sys.executable punta all'eseguibile di
+    Fusion: avviare processi figli aprirebbe nuove istanze dell'applicazione.
+    """
+    executable = os.path.basename(sys.executable or '').lower()
+    return executable.startswith('python')
+
+
+# Evento di fine ricerca di optimize_parallel() nei processi del pool
+# (impostato da _init_search_worker), None nel processo principale
+_search_stop = None
+
+
+class _SearchStopped(Exception):
+    """Strategia interrotta perché la ricerca parallela è terminata"""
+
+
+def _init_search_worker(stop):
+    """Inizializzatore dei processi del pool di optimize_parallel()"""
+    global _search_stop
+    _search_stop = stop
+
+
+def _optimize_strategy(settings, parts, allow_rotation, strategy):
+    """
+    Esegue una singola strategia di nesting (funzione worker del pool)
+    
+    Produce lo stesso risultato di optimize() con la strategia; nel pool
+    l'evento di fine ricerca viene verificato a ogni pezzo consumato dal
+    motore, così nessun processo resta occupato dopo optimize_parallel().
+    
+    Args:
+        settings: Parametri da NestingOptimizer._settings()
+        parts: Lista parti
+        allow_rotation: Permetti rotazione
+        strategy: Parametri di optimize() (vedi _parallel_strategies)
+    
+    Returns:
+        dict: Risultato di optimize() con la strategia usata, None se la
+            ricerca è terminata prima
+    """
+    optimizer = NestingOptimizer(settings['sheet_width'], settings['sheet_height'])
+    optimizer.blade_width = settings['blade_width']
+    optimizer.margin = settings['margin']
+    optimizer.max_stages = settings['max_stages']
+    
+    table = parts if isinstance(parts, PartTable) else PartTable.from_parts(parts)
+    
+    def on_piece(placed):
+        if _search_stop is not None and _search_stop.is_set():
+            raise _SearchStopped()
+    
+    options = dict(strategy, allow_rotation=allow_rotation, repack_time_s=0.0, reuse_patterns=False)
+    try:
+        sheets, table, stats, _ = optimizer._optimize_table(table, options, on_piece)
+    except _SearchStopped:
+        return None
+    
+    return {
+        'sheets': sheets,
+        'statistics': stats,
+        'parts_count': table.total_count(),
+        'sheets_count': len(sheets),
+        'part_table': table,
+        'patterns': sheet_patterns(sheets),
+        'from_cache': False,
+        'strategy': strategy
+    }
+
+
+# Job di optimize_stock() nei processi del pool (vedi _init_stock_worker)
+_stock_job = None
+
+
+def _init_stock_worker(settings, pieces, allow_rotation, engine, heuristic):
+    """Inizializzatore del pool di optimize_stock(): riceve i pezzi una volta sola"""
+    global _stock_job
+    _stock_job = (settings, pieces, allow_rotation, engine, heuristic)
+
+
+def _fill_stock_sheet_masked(entry, mask):
+    """
+    Riempie un pannello candidato con i pezzi del job non ancora piazzati
+    
+    Args:
+        entry: Formato normalizzato del magazzino
+        mask: bytes con 1 per ogni pezzo del job ancora da piazzare
+    
+    Returns:
+        tuple: Come _fill_stock_sheet(), indici relativi ai pezzi rimasti
+    """
+    settings, pieces, allow_rotation, engine, heuristic = _stock_job
+    pieces = [rect for rect, keep in zip(pieces, mask) if keep]
+    return _fill_stock_sheet(settings, entry, pieces, allow_rotation, engine, heuristic)
+
+
+def _fill_stock_sheet(settings, entry, pieces, allow_rotation, engine, heuristic):
+    """
+    Riempie un pannello candidato di un formato (funzione worker del pool)
+    
+    Args:
+        settings: Parametri da NestingOptimizer._settings()
+        entry: Formato normalizzato del magazzino
+        pieces: Rectangle ancora da piazzare, in ordine
+        allow_rotation: Permetti rotazione
+        engine: Motore di packing
+        heuristic: Euristica MaxRects
+    
+    Returns:
+        tuple: (sheet, indici dei pezzi piazzati, area dei pezzi piazzati)
+    """
+    optimizer = NestingOptimizer(entry['width'], entry['height'])
+    optimizer.blade_width = settings['blade_width']
+    optimizer.margin = settings['margin']
+    
+    sheet = optimizer._new_sheet(0)
+    sheet['stock'] = entry['name']
+    placed = []
+    area = 0
+    
+    for index, rect in enumerate(pieces):
+        if not optimizer._may_fit(rect, sheet, allow_rotation):
+            continue
+        placement, _ = optimizer._find_in_sheet(rect, sheet, allow_rotation, engine, heuristic)
+        if placement is not None:
+            optimizer._commit_placement(sheet, placement, engine)
+            placed.append(index)
+            area += rect.width * rect.height
+    
+    return sheet, placed, area
+
+
+def _smallest_factor(n):
+    """Minimo divisore primo di n (n >= 2)"""
+    factor = 2
+    while n % factor:
+        factor += 1
+    return factor
+
+
+def _subset_sum(weights, capacity):
+    """
+    Sottoinsieme di pesi interi di somma massima entro la capacità
+    
+    Gli insiemi di somme raggiungibili sono bitset su interi Python, quindi
+    ogni elemento costa un solo shift-or. A parità di somma sono preferiti
+    gli elementi in testa alla lista.
+    
+    Args:
+        weights: Pesi interi positivi
+        capacity: Capacità intera
+    
+    Returns:
+        list: Indici degli elementi scelti
+    """
+    if capacity <= 0 or not weights:
+        return []
+    
+    mask = (1 << (capacity + 1)) - 1
+    reachable = 1
+    history = []
+    for weight in weights:
+        history.append(reachable)
+        reachable = (reachable | (reachable << weight)) & mask
+    
+    target = reachable.bit_length() - 1
+    chosen = []
+    for i in range(len(weights) - 1, -1, -1):
+        # Se la somma era già raggiungibile senza l'elemento i, lo si scarta
+        if not (history[i] >> target) & 1:
+            chosen.append(i)
+            target -= weights[i]
+    
+    chosen.reverse()
+    return chosen
+
+
+def _bounded_subset_sum(weights, counts, capacity):
+    """
+    Versione di _subset_sum con più copie per elemento
+    
+    Le copie sono scomposte in blocchi di 1, 2, 4, ... (scomposizione
+    binaria), quindi il costo cresce col logaritmo delle quantità.
+    
+    Args:
+        weights: Pesi interi positivi
+        counts: Copie disponibili per ogni peso
+        capacity: Capacità intera
+    
+    Returns:
+        list: Copie scelte per ogni elemento
+    """
+    items = []
+    for i, (weight, count) in enumerate(zip(weights, counts)):
+        block = 1
+        while count > 0:
+            size = min(block, count)
+            items.append((i, size))
+            count -= size
+            block *= 2
+    
+    chosen = [0] * len(weights)
+    for index in _subset_sum([weights[i] * size for i, size in items], capacity):
+        i, size = items[index]
+        chosen[i] += size
+    return chosen
+
+
+def _result_rank(result):
+    """
+    Chiave di confronto tra risultati (minore è migliore)
+    
+    Meno pannelli; a parità, ultimo pannello più vuoto (i pezzi sono
+    concentrati nei pannelli precedenti e lo sfrido finale è riutilizzabile).
+    """
+    sheets = result['sheets']
+    last_used = sheets[-1]['used_area'] if sheets else 0
+    return (len(sheets), last_used)
@@ -0,0 +1,424 @@
+"""
+Benchmark del nesting
+Dataset realistici e sintetici, misure di tempo, memoria e qualità, confronto con una baseline JSON
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+# Try relative import first (for Fusion 360), fallback to absolute (for testing)
+try:
+    from .furniture_model import FurniturePiece
+    from .furniture_types import FURNITURE_TYPES
+    from .nesting import NestingOptimizer, PartTable, NESTING_ENGINE_VERSION
+except ImportError:
+    from furniture_model import FurniturePiece
+    from furniture_types import FURNITURE_TYPES
+    from nesting import NestingOptimizer, PartTable, NESTING_ENGINE_VERSION
+
+# Versione del formato del report JSON
+BENCHMARK_VERSION = 1
+
+# Dataset disponibili: mobili del catalogo (cucina o tutti) e pezzi casuali
+DATASETS = ('kitchen', 'furniture', 'uniform', 'skewed')
+
+# Spessore dei pannelli di carcassa usato per i tagli dei mobili (mm)
+PANEL_THICKNESS = 18
+
+# Suite di default: dataset, numero di pezzi e motore
+DEFAULT_CASES = (
+    [{'dataset': 'kitchen', 'parts': n, 'engine': engine}
+     for n in (10, 100, 1000) for engine in ('guillotine', 'maxrects', 'skyline')] +
+    [{'dataset': 'furniture', 'parts': 1000, 'engine': 'guillotine'}] +
+    [{'dataset': dataset, 'parts': n, 'engine': engine}
+     for dataset in ('uniform', 'skewed') for n in (10, 1000, 10000)
+     for engine in ('guillotine', 'maxrects', 'skyline')
+     # Con molti pezzi piccoli MaxRects moltiplica i rettangoli liberi:
+     # oltre 1000 pezzi 'skewed' la suite durerebbe minuti
+     if not (engine == 'maxrects' and dataset == 'skewed' and n > 1000)] +
+    [{'dataset': dataset, 'parts': 50000, 'engine': 'skyline'} for dataset in ('uniform', 'skewed')] +
+    [{'dataset': 'uniform', 'parts': 500, 'engine': 'staged'},
+     {'dataset': 'uniform', 'parts': 300, 'engine': 'guillotine'},
+     {'dataset': 'uniform', 'parts': 300, 'engine': 'guillotine', 'repack_time_s': 0.05}]
+)
+
+# Tempi massimi assoluti di alcuni casi (secondi), verificati anche senza
+# baseline: 'over' somma il tempo di un caso di riferimento (es. il ripasso
+# non deve superare il suo tempo massimo oltre al packing greedy)
+TIME_BUDGETS = {
+    'uniform-500-staged': {'max_s': 1.0},
+    'uniform-1000-skyline': {'max_s': 0.5},
+    'uniform-300-guillotine-repack_time_s=0.05': {'max_s': 0.25, 'over': 'uniform-300-guillotine'}
+}
+
+# Soglie di regressione rispetto alla baseline
+DEFAULT_THRESHOLDS = {
+    'time_ratio': 1.5,          # Tempo massimo rispetto alla baseline
+    'memory_ratio': 1.25,       # Picco di memoria massimo rispetto alla baseline
+    'sheets_increase': 0,       # Fogli in più ammessi
+    'efficiency_drop': 0.5,     # Punti percentuali di efficienza persi ammessi
+    'min_time_s': 0.05          # Sotto questo tempo le differenze sono rumore
+}
+
+
+def furniture_parts(tipo_id, larghezza=None):
+    """
+    Tagli di un mobile del catalogo (carcassa, ripiano e ante)
+    
+    Args:
+        tipo_id: ID del tipo in FURNITURE_TYPES
+        larghezza: Larghezza del mobile (default: quella del tipo)
+    
+    Returns:
+        list: Parti nel formato di NestingOptimizer.optimize()
+    """
+    piece = FurniturePiece(tipo_id)
+    if larghezza is not None:
+        piece.dimensioni['larghezza'] = larghezza
+    
+    w = piece.dimensioni['larghezza']
+    h = piece.dimensioni['altezza']
+    d = piece.dimensioni['profondita']
+    if piece.zoccolo.get('presente', False):
+        h -= piece.zoccolo.get('altezza', 100)
+    inner = w - PANEL_THICKNESS * 2
+    
+    parts = [
+        {'width': d, 'height': h, 'quantity': 2, 'name': f"{piece.nome} - Fianco"},
+        {'width': inner, 'height': d, 'quantity': 2, 'name': f"{piece.nome} - Top/Fondo"},
+        {'width': inner, 'height': d - 20, 'quantity': 1, 'name': f"{piece.nome} - Ripiano"}
+    ]
+    
+    ante = piece.elementi['ante']
+    if ante:
+        door = piece.calculate_door_dimensions(ante[0]['tipo_montaggio'])
+        parts.append({
+            'width': door['larghezza'], 'height': door['altezza'],
+            'quantity': len(ante), 'name': f"{piece.nome} - Anta"
+        })
+    return parts
+
+
+def generate_dataset(dataset, count, seed=0):
+    """
+    Genera un dataset di circa count pezzi, deterministico per seed
+    
+    'kitchen' e 'furniture' sommano mobili del catalogo (solo cucina o
+    tutte le categorie) con larghezze casuali tra i limiti del tipo, fino a
+    raggiungere count pezzi; 'uniform' e 'skewed' sono pezzi casuali con
+    misure uniformi o sbilanciate verso i pezzi piccoli (molte strisce e
+    pochi pezzi grandi).
+    
+    Args:
+        dataset: Nome del dataset (vedi DATASETS)
+        count: Numero di pezzi
+        seed: Seme del generatore casuale
+    
+    Returns:
+        list: Parti nel formato di NestingOptimizer.optimize()
+    
+    Raises:
+        ValueError: Se il dataset non esiste o count non è positivo
+    """
+    if dataset not in DATASETS:
+        raise ValueError(f"Dataset non valido: {dataset}. Valori ammessi: {', '.join(DATASETS)}")
+    if count < 1:
+        raise ValueError(f"Numero di pezzi non valido: {count}")
+    
+    rng = random.Random(f"{dataset}:{seed}")
+    
+    if dataset in ('kitchen', 'furniture'):
+        types = sorted(
+            tipo_id for tipo_id, info in FURNITURE_TYPES.items()
+            if dataset == 'furniture' or info.get('categoria') == 'cucina'
+        )
+        parts = []
+        total = 0
+        while total < count:
+            tipo_id = rng.choice(types)
+            info = FURNITURE_TYPES[tipo_id]
+            low = info['dimensioni_min']['larghezza']
+            high = info['dimensioni_max']['larghezza']
+            # Larghezze a passi di 50 mm come nei cataloghi
+            larghezza = rng.randrange(low, high + 1, 50)
+            for part in furniture_parts(tipo_id, larghezza):
+                quantity = min(part['quantity'], count - total)
+                if quantity <= 0:
+                    break
+                parts.append(dict(part, quantity=quantity))
+                total += quantity
+        return parts
+    
+    parts = []
+    for i in range(count):
+        if dataset == 'uniform':
+            width = rng.randint(100, 1200)
+            height = rng.randint(100, 800)
+        else:
+            width = int(80 + 1400 * rng.random() ** 3)
+            height = int(60 + 900 * rng.random() ** 3)
+        parts.append({'width': width, 'height': height, 'quantity': 1, 'name': f"P{i + 1}"})
+    return parts
+
+
+def case_name(case):
+    """Nome univoco di un caso, usato per il confronto con la baseline"""
+    name = f"{case['dataset']}-{case['parts']}-{case.get('engine', 'guillotine')}"
+    options = sorted(k for k in case if k not in ('dataset', 'parts', 'engine', 'seed'))
+    for key in options:
+        name += f"-{key}={case[key]}"
+    return name
+
+
+def run_case(case, repeat=1, measure_memory=True, optimizer_factory=None):
+    """
+    Esegue un caso di benchmark
+    
+    Il tempo è il migliore di repeat esecuzioni senza tracemalloc (che
+    rallenta l'allocazione); il picco di memoria è misurato in
+    un'esecuzione separata.
+    
+    Args:
+        case: Dizionario con 'dataset', 'parts' e opzionalmente 'seed' e
+            opzioni di optimize() ('engine', 'bin_mode', ...)
+        repeat: Numero di esecuzioni cronometrate
+        measure_memory: Misura il picco di memoria con tracemalloc
+        optimizer_factory: Funzione senza argomenti che crea l'ottimizzatore
+            (default: NestingOptimizer senza cache)
+    
+    Returns:
+        dict: Misure del caso
+    """
+    factory = optimizer_factory or NestingOptimizer
+    table = PartTable.from_parts(generate_dataset(case['dataset'], case['parts'], case.get('seed', 0)))
+    options = {k: v for k, v in case.items() if k not in ('dataset', 'parts', 'seed')}
+    
+    wall_time = None
+    result = None
+    for _ in range(max(repeat, 1)):
+        optimizer = factory()
+        start = time.perf_counter()
+        result = optimizer.optimize(table, **options)
+        elapsed = time.perf_counter() - start
+        wall_time = elapsed if wall_time is None else min(wall_time, elapsed)
+    
+    peak_memory = None
+    if measure_memory:
+        optimizer = factory()
+        tracemalloc.start()
+        try:
+            optimizer.optimize(table, **options)
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    
+    stats = result['statistics']
+    return {
+        'name': case_name(case),
+        'case': dict(case),
+        'parts': result['parts_count'],
+        'wall_time_s': round(wall_time, 4),
+        'peak_memory_kb': None if peak_memory is None else round(peak_memory / 1024, 1),
+        'sheets_count': result['sheets_count'],
+        'efficiency_percent': stats['efficiency_percent'],
+        'lower_bound_sheets': stats['lower_bound_sheets'],
+        'gap_to_lower_bound': stats['gap_to_lower_bound']
+    }
+
+
+def run_suite(cases=DEFAULT_CASES, repeat=1, measure_memory=True, max_parts=None,
+              optimizer_factory=None, verbose=False):
+    """
+    Esegue una suite di benchmark
+    
+    Args:
+        cases: Casi da eseguire (vedi run_case())
+        repeat: Esecuzioni cronometrate per caso
+        measure_memory: Misura il picco di memoria
+        max_parts: Salta i casi con più pezzi (None = tutti)
+        optimizer_factory: Vedi run_case()
+        verbose: Stampa una riga per caso
+    
+    Returns:
+        dict: Report serializzabile in JSON con ambiente e risultati
+    """
+    results = []
+    for case in cases:
+        if max_parts is not None and case['parts'] > max_parts:
+            continue
+        record = run_case(case, repeat, measure_memory, optimizer_factory)
+        results.append(record)
+        if verbose:
+            memory = '' if record['peak_memory_kb'] is None else f" {record['peak_memory_kb']:.0f} KB"
+            print(
+                f"{record['name']:<36} {record['wall_time_s']:>8.3f} s{memory}  "
+                f"{record['sheets_count']} fogli (LB {record['lower_bound_sheets']})  "
+                f"{record['efficiency_percent']}%"
+            )
+    
+    return {
+        'benchmark_version': BENCHMARK_VERSION,
+        'engine_version': NESTING_ENGINE_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results
+    }
+
+
+def compare_reports(report, baseline, thresholds=None):
+    """
+    Confronta un report con una baseline
+    
+    Sono confrontati solo i casi presenti in entrambi (stesso nome); i
+    tempi sotto 'min_time_s' in entrambi i report non sono confrontati.
+    
+    Args:
+        report: Report corrente (vedi run_suite())
+        baseline: Report di riferimento
+        thresholds: Soglie che sovrascrivono DEFAULT_THRESHOLDS
+    
+    Returns:
+        list: Descrizioni delle regressioni (vuota se nessuna)
+    """
+    limits = dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
+    previous = {record['name']: record for record in baseline.get('results', [])}
+    
+    regressions = []
+    for record in report.get('results', []):
+        base = previous.get(record['name'])
+        if base is None:
+            continue
+        name = record['name']
+        
+        if max(record['wall_time_s'], base['wall_time_s']) >= limits['min_time_s']:
+            if record['wall_time_s'] > base['wall_time_s'] * limits['time_ratio']:
+                regressions.append(
+                    f"{name}: tempo {record['wall_time_s']:.3f} s > "
+                    f"{limits['time_ratio']} × {base['wall_time_s']:.3f} s"
+                )
+        
+        if record.get('peak_memory_kb') and base.get('peak_memory_kb'):
+            if record['peak_memory_kb'] > base['peak_memory_kb'] * limits['memory_ratio']:
+                regressions.append(
+                    f"{name}: memoria {record['peak_memory_kb']:.0f} KB > "
+                    f"{limits['memory_ratio']} × {base['peak_memory_kb']:.0f} KB"
+                )
+        
+        if record['sheets_count'] > base['sheets_count'] + limits['sheets_increase']:
+            regressions.append(f"{name}: fogli {record['sheets_count']} (baseline {base['sheets_count']})")
+        
+        if record['efficiency_percent'] < base['efficiency_percent'] - limits['efficiency_drop']:
+            regressions.append(
+                f"{name}: efficienza {record['efficiency_percent']}% (baseline {base['efficiency_percent']}%)"
+            )
+    
+    return regressions
+
+
+def check_budgets(report, budgets=None):
+    """
+    Verifica i tempi massimi assoluti dei casi eseguiti
+    
+    I casi assenti dal report, o il cui caso di riferimento è assente, non
+    sono verificati.
+    
+    Args:
+        report: Report corrente (vedi run_suite())
+        budgets: Tempi massimi per nome di caso (default: TIME_BUDGETS)
+    
+    Returns:
+        list: Descrizioni dei tempi superati (vuota se nessuno)
+    """
+    times = {record['name']: record['wall_time_s'] for record in report.get('results', [])}
+    
+    exceeded = []
+    for name, budget in (TIME_BUDGETS if budgets is None else budgets).items():
+        if name not in times:
+            continue
+        limit = budget['max_s']
+        if 'over' in budget:
+            if budget['over'] not in times:
+                continue
+            limit += times[budget['over']]
+        if times[name] > limit:
+            exceeded.append(f"{name}: tempo {times[name]:.3f} s > massimo {limit:.3f} s")
+    return exceeded
+
+
+def main(argv=None):
+    """
+    Riga di comando del benchmark
+    
+    Esegue la suite, scrive il report JSON ed esce con codice 1 se un caso
+    supera il tempo massimo (TIME_BUDGETS) o, con --baseline, se ci sono
+    regressioni oltre le soglie.
+    
+    Args:
+        argv: Argomenti (default: sys.argv[1:])
+    
+    Returns:
+        int: Codice di uscita
+    """
+    parser = argparse.ArgumentParser(description="Benchmark del nesting FurnitureAI")
+    parser.add_argument('--output', help="File JSON del report")
+    parser.add_argument('--baseline', help="Report JSON di riferimento")
+    parser.add_argument('--repeat', type=int, default=1, help="Esecuzioni cronometrate per caso")
+    parser.add_argument('--max-parts', type=int, help="Salta i casi con più pezzi")
+    parser.add_argument('--no-memory', action='store_true', help="Non misurare il picco di memoria")
+    parser.add_argument('--time-ratio', type=float, default=DEFAULT_THRESHOLDS['time_ratio'])
+    parser.add_argument('--memory-ratio', type=float, default=DEFAULT_THRESHOLDS['memory_ratio'])
+    parser.add_argument('--sheets-increase', type=int, default=DEFAULT_THRESHOLDS['sheets_increase'])
+    parser.add_argument('--efficiency-drop', type=float, default=DEFAULT_THRESHOLDS['efficiency_drop'])
+    args = parser.parse_args(argv)
+    
+    baseline = None
+    if args.baseline:
+        try:
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"❌ Errore lettura baseline: {e}")
+            return 2
+    
+    report = run_suite(
+        repeat=args.repeat,
+        measure_memory=not args.no_memory,
+        max_parts=args.max_parts,
+        verbose=True
+    )
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report salvato: {args.output}")
+    
+    exceeded = check_budgets(report)
+    for message in exceeded:
+        print(f"❌ {message}")
+    
+    if baseline is None:
+        return 1 if exceeded else 0
+    
+    regressions = compare_reports(report, baseline, {
+        'time_ratio': args.time_ratio,
+        'memory_ratio': args.memory_ratio,
+        'sheets_increase': args.sheets_increase,
+        'efficiency_drop': args.efficiency_drop
+    })
+    for regression in regressions:
+        print(f"❌ {regression}")
+    if regressions or exceeded:
+        return 1
+    print("✅ Nessuna regressione rispetto alla baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
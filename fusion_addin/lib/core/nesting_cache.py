@@ -0,0 +1,157 @@
+"""
+Cache su disco dei risultati di nesting
+Archivio content-addressed con limite di dimensione e politica LRU
+"""
+
+import json
+import logging
+import os
+import tempfile
+
+# Directory di default: <add-in>/config/nesting_cache
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    'config',
+    'nesting_cache'
+)
+
+logger = logging.getLogger('FurnitureAI.NestingCache')
+
+
+class NestingCache:
+    """
+    Archivio LRU su disco indicizzato per hash del contenuto
+    
+    Ogni voce è un file JSON '<chiave>.json'. L'ordine LRU è dato dalla data
+    di modifica dei file, aggiornata a ogni lettura; oltre max_entries voci o
+    max_bytes byte le voci meno recenti vengono eliminate.
+    """
+    
+    def __init__(self, cache_dir=None, max_entries=500, max_bytes=64 * 1024 * 1024):
+        """
+        Inizializza la cache
+        
+        Args:
+            cache_dir: Directory della cache (default: DEFAULT_CACHE_DIR)
+            max_entries: Numero massimo di voci
+            max_bytes: Dimensione massima complessiva (byte)
+        """
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key):
+        """
+        Legge una voce e la marca come usata di recente
+        
+        Args:
+            key: Chiave esadecimale (hash del contenuto)
+        
+        Returns:
+            dict: Dati salvati o None se assenti
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            os.utime(path, None)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        return data
+    
+    def put(self, key, data):
+        """
+        Salva una voce (scrittura atomica) e applica i limiti di dimensione
+        
+        Args:
+            key: Chiave esadecimale (hash del contenuto)
+            data: Dati serializzabili in JSON
+        
+        Returns:
+            bool: Successo operazione
+        """
+        tmp_path = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(tmp_path, self._path(key))
+            self._evict()
+            return True
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning("Errore scrittura cache nesting: %s", e)
+            # Non lasciare file temporanei orfani nella cache
+            if tmp_path is not None and os.path.exists(tmp_path):
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+            return False
+    
+    def clear(self):
+        """Elimina tutte le voci e azzera i contatori"""
+        for path, _, _ in self._entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.hits = 0
+        self.misses = 0
+    
+    def stats(self):
+        """
+        Statistiche di utilizzo della cache
+        
+        Returns:
+            dict: hits, misses, entries, size_bytes
+        """
+        entries = self._entries()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(entries),
+            'size_bytes': sum(size for _, size, _ in entries)
+        }
+    
+    def _path(self, key):
+        """Path del file di una voce"""
+        return os.path.join(self.cache_dir, f"{key}.json")
+    
+    def _entries(self):
+        """
+        Elenca le voci presenti
+        
+        Returns:
+            list: Tuple (path, dimensione, mtime)
+        """
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.name.endswith('.json') and entry.is_file():
+                        st = entry.stat()
+                        entries.append((entry.path, st.st_size, st.st_mtime))
+        except OSError:
+            pass
+        return entries
+    
+    def _evict(self):
+        """Elimina le voci meno recenti oltre i limiti configurati"""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        
+        # Dalla meno recente
+        entries.sort(key=lambda e: e[2])
+        while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+            path, size, _ = entries.pop(0)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
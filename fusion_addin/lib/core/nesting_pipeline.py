@@ -0,0 +1,206 @@
+"""
+Pipeline di nesting per materiale e spessore
+Divide la lista tagli di CutList in job di nesting indipendenti e li esegue in parallelo
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Try relative import first (for Fusion 360), fallback to absolute (for testing)
+try:
+    from .nesting import NestingOptimizer, _processes_available
+except ImportError:
+    from nesting import NestingOptimizer, _processes_available
+
+# Formato pannello usato per i materiali senza 'sheet_size' in libreria
+DEFAULT_SHEET_SIZE = (2800, 2070)
+
+LIBRARY_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'data',
+    'materials_library.json'
+)
+
+
+class NestingPipeline:
+    """Nesting di un'intera lista tagli, un job per (materiale, spessore)"""
+    
+    def __init__(self, library=None, workers=None, blade_width=4, margin=10):
+        """
+        Inizializza la pipeline
+        
+        Args:
+            library: Libreria materiali (default: data/materials_library.json)
+            workers: Numero di worker paralleli (default: numero di CPU)
+            blade_width: Larghezza lama sega (mm)
+            margin: Margine sicurezza (mm)
+        """
+        self.library = library if library is not None else self._load_library()
+        self.workers = workers
+        self.blade_width = blade_width
+        self.margin = margin
+    
+    def _load_library(self):
+        """Carica la libreria materiali dal file dati dell'add-in"""
+        try:
+            with open(LIBRARY_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def sheet_size_for(self, material):
+        """
+        Formato pannello di un materiale
+        
+        Il materiale di CutList è il nome del materiale Fusion: viene cercato
+        sia come id sia come 'name' tra i pannelli della libreria.
+        
+        Args:
+            material: Nome o id del materiale
+        
+        Returns:
+            tuple: (larghezza, altezza) in mm
+        """
+        panels = self.library.get('panels', {})
+        
+        entry = panels.get(material)
+        if entry is None:
+            entry = next((p for p in panels.values() if p.get('name') == material), None)
+        
+        if entry and entry.get('sheet_size'):
+            width, height = entry['sheet_size']
+            return (width, height)
+        return DEFAULT_SHEET_SIZE
+    
+    def build_jobs(self, cutlist):
+        """
+        Divide la lista tagli in job di nesting indipendenti
+        
+        Args:
+            cutlist: Risultato di CutList.generate()
+        
+        Returns:
+            list: Job con 'material', 'thickness', 'sheet_width',
+                'sheet_height' e 'parts' nel formato di optimize()
+        """
+        jobs = []
+        
+        for material, thicknesses in cutlist['parts'].items():
+            sheet_width, sheet_height = self.sheet_size_for(material)
+            
+            for thickness, parts in thicknesses.items():
+                jobs.append({
+                    'material': material,
+                    'thickness': thickness,
+                    'sheet_width': sheet_width,
+                    'sheet_height': sheet_height,
+                    'parts': [
+                        {
+                            'width': part['length'],
+                            'height': part['width'],
+                            'quantity': part.get('quantity', 1),
+                            'name': part.get('name', '')
+                        }
+                        for part in parts
+                    ]
+                })
+        
+        return jobs
+    
+    def run(self, cutlist, **options):
+        """
+        Esegue il nesting di tutti i materiali e spessori
+        
+        I job vengono eseguiti in un pool di processi; nel Python integrato
+        in Fusion, dove non è possibile avviare processi, in un pool di thread.
+        
+        Args:
+            cutlist: Risultato di CutList.generate()
+            **options: Opzioni passate a NestingOptimizer.optimize()
+        
+        Returns:
+            dict: Report unificato con 'jobs', 'statistics' e 'sheets_count'
+        """
+        jobs = self.build_jobs(cutlist)
+        settings = {'blade_width': self.blade_width, 'margin': self.margin}
+        
+        results = []
+        if jobs:
+            executor_class = ProcessPoolExecutor if _processes_available() else ThreadPoolExecutor
+            try:
+                with executor_class(max_workers=self.workers or os.cpu_count() or 1) as executor:
+                    results = list(executor.map(
+                        _run_job, jobs, [settings] * len(jobs), [options] * len(jobs)
+                    ))
+            except (OSError, RuntimeError) as e:
+                print(f"⚠️ Pool nesting non disponibile, esecuzione sequenziale: {e}")
+                results = [_run_job(job, settings, options) for job in jobs]
+        
+        report_jobs = []
+        for job, result in zip(jobs, results):
+            report_jobs.append({
+                'material': job['material'],
+                'thickness': job['thickness'],
+                'sheet_size': (job['sheet_width'], job['sheet_height']),
+                'result': result
+            })
+        
+        return {
+            'jobs': report_jobs,
+            'statistics': self._merge_stats(report_jobs),
+            'sheets_count': sum(j['result']['sheets_count'] for j in report_jobs)
+        }
+    
+    def _merge_stats(self, report_jobs):
+        """
+        Statistiche complessive su tutti i pannelli
+        
+        Args:
+            report_jobs: Job con relativo risultato
+        
+        Returns:
+            dict: Statistiche totali e per materiale
+        """
+        total_area = 0
+        used_area = 0
+        by_material = {}
+        
+        for job in report_jobs:
+            stats = job['result']['statistics']
+            total_area += stats['total_area_m2']
+            used_area += stats['used_area_m2']
+            
+            material = by_material.setdefault(job['material'], {'sheets': 0, 'used_area_m2': 0})
+            material['sheets'] += stats['total_sheets']
+            material['used_area_m2'] = round(material['used_area_m2'] + stats['used_area_m2'], 4)
+        
+        efficiency = (used_area / total_area * 100) if total_area > 0 else 0
+        
+        return {
+            'total_sheets': sum(m['sheets'] for m in by_material.values()),
+            'total_area_m2': round(total_area, 4),
+            'used_area_m2': round(used_area, 4),
+            'waste_area_m2': round(total_area - used_area, 4),
+            'efficiency_percent': round(efficiency, 2),
+            'waste_percent': round(100 - efficiency, 2),
+            'by_material': by_material
+        }
+
+
+def _run_job(job, settings, options):
+    """
+    Esegue un singolo job di nesting (funzione worker del pool)
+    
+    Args:
+        job: Job da NestingPipeline.build_jobs()
+        settings: 'blade_width' e 'margin'
+        options: Opzioni di optimize()
+    
+    Returns:
+        dict: Risultato di optimize()
+    """
+    optimizer = NestingOptimizer(job['sheet_width'], job['sheet_height'])
+    optimizer.blade_width = settings['blade_width']
+    optimizer.margin = settings['margin']
+    return optimizer.optimize(job['parts'], **options)
@@ -0,0 +1,681 @@
+"""
+Nesting di parti sagomate con no-fit polygon
+Motore bottom-left per ante curve, top sagomati e profili DXF accanto ai pannelli rettangolari
+"""
+
+from collections import OrderedDict, namedtuple
+
+# Try relative import first (for Fusion 360), fallback to absolute (for testing)
+try:
+    from .nesting import sheet_patterns
+except ImportError:
+    from nesting import sheet_patterns
+
+# Come Placement di nesting.py, con la sagoma: x/y/width/height sono il
+# riquadro di ingombro, outline i vertici in coordinate del foglio
+PolygonPlacement = namedtuple(
+    'PolygonPlacement',
+    ['x', 'y', 'width', 'height', 'id', 'name', 'rotated', 'rotation', 'outline']
+)
+
+# Rotazioni provate con allow_rotation (gradi, antiorarie): multipli di 90°
+# per mantenere esatte le coordinate e la venatura parallela ai lati
+POLYGON_ROTATIONS = (0, 90, 180, 270)
+
+# Numero massimo di no-fit polygon nella cache LRU di default
+NFP_CACHE_SIZE = 4096
+
+# Tolleranza geometrica (mm)
+EPSILON = 1e-6
+
+
+class PolygonNestingOptimizer:
+    """
+    Nesting di parti sagomate con no-fit polygon (NFP)
+    
+    L'NFP di una coppia di sagome è il luogo delle posizioni in cui la
+    seconda si sovrappone alla prima: una posizione è libera se non cade
+    dentro l'NFP di nessun pezzo già piazzato. Ogni pezzo viene messo nella
+    posizione libera più in basso e a sinistra tra i vertici e le
+    intersezioni degli NFP.
+    
+    Le sagome concave (es. top ad angolo a L) sono scomposte in poligoni
+    convessi: l'NFP di una coppia è l'unione delle somme di Minkowski dei
+    pezzi convessi allargati della lama, esatta anche nelle rientranze.
+    Gli NFP sono salvati in una cache LRU limitata per coppia di sagome e
+    rotazione; per due rettangoli l'NFP è calcolato direttamente.
+    """
+    
+    def __init__(self, sheet_width=2800, sheet_height=2070, nfp_cache_size=NFP_CACHE_SIZE):
+        """
+        Inizializza l'ottimizzatore
+        
+        Args:
+            sheet_width: Larghezza pannello standard (mm)
+            sheet_height: Altezza pannello standard (mm)
+            nfp_cache_size: Numero massimo di NFP nella cache LRU
+        """
+        self.sheet_width = sheet_width
+        self.sheet_height = sheet_height
+        self.blade_width = 4  # Larghezza lama sega (mm)
+        self.margin = 10  # Margine sicurezza (mm)
+        self.nfp_cache_size = nfp_cache_size
+        
+        self._nfp_cache = OrderedDict()
+        self._shape_ids = {}
+        self.nfp_hits = 0
+        self.nfp_misses = 0
+    
+    def optimize(self, parts, allow_rotation=True):
+        """
+        Ottimizza il posizionamento delle parti
+        
+        Args:
+            parts: Lista di dizionari con 'outline' (lista di punti [x, y] in
+                mm, in ordine lungo il contorno) oppure 'width'/'height', e
+                'quantity', 'name'
+            allow_rotation: Prova le rotazioni di POLYGON_ROTATIONS
+        
+        Returns:
+            dict: Risultato nel formato di NestingOptimizer.optimize() con
+                PolygonPlacement nei fogli
+        """
+        rotations = POLYGON_ROTATIONS if allow_rotation else (0,)
+        types = [self._part_type(type_id, part, rotations) for type_id, part in enumerate(parts)]
+        
+        # Pezzi grandi per primi (ordinamento per area reale)
+        order = sorted(types, key=lambda t: t['area'], reverse=True)
+        
+        sheets = []
+        for part_type in order:
+            # Lo spazio libero dei fogli diminuisce soltanto: le copie
+            # successive di un tipo partono dal foglio dell'ultima copia
+            first = 0
+            for _ in range(part_type['count']):
+                sheet = self._place(part_type, sheets, first)
+                if sheet is None:
+                    break
+                first = sheet['id']
+        
+        # Le varianti piazzate servono solo durante il packing
+        for sheet in sheets:
+            del sheet['items']
+        
+        return {
+            'sheets': sheets,
+            'statistics': self._calculate_stats(sheets, types),
+            'parts_count': sum(t['count'] for t in types),
+            'sheets_count': len(sheets),
+            'patterns': sheet_patterns(sheets)
+        }
+    
+    def clear_cache(self):
+        """Svuota la cache degli NFP e azzera i contatori"""
+        self._nfp_cache.clear()
+        self._shape_ids.clear()
+        self.nfp_hits = 0
+        self.nfp_misses = 0
+    
+    def _part_type(self, type_id, part, rotations):
+        """
+        Prepara un tipo di parte con le sue varianti ruotate
+        
+        Args:
+            type_id: Indice del tipo
+            part: Dizionario parte
+            rotations: Rotazioni ammesse (gradi)
+        
+        Returns:
+            dict: Tipo con 'name', 'count', 'area', 'footprint' (area minima
+                occupata con la lama) e 'variants'
+        
+        Raises:
+            ValueError: Se la parte non ha una sagoma valida
+        """
+        if 'outline' in part:
+            outline = [(float(x), float(y)) for x, y in part['outline']]
+            if len(outline) < 3:
+                raise ValueError(f"Sagoma con meno di 3 vertici: {part.get('name')}")
+        elif 'width' in part and 'height' in part:
+            w, h = float(part['width']), float(part['height'])
+            outline = [(0.0, 0.0), (w, 0.0), (w, h), (0.0, h)]
+        else:
+            raise ValueError(f"Parte senza 'outline' né 'width'/'height': {part.get('name')}")
+        
+        area = abs(_signed_area(outline))
+        if area <= EPSILON:
+            raise ValueError(f"Sagoma di area nulla: {part.get('name')}")
+        
+        variants = []
+        seen = set()
+        for rotation in rotations:
+            rotated = _normalize(_rotate(outline, rotation))
+            key = tuple(sorted(rotated))
+            if key in seen:
+                # Rotazione equivalente (es. 180° di un rettangolo)
+                continue
+            seen.add(key)
+            variants.append(self._variant(rotated, rotation))
+        
+        # La sagoma allargata della lama verso destra e verso l'alto occupa
+        # almeno area + b * (larghezza + altezza) + b²: stima per difetto
+        # usata per scartare i fogli senza spazio (vedi _place())
+        b = self.blade_width
+        width = variants[0]['width']
+        height = variants[0]['height']
+        
+        return {
+            'id': type_id,
+            'name': part.get('name') or f"Parte_{type_id}",
+            'count': part.get('quantity', 1),
+            'area': area,
+            'footprint': area + b * (width + height) + b * b,
+            'variants': variants
+        }
+    
+    def _variant(self, outline, rotation):
+        """
+        Sagoma ruotata con pezzi convessi allargati della lama e id di forma
+        
+        Ogni pezzo convesso della sagoma (vedi _convex_pieces()) è esteso di
+        una lama verso destra e verso l'alto, come i rettangoli del nesting
+        standard: due sagome allargate che si toccano lasciano esattamente
+        lo spessore della lama tra i pezzi. L'unione dei pezzi allargati è
+        la sagoma allargata.
+        """
+        width = max(x for x, _ in outline)
+        height = max(y for _, y in outline)
+        b = self.blade_width
+        
+        is_rect = _is_rectangle(outline)
+        if is_rect:
+            pieces = (((0.0, 0.0), (width + b, 0.0), (width + b, height + b), (0.0, height + b)),)
+        else:
+            pieces = tuple(
+                _convex_hull([(x + dx, y + dy) for x, y in piece for dx, dy in ((0, 0), (b, 0), (0, b), (b, b))])
+                for piece in _convex_pieces(outline)
+            )
+        
+        # Id intero della forma: chiave compatta della cache NFP, condivisa
+        # tra tipi diversi con la stessa sagoma
+        shape = (is_rect, width, height, b) if is_rect else pieces
+        shape_id = self._shape_ids.setdefault(shape, len(self._shape_ids))
+        
+        return {
+            'outline': tuple(outline),
+            'rotation': rotation,
+            'width': width,
+            'height': height,
+            'rect': is_rect,
+            'pieces': pieces,
+            'shape_id': shape_id
+        }
+    
+    def _nfp(self, fixed, moving):
+        """
+        No-fit polygon di moving attorno a fixed (cache LRU)
+        
+        L'NFP è l'unione degli NFP convessi di ogni coppia di pezzi: una
+        posizione si sovrappone a fixed solo se è interna ad almeno uno.
+        
+        Args:
+            fixed: Variante del pezzo fermo (origine nel suo angolo minimo)
+            moving: Variante del pezzo da piazzare
+        
+        Returns:
+            tuple: Coppie (vertici in senso antiorario, riquadro
+                (x0, y0, x1, y1)), una per coppia di pezzi convessi
+        """
+        key = (fixed['shape_id'], moving['shape_id'])
+        cache = self._nfp_cache
+        entry = cache.get(key)
+        if entry is not None:
+            cache.move_to_end(key)
+            self.nfp_hits += 1
+            return entry
+        
+        self.nfp_misses += 1
+        b = self.blade_width
+        if fixed['rect'] and moving['rect']:
+            # Percorso rapido: l'NFP di due rettangoli è un rettangolo
+            x0, y0 = -(moving['width'] + b), -(moving['height'] + b)
+            x1, y1 = fixed['width'] + b, fixed['height'] + b
+            polygons = [((x0, y0), (x1, y0), (x1, y1), (x0, y1))]
+        else:
+            polygons = [
+                _convex_hull([(ax - bx, ay - by) for ax, ay in a for bx, by in b_piece])
+                for a in fixed['pieces'] for b_piece in moving['pieces']
+            ]
+        
+        entry = tuple((points, _bounds(points)) for points in polygons)
+        cache[key] = entry
+        if len(cache) > self.nfp_cache_size:
+            cache.popitem(last=False)
+        return entry
+    
+    def _place(self, part_type, sheets, first=0):
+        """
+        Piazza un pezzo nel primo foglio in cui entra (first-fit)
+        
+        'free_area' di ogni foglio è un limite superiore dello spazio
+        libero (area utile meno l'ingombro minimo con la lama dei pezzi
+        piazzati): i fogli sotto l'ingombro del pezzo sono scartati senza
+        calcolare NFP.
+        
+        Args:
+            part_type: Tipo da _part_type()
+            sheets: Fogli aperti (un nuovo foglio viene aggiunto se serve)
+            first: Indice del primo foglio da provare
+        
+        Returns:
+            dict: Foglio di destinazione o None se il pezzo non entra
+        """
+        for sheet in sheets[first:]:
+            if sheet['free_area'] + EPSILON < part_type['footprint']:
+                continue
+            if self._place_in_sheet(part_type, sheet):
+                return sheet
+        
+        sheet = {
+            'id': len(sheets),
+            'width': self.sheet_width,
+            'height': self.sheet_height,
+            'placements': [],
+            'items': [],
+            'used_area': 0,
+            'free_area': (self.sheet_width - 2 * self.margin) * (self.sheet_height - 2 * self.margin)
+        }
+        if not self._place_in_sheet(part_type, sheet):
+            # Pezzo più grande dell'area utile del foglio
+            return None
+        sheets.append(sheet)
+        return sheet
+    
+    def _place_in_sheet(self, part_type, sheet):
+        """
+        Piazza il pezzo nella miglior posizione del foglio, se esiste
+        
+        Tra le rotazioni vince quella con il bordo superiore più basso, poi
+        più a sinistra.
+        
+        Returns:
+            bool: True se il pezzo è stato piazzato
+        """
+        best = None
+        for variant in part_type['variants']:
+            position = self._find_position(sheet, variant)
+            if position is None:
+                continue
+            score = (position[1] + variant['height'], position[0])
+            if best is None or score < best[0]:
+                best = (score, variant, position)
+        
+        if best is None:
+            return False
+        
+        _, variant, (x, y) = best
+        sheet['items'].append((variant, x, y))
+        sheet['placements'].append(PolygonPlacement(
+            x, y, variant['width'], variant['height'],
+            part_type['id'], part_type['name'],
+            variant['rotation'] in (90, 270), variant['rotation'],
+            tuple((x + px, y + py) for px, py in variant['outline'])
+        ))
+        sheet['used_area'] += part_type['area']
+        sheet['free_area'] -= part_type['footprint']
+        return True
+    
+    def _find_position(self, sheet, variant):
+        """
+        Posizione libera più in basso e a sinistra per una variante
+        
+        I candidati sono gli angoli del rettangolo ammesso (inner-fit), i
+        vertici degli NFP e le intersezioni dei lati degli NFP con i bordi
+        inferiore e sinistro del rettangolo ammesso e tra loro; queste
+        ultime, le più costose, solo sotto la miglior posizione trovata.
+        
+        La lama è riservata anche verso i bordi destro e superiore, come
+        nei motori rettangolari: la sagoma allargata resta dentro i margini.
+        
+        Args:
+            sheet: Foglio con 'items' (variante, x, y) già piazzati
+            variant: Variante da piazzare
+        
+        Returns:
+            tuple: (x, y) dell'angolo minimo o None se non entra
+        """
+        x0 = y0 = self.margin
+        x1 = sheet['width'] - self.margin - variant['width'] - self.blade_width
+        y1 = sheet['height'] - self.margin - variant['height'] - self.blade_width
+        if x1 < x0 - EPSILON or y1 < y0 - EPSILON:
+            return None
+        
+        obstacles = []
+        for fixed, fx, fy in sheet['items']:
+            for points, (bx0, by0, bx1, by1) in self._nfp(fixed, variant):
+                # Gli NFP lontani dal rettangolo ammesso non vincolano
+                if bx0 + fx > x1 + EPSILON or bx1 + fx < x0 - EPSILON or \
+                        by0 + fy > y1 + EPSILON or by1 + fy < y0 - EPSILON:
+                    continue
+                obstacles.append((
+                    [(px + fx, py + fy) for px, py in points],
+                    (bx0 + fx, by0 + fy, bx1 + fx, by1 + fy)
+                ))
+        
+        # Prima i candidati economici: angoli, vertici e intersezioni con i bordi
+        candidates = [(x0, y0), (x1, y0), (x0, y1), (x1, y1)]
+        edges = []
+        for points, _ in obstacles:
+            candidates.extend(points)
+            obstacle_edges = []
+            for p, q in zip(points, points[1:] + points[:1]):
+                candidates.extend(_boundary_intersections(p, q, x0, y0))
+                obstacle_edges.append((p, q, min(p[0], q[0]), min(p[1], q[1]), max(p[0], q[0]), max(p[1], q[1])))
+            edges.append(obstacle_edges)
+        
+        bounds = (x0, y0, x1, y1)
+        best = self._first_free(candidates, obstacles, bounds)
+        
+        # Poi le intersezioni tra NFP vicini, solo sotto la miglior posizione
+        limit = best[1] + EPSILON if best is not None else y1 + EPSILON
+        crossings = []
+        for i, (_, bounds_i) in enumerate(obstacles):
+            if bounds_i[1] > limit:
+                continue
+            for j in range(i + 1, len(obstacles)):
+                bounds_j = obstacles[j][1]
+                if bounds_j[1] > limit or not _bounds_overlap(bounds_i, bounds_j):
+                    continue
+                edges_j = [e for e in edges[j] if e[3] <= limit and _bounds_overlap(e[2:], bounds_i)]
+                for p, q, ex0, ey0, ex1, ey1 in edges[i]:
+                    if ey0 > limit or not _bounds_overlap((ex0, ey0, ex1, ey1), bounds_j):
+                        continue
+                    for r, t, fx0, fy0, fx1, fy1 in edges_j:
+                        if fx0 > ex1 or ex0 > fx1 or fy0 > ey1 or ey0 > fy1:
+                            continue
+                        point = _segment_intersection(p, q, r, t)
+                        if point is not None and point[1] <= limit:
+                            crossings.append(point)
+        
+        if crossings:
+            if best is not None:
+                crossings.append(best)
+            best = self._first_free(crossings, obstacles, bounds)
+        return best
+    
+    def _first_free(self, candidates, obstacles, bounds):
+        """
+        Primo candidato libero in ordine bottom-left
+        
+        Args:
+            candidates: Punti candidati
+            obstacles: NFP traslati con riquadro
+            bounds: Rettangolo ammesso (x0, y0, x1, y1)
+        
+        Returns:
+            tuple: (x, y) o None se nessun candidato è libero
+        """
+        x0, y0, x1, y1 = bounds
+        inside = {
+            (min(max(x, x0), x1), min(max(y, y0), y1))
+            for x, y in candidates
+            if x0 - EPSILON <= x <= x1 + EPSILON and y0 - EPSILON <= y <= y1 + EPSILON
+        }
+        
+        for x, y in sorted(inside, key=lambda c: (c[1], c[0])):
+            if not any(
+                b[0] < x < b[2] and b[1] < y < b[3] and _strictly_inside(points, x, y)
+                for points, b in obstacles
+            ):
+                return (x, y)
+        return None
+    
+    def _calculate_stats(self, sheets, types):
+        """
+        Calcola statistiche di utilizzo (area reale delle sagome)
+        
+        Args:
+            sheets: Lista di sheet
+            types: Tipi da _part_type()
+        
+        Returns:
+            dict: Statistiche, con l'area dei riquadri di ingombro per il
+                confronto con il nesting rettangolare
+        """
+        total_sheet_area = sum(sheet['width'] * sheet['height'] for sheet in sheets)
+        used_area = sum(sheet['used_area'] for sheet in sheets)
+        bounding_area = sum(p.width * p.height for sheet in sheets for p in sheet['placements'])
+        
+        efficiency = (used_area / total_sheet_area * 100) if total_sheet_area > 0 else 0
+        
+        return {
+            'total_sheets': len(sheets),
+            'sheet_area_m2': round(self.sheet_width * self.sheet_height / 1000000, 4),
+            'total_area_m2': round(total_sheet_area / 1000000, 4),
+            'used_area_m2': round(used_area / 1000000, 4),
+            'bounding_box_area_m2': round(bounding_area / 1000000, 4),
+            'waste_area_m2': round((total_sheet_area - used_area) / 1000000, 4),
+            'efficiency_percent': round(efficiency, 2),
+            'waste_percent': round(100 - efficiency, 2),
+            'nfp_cache_hits': self.nfp_hits,
+            'nfp_cache_misses': self.nfp_misses
+        }
+
+
+def _signed_area(points):
+    """Area con segno (positiva se i vertici sono in senso antiorario)"""
+    area = 0.0
+    for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1]):
+        area += x1 * y2 - x2 * y1
+    return area / 2
+
+
+def _rotate(points, rotation):
+    """Rotazione antioraria di un multiplo di 90° attorno all'origine"""
+    if rotation == 90:
+        return [(-y, x) for x, y in points]
+    if rotation == 180:
+        return [(-x, -y) for x, y in points]
+    if rotation == 270:
+        return [(y, -x) for x, y in points]
+    return list(points)
+
+
+def _normalize(points):
+    """Trasla i punti con l'angolo minimo del riquadro nell'origine"""
+    min_x = min(x for x, _ in points)
+    min_y = min(y for _, y in points)
+    return [(x - min_x, y - min_y) for x, y in points]
+
+
+def _is_rectangle(points):
+    """True se la sagoma (normalizzata) coincide con il suo riquadro"""
+    if len(points) != 4:
+        return False
+    width = max(x for x, _ in points)
+    height = max(y for _, y in points)
+    return set(points) == {(0.0, 0.0), (width, 0.0), (width, height), (0.0, height)}
+
+
+def _convex_pieces(points):
+    """
+    Scompone una sagoma semplice in poligoni convessi
+    
+    Triangolazione per ear clipping, poi unione dei poligoni adiacenti
+    finché il risultato resta convesso (Hertel-Mehlhorn): poche parti per
+    le sagome d'arredo (due per un top a L). Se la sagoma non è semplice
+    si usa l'inviluppo convesso, conservativo.
+    
+    Args:
+        points: Vertici della sagoma lungo il contorno
+    
+    Returns:
+        list: Poligoni convessi in senso antiorario
+    """
+    polygon = _simplify(points if _signed_area(points) > 0 else list(reversed(points)))
+    if _is_convex(polygon):
+        return [tuple(polygon)]
+    
+    # Ear clipping: un orecchio è un vertice convesso il cui triangolo non
+    # contiene altri vertici
+    remaining = list(polygon)
+    pieces = []
+    while len(remaining) > 3:
+        n = len(remaining)
+        for i in range(n):
+            a, b, c = remaining[i - 1], remaining[i], remaining[(i + 1) % n]
+            if _cross(a, b, c) <= EPSILON:
+                continue
+            if any(_in_triangle(p, a, b, c) for p in remaining if p not in (a, b, c)):
+                continue
+            pieces.append((a, b, c))
+            del remaining[i]
+            break
+        else:
+            return [_convex_hull(polygon)]
+    pieces.append(tuple(remaining))
+    
+    # Unione dei poligoni che condividono un lato, se resta convessa
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(pieces)):
+            for j in range(i + 1, len(pieces)):
+                union = _merge_convex(pieces[i], pieces[j])
+                if union is not None:
+                    pieces[i] = union
+                    del pieces[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return pieces
+
+
+def _merge_convex(a, b):
+    """Unione di due poligoni antiorari con un lato in comune, None se non convessa"""
+    n, m = len(a), len(b)
+    for i in range(n):
+        u, v = a[i], a[(i + 1) % n]
+        for j in range(m):
+            if b[j] == v and b[(j + 1) % m] == u:
+                # a da v a u, poi b da u a v esclusi gli estremi
+                union = [a[(i + 1 + k) % n] for k in range(n)]
+                union += [b[(j + 1 + k) % m] for k in range(1, m - 1)]
+                union = _simplify(union)
+                return tuple(union) if _is_convex(union) else None
+    return None
+
+
+def _simplify(points):
+    """Rimuove vertici ripetuti e allineati"""
+    result = []
+    for p in points:
+        if not result or p != result[-1]:
+            result.append(p)
+    if len(result) > 1 and result[0] == result[-1]:
+        result.pop()
+    
+    changed = True
+    while changed and len(result) > 3:
+        changed = False
+        for i in range(len(result)):
+            a, b, c = result[i - 1], result[i], result[(i + 1) % len(result)]
+            if abs(_cross(a, b, c)) <= EPSILON and \
+                    (b[0] - a[0]) * (c[0] - b[0]) + (b[1] - a[1]) * (c[1] - b[1]) > 0:
+                del result[i]
+                changed = True
+                break
+    return result
+
+
+def _is_convex(points):
+    """True se il poligono antiorario è convesso (vertici allineati ammessi)"""
+    n = len(points)
+    return all(_cross(points[i - 1], points[i], points[(i + 1) % n]) >= -EPSILON for i in range(n))
+
+
+def _cross(o, a, b):
+    """Prodotto vettoriale (a - o) × (b - o)"""
+    return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+
+def _in_triangle(p, a, b, c):
+    """True se p è nel triangolo antiorario abc (bordo compreso)"""
+    return _cross(a, b, p) >= -EPSILON and _cross(b, c, p) >= -EPSILON and _cross(c, a, p) >= -EPSILON
+
+
+def _convex_hull(points):
+    """
+    Inviluppo convesso (monotone chain)
+    
+    Returns:
+        tuple: Vertici in senso antiorario, senza punti allineati
+    """
+    points = sorted(set(points))
+    if len(points) <= 2:
+        return tuple(points)
+    
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+    
+    lower = []
+    for p in points:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], p) <= 0:
+            lower.pop()
+        lower.append(p)
+    
+    upper = []
+    for p in reversed(points):
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], p) <= 0:
+            upper.pop()
+        upper.append(p)
+    
+    return tuple(lower[:-1] + upper[:-1])
+
+
+def _bounds(points):
+    """Riquadro (x0, y0, x1, y1) di una lista di punti"""
+    xs = [x for x, _ in points]
+    ys = [y for _, y in points]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def _bounds_overlap(a, b):
+    """True se due riquadri si toccano o si sovrappongono"""
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def _strictly_inside(points, x, y):
+    """True se (x, y) è interno (non sul bordo) al poligono convesso antiorario"""
+    for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1]):
+        if (x2 - x1) * (y - y1) - (y2 - y1) * (x - x1) <= EPSILON:
+            return False
+    return True
+
+
+def _segment_intersection(p, q, r, s):
+    """Punto di intersezione di due segmenti (None se paralleli o disgiunti)"""
+    dx1, dy1 = q[0] - p[0], q[1] - p[1]
+    dx2, dy2 = s[0] - r[0], s[1] - r[1]
+    denominator = dx1 * dy2 - dy1 * dx2
+    if abs(denominator) <= EPSILON:
+        return None
+    
+    t = ((r[0] - p[0]) * dy2 - (r[1] - p[1]) * dx2) / denominator
+    u = ((r[0] - p[0]) * dy1 - (r[1] - p[1]) * dx1) / denominator
+    if -EPSILON <= t <= 1 + EPSILON and -EPSILON <= u <= 1 + EPSILON:
+        return (p[0] + t * dx1, p[1] + t * dy1)
+    return None
+
+
+def _boundary_intersections(p, q, x0, y0):
+    """Intersezioni di un segmento con le rette y = y0 e x = x0"""
+    points = []
+    if (p[1] - y0) * (q[1] - y0) < 0:
+        t = (y0 - p[1]) / (q[1] - p[1])
+        points.append((p[0] + t * (q[0] - p[0]), y0))
+    if (p[0] - x0) * (q[0] - x0) < 0:
+        t = (x0 - p[0]) / (q[0] - p[0])
+        points.append((x0, p[1] + t * (q[1] - p[1])))
+    return points
@@ -0,0 +1,238 @@
+"""
+Sessione di nesting incrementale
+Aggiunge o rimuove parti da un layout esistente senza rifare il nesting completo
+"""
+
+# Try relative import first (for Fusion 360), fallback to absolute (for testing)
+try:
+    from .nesting import NestingOptimizer, PartTable, ENGINES, BATCH_ENGINES, MAXRECTS_HEURISTICS, sheet_patterns
+except ImportError:
+    from nesting import NestingOptimizer, PartTable, ENGINES, BATCH_ENGINES, MAXRECTS_HEURISTICS, sheet_patterns
+
+
+class NestingSession:
+    """
+    Layout di nesting riprendibile
+    
+    Ogni foglio conserva il proprio spazio libero: add_parts() inserisce i
+    nuovi pezzi nei fogli aperti (best-fit) e apre nuovi fogli solo se
+    necessario; remove_parts() libera lo spazio lasciando fermi gli altri
+    pezzi. I fogli rilasciati in produzione con release_sheets() non vengono
+    più modificati.
+    """
+    
+    def __init__(self, optimizer=None, engine='maxrects', heuristic='best_short_side',
+                 allow_rotation=True):
+        """
+        Inizializza la sessione
+        
+        Args:
+            optimizer: NestingOptimizer con dimensioni foglio e lama
+                (default: NestingOptimizer())
+            engine: Motore di packing ('guillotine' o 'maxrects')
+            heuristic: Euristica MaxRects
+            allow_rotation: Permetti rotazione pezzi di 90°
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Motore nesting sconosciuto: {engine}")
+        if engine in BATCH_ENGINES:
+            raise ValueError(f"Il motore {engine} non supporta il nesting incrementale")
+        if engine == 'maxrects' and heuristic not in MAXRECTS_HEURISTICS:
+            raise ValueError(f"Euristica MaxRects sconosciuta: {heuristic}")
+        
+        self.optimizer = optimizer or NestingOptimizer()
+        self.engine = engine
+        self.heuristic = heuristic
+        self.allow_rotation = allow_rotation
+        
+        self.table = PartTable()
+        self.sheets = []
+        self.released = set()
+        self._next_sheet_id = 0
+    
+    def add_parts(self, parts, sort_order='area'):
+        """
+        Aggiunge parti al layout esistente
+        
+        Args:
+            parts: Lista di dizionari con 'width', 'height', 'quantity', 'name'
+            sort_order: Ordinamento dei nuovi pezzi (vedi SORT_ORDERS)
+        
+        Returns:
+            list: Id dei fogli modificati o creati
+        """
+        type_ids = [
+            self.table.add(part['width'], part['height'], part.get('quantity', 1), part.get('name'))
+            for part in parts
+        ]
+        
+        touched = []
+        for rect in self.table.iter_pieces(sort_order, type_ids=type_ids):
+            sheet = self._place(rect)
+            if sheet is not None and sheet['id'] not in touched:
+                touched.append(sheet['id'])
+        
+        return touched
+    
+    def remove_parts(self, parts):
+        """
+        Rimuove pezzi dal layout
+        
+        I pezzi vengono tolti a partire dagli ultimi fogli aperti; lo spazio
+        libero dei soli fogli modificati viene ricostruito senza spostare i
+        pezzi rimanenti. I fogli rimasti vuoti vengono eliminati. Se una
+        parte non ha abbastanza pezzi nei fogli aperti non viene rimosso
+        nulla.
+        
+        Args:
+            parts: Lista di dizionari con 'name', 'quantity' e opzionalmente
+                'width'/'height' per distinguere tipi omonimi
+        
+        Returns:
+            int: Numero di pezzi rimossi
+        
+        Raises:
+            ValueError: Se si chiedono più pezzi di quelli presenti nei
+                fogli non rilasciati
+        """
+        # Scelta dei pezzi prima di modificare il layout: tutto o niente
+        chosen = {}
+        for part in parts:
+            to_remove = part.get('quantity', 1)
+            
+            for sheet in reversed(self.sheets):
+                if to_remove == 0:
+                    break
+                if sheet['id'] in self.released:
+                    continue
+                
+                taken = chosen.setdefault(sheet['id'], set())
+                # Scorri dall'ultimo piazzamento per togliere i pezzi più recenti
+                for index in range(len(sheet['placements']) - 1, -1, -1):
+                    if to_remove == 0:
+                        break
+                    if index not in taken and self._matches(sheet['placements'][index], part):
+                        taken.add(index)
+                        to_remove -= 1
+            
+            if to_remove > 0:
+                raise ValueError(
+                    f"Pezzi da rimuovere non presenti nei fogli aperti: {part['name']} "
+                    f"(mancano {to_remove} su {part.get('quantity', 1)})"
+                )
+        
+        removed = 0
+        for sheet in self.sheets:
+            taken = chosen.get(sheet['id'])
+            if not taken:
+                continue
+            for index in taken:
+                self.table.counts[sheet['placements'][index].id] -= 1
+            sheet['placements'] = [p for i, p in enumerate(sheet['placements']) if i not in taken]
+            self.optimizer._rebuild_free_space(sheet)
+            removed += len(taken)
+        
+        self.sheets = [s for s in self.sheets if s['placements'] or s['id'] in self.released]
+        return removed
+    
+    def release_sheets(self, sheet_ids):
+        """
+        Blocca i fogli già mandati in produzione
+        
+        Args:
+            sheet_ids: Id dei fogli da bloccare
+        """
+        self.released.update(sheet_ids)
+    
+    def repack(self, sheet_ids=None):
+        """
+        Rifà il nesting dei soli fogli indicati (default: tutti i non rilasciati)
+        
+        I pezzi dei fogli indicati vengono tolti e reinseriti con best-fit sui
+        fogli aperti; i fogli rilasciati restano invariati.
+        
+        Args:
+            sheet_ids: Id dei fogli da rielaborare
+        
+        Returns:
+            int: Variazione del numero di fogli (negativo = fogli risparmiati)
+        """
+        before = len(self.sheets)
+        targets = [
+            s for s in self.sheets
+            if s['id'] not in self.released and (sheet_ids is None or s['id'] in sheet_ids)
+        ]
+        
+        pieces = []
+        for sheet in targets:
+            pieces.extend(self.table.rect(p.id) for p in sheet['placements'])
+            sheet['placements'] = []
+            self.optimizer._rebuild_free_space(sheet)
+        
+        pieces.sort(key=lambda r: r.width * r.height, reverse=True)
+        for rect in pieces:
+            self._place(rect)
+        
+        self.sheets = [s for s in self.sheets if s['placements'] or s['id'] in self.released]
+        return len(self.sheets) - before
+    
+    def result(self):
+        """
+        Restituisce il layout corrente nel formato di NestingOptimizer.optimize()
+        
+        Returns:
+            dict: Risultato con le stesse chiavi di optimize() (sheets,
+                statistics, parts_count, sheets_count, part_table, patterns,
+                from_cache)
+        """
+        return {
+            'sheets': self.sheets,
+            'statistics': self.optimizer._calculate_stats(self.sheets, self.table, self.allow_rotation),
+            'parts_count': self.table.total_count(),
+            'sheets_count': len(self.sheets),
+            'part_table': self.table,
+            'patterns': sheet_patterns(self.sheets),
+            'from_cache': False
+        }
+    
+    def _place(self, rect):
+        """
+        Piazza un pezzo sul miglior foglio aperto o su un nuovo foglio
+        
+        Args:
+            rect: Rectangle del tipo di parte
+        
+        Returns:
+            dict: Foglio di destinazione o None se il pezzo non entra
+        """
+        optimizer = self.optimizer
+        open_sheets = [s for s in self.sheets if s['id'] not in self.released]
+        
+        sheet, placement = optimizer._select_sheet(
+            rect, open_sheets, self.allow_rotation, self.engine, self.heuristic, 'best_fit'
+        )
+        
+        if placement is None:
+            sheet = optimizer._new_sheet(self._next_sheet_id)
+            placement, _ = optimizer._find_in_sheet(
+                rect, sheet, self.allow_rotation, self.engine, self.heuristic
+            )
+            if placement is None:
+                # Pezzo più grande dell'area utile del foglio
+                self.table.counts[rect.id] -= 1
+                return None
+            self._next_sheet_id += 1
+            self.sheets.append(sheet)
+        
+        optimizer._commit_placement(sheet, placement, self.engine)
+        return sheet
+    
+    def _matches(self, placement, part):
+        """Verifica se un piazzamento corrisponde alla parte da rimuovere"""
+        if self.table.names[placement.id] != part['name']:
+            return False
+        if 'width' in part and self.table.widths[placement.id] != part['width']:
+            return False
+        if 'height' in part and self.table.heights[placement.id] != part['height']:
+            return False
+        return True
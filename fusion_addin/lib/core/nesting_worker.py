@@ -0,0 +1,623 @@
+"""
+Worker di nesting fuori processo
+Coda locale di job con eventi di avanzamento e annullamento, avviabile anche da riga di comando
+"""
+
+import argparse
+import inspect
+import json
+import os
+import queue
+import secrets
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+
+# Try relative import first (for Fusion 360), fallback to absolute (for testing)
+try:
+    from .nesting import NestingOptimizer, PartTable, sheet_patterns, _processes_available
+    from .nesting_cache import NestingCache
+    from .visualization import NestingVisualizer
+except ImportError:
+    from nesting import NestingOptimizer, PartTable, sheet_patterns, _processes_available
+    from nesting_cache import NestingCache
+    from visualization import NestingVisualizer
+
+# Script eseguito dal processo worker (questo modulo)
+WORKER_SCRIPT = os.path.abspath(__file__)
+
+# Variabile d'ambiente con la chiave di autenticazione della connessione
+AUTHKEY_ENV = 'FURNITUREAI_NESTING_AUTHKEY'
+
+# Riga scritta su stdout dal worker quando è in ascolto: 'READY <host> <porta>'
+READY_PREFIX = 'READY'
+
+# Intervallo minimo tra due eventi 'progress' dello stesso job (secondi)
+PROGRESS_INTERVAL_S = 0.2
+
+# Attesa massima del thread di ricezione alla chiusura del client (secondi)
+RECEIVER_JOIN_TIMEOUT_S = 5.0
+
+# Eventi inviati dal worker, tutti con 'event' e 'job_id'
+WORKER_EVENTS = ('queued', 'started', 'progress', 'done', 'cancelled', 'error')
+
+
+class NestingCancelled(Exception):
+    """Job di nesting annullato durante l'esecuzione"""
+
+
+def run_job(job, progress=None, cancelled=None, cache=None):
+    """
+    Esegue un job di nesting e ne restituisce il risultato serializzabile
+    
+    Usa gli stessi passi di optimize() (NestingOptimizer._optimize_table())
+    con avanzamento e annullamento verificati a ogni pezzo consumato dal
+    motore, anche nelle modalità open-bin dove i fogli si chiudono solo
+    alla fine. Con reuse_patterns l'annullamento è verificato solo prima
+    dell'avvio.
+    
+    Args:
+        job: Dizionario con 'parts' e opzionalmente 'settings' (vedi
+            NestingOptimizer._settings()) e 'options' (di optimize())
+        progress: Funzione chiamata con le statistiche progressive
+        cancelled: Funzione senza argomenti, True se il job va interrotto
+        cache: NestingCache opzionale per riusare i risultati su disco
+    
+    Returns:
+        dict: Risultato con 'sheets' (formato compatto della cache),
+            'statistics', 'parts' (tabella usata), 'settings',
+            'parts_count', 'sheets_count' e 'from_cache'
+    
+    Raises:
+        NestingCancelled: Se cancelled() restituisce True
+    """
+    optimizer = _make_optimizer(job.get('settings'))
+    optimizer.cache = cache
+    options = _optimize_options(job.get('options') or {})
+    optimizer._validate_options(options['engine'], options['heuristic'], options['bin_mode'], options['sort_order'])
+    table = PartTable.from_parts(job['parts'])
+    
+    if cancelled is not None and cancelled():
+        raise NestingCancelled()
+    
+    parts_total = table.total_count()
+    closed = []
+    last_progress = [time.perf_counter()]
+    
+    def on_piece(placed):
+        if cancelled is not None and cancelled():
+            raise NestingCancelled()
+        now = time.perf_counter()
+        if progress is not None and now - last_progress[0] >= PROGRESS_INTERVAL_S:
+            progress({'parts_placed': placed, 'parts_total': parts_total, 'sheets_closed': len(closed)})
+            last_progress[0] = now
+    
+    sheets, table, statistics, from_cache = optimizer._optimize_table(
+        table, options, on_piece, closed.append
+    )
+    
+    return {
+        'sheets': optimizer._serialize_sheets(sheets),
+        'statistics': statistics,
+        'parts': [
+            [w, h, c, name]
+            for w, h, c, name in zip(table.widths, table.heights, table.counts, table.names)
+        ],
+        'settings': optimizer._settings(),
+        'parts_count': table.total_count(),
+        'sheets_count': len(sheets),
+        'from_cache': from_cache
+    }
+
+
+def restore_result(data):
+    """
+    Ricostruisce un risultato di run_job() nel formato di optimize()
+    
+    Args:
+        data: Risultato serializzato (es. evento 'done' del worker)
+    
+    Returns:
+        dict: Risultato con sheets, statistics, part_table e patterns
+    """
+    optimizer = _make_optimizer(data['settings'])
+    table = PartTable()
+    for w, h, c, name in data['parts']:
+        table.add(w, h, c, name)
+    
+    sheets = optimizer._restore_sheets(data['sheets'], table)
+    return {
+        'sheets': sheets,
+        'statistics': data['statistics'],
+        'parts_count': data['parts_count'],
+        'sheets_count': data['sheets_count'],
+        'part_table': table,
+        'patterns': sheet_patterns(sheets),
+        'from_cache': data.get('from_cache', False)
+    }
+
+
+def _make_optimizer(settings):
+    """NestingOptimizer con i parametri di _settings() (mancanti = default)"""
+    optimizer = NestingOptimizer()
+    merged = dict(optimizer._settings(), **(settings or {}))
+    
+    optimizer.sheet_width = merged['sheet_width']
+    optimizer.sheet_height = merged['sheet_height']
+    optimizer.blade_width = merged['blade_width']
+    optimizer.margin = merged['margin']
+    optimizer.max_stages = merged['max_stages']
+    return optimizer
+
+
+def _optimize_options(options):
+    """Opzioni complete di optimize(), con i default per quelle mancanti"""
+    parameters = inspect.signature(NestingOptimizer.optimize).parameters
+    return {
+        name: options.get(name, parameter.default)
+        for name, parameter in parameters.items()
+        if name not in ('self', 'parts')
+    }
+
+
+class NestingWorker:
+    """
+    Processo worker: esegue in ordine i job ricevuti su una connessione locale
+    
+    Il thread principale riceve i comandi ('submit', 'cancel', 'shutdown'),
+    un thread di esecuzione consuma la coda dei job. Entrambi inviano
+    eventi sulla stessa connessione (vedi WORKER_EVENTS).
+    """
+    
+    def __init__(self, host='127.0.0.1', port=0, authkey=None, cache=None):
+        """
+        Inizializza il worker
+        
+        Args:
+            host: Indirizzo di ascolto (solo locale)
+            port: Porta di ascolto (0 = scelta dal sistema)
+            authkey: Chiave di autenticazione della connessione (bytes)
+            cache: NestingCache opzionale condivisa dai job
+        """
+        self.address = (host, port)
+        self.authkey = authkey
+        self.cache = cache
+        self.jobs = queue.Queue()
+        self.cancelled = set()
+        self._closing = False
+        self._conn = None
+        self._send_lock = threading.Lock()
+    
+    def serve(self, ready=None):
+        """
+        Attende il client e gestisce i comandi fino a 'shutdown' o disconnessione
+        
+        Alla chiusura il job in corso e quelli in coda vengono annullati.
+        
+        Args:
+            ready: Funzione chiamata con l'indirizzo (host, porta) in ascolto
+        """
+        with Listener(self.address, authkey=self.authkey) as listener:
+            if ready is not None:
+                ready(listener.address)
+            
+            with listener.accept() as conn:
+                self._conn = conn
+                runner = threading.Thread(target=self._run_jobs, daemon=True)
+                runner.start()
+                
+                try:
+                    while True:
+                        message = conn.recv()
+                        op = message.get('op')
+                        if op == 'submit':
+                            job = message['job']
+                            self.jobs.put(job)
+                            self._send({'event': 'queued', 'job_id': job['id'], 'position': self.jobs.qsize()})
+                        elif op == 'cancel':
+                            self.cancelled.add(message['job_id'])
+                        elif op == 'shutdown':
+                            break
+                except (EOFError, OSError):
+                    pass
+                finally:
+                    self._closing = True
+                    self.jobs.put(None)
+                    runner.join()
+    
+    def _run_jobs(self):
+        """Esegue i job in coda uno alla volta (thread di esecuzione)"""
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            
+            job_id = job['id']
+            
+            def is_cancelled():
+                return self._closing or job_id in self.cancelled
+            
+            def report(statistics):
+                self._send({'event': 'progress', 'job_id': job_id, 'statistics': statistics})
+            
+            if is_cancelled():
+                self._send({'event': 'cancelled', 'job_id': job_id})
+                self.cancelled.discard(job_id)
+                continue
+            
+            self._send({'event': 'started', 'job_id': job_id})
+            start = time.perf_counter()
+            try:
+                result = run_job(job, report, is_cancelled, self.cache)
+            except NestingCancelled:
+                self._send({'event': 'cancelled', 'job_id': job_id})
+            except Exception as e:
+                self._send({'event': 'error', 'job_id': job_id, 'message': str(e)})
+            else:
+                self._send({
+                    'event': 'done',
+                    'job_id': job_id,
+                    'result': result,
+                    'elapsed_s': round(time.perf_counter() - start, 4)
+                })
+            finally:
+                self.cancelled.discard(job_id)
+    
+    def _send(self, event):
+        """Invia un evento al client (ignorato se la connessione è chiusa)"""
+        with self._send_lock:
+            try:
+                self._conn.send(event)
+            except (OSError, ValueError):
+                pass
+
+
+class NestingWorkerClient:
+    """
+    Client del worker di nesting: avvia il processo su richiesta
+    
+    on_event viene chiamata dal thread di ricezione con ogni evento del
+    worker: in Fusion deve solo accodarlo e notificare il thread UI con un
+    custom event, senza toccare l'interfaccia.
+    """
+    
+    def __init__(self, on_event=None, python=None, cache_dir=None, startup_timeout_s=10.0):
+        """
+        Inizializza il client (il worker parte al primo submit())
+        
+        Args:
+            on_event: Funzione chiamata con ogni evento del worker
+            python: Interprete per il worker (default: vedi python_executable())
+            cache_dir: Directory della NestingCache del worker (None = senza cache)
+            startup_timeout_s: Attesa massima dell'avvio del worker (secondi)
+        """
+        self.on_event = on_event
+        self.python = python
+        self.cache_dir = cache_dir
+        self.startup_timeout_s = startup_timeout_s
+        
+        self._process = None
+        self._conn = None
+        self._receiver = None
+        self._closing = False
+        self._ready = queue.Queue()
+        self._send_lock = threading.Lock()
+        self._next_job_id = 0
+    
+    @property
+    def running(self):
+        """True se il processo worker è attivo e connesso"""
+        return self._conn is not None and self._process is not None and self._process.poll() is None
+    
+    def python_executable(self):
+        """
+        Interprete Python con cui avviare il worker
+        
+        Nel Python integrato in Fusion sys.executable è Fusion stesso: si
+        cerca un interprete di sistema nel PATH.
+        
+        Returns:
+            str: Path dell'interprete o None se non trovato
+        """
+        if self.python:
+            return self.python
+        if _processes_available():
+            return sys.executable
+        return shutil.which('python3') or shutil.which('python')
+    
+    def start(self):
+        """
+        Avvia il worker e si connette, se non è già attivo
+        
+        Returns:
+            bool: True se il worker è disponibile
+        """
+        if self.running:
+            return True
+        
+        # Connessione o processo rimasti da un worker terminato
+        if self._conn is not None or self._process is not None:
+            self._terminate()
+        self._closing = False
+        
+        python = self.python_executable()
+        if python is None:
+            print("⚠️ Interprete Python non trovato: worker nesting non disponibile")
+            return False
+        
+        authkey = secrets.token_hex(16)
+        self._ready = queue.Queue()
+        env = dict(os.environ)
+        env[AUTHKEY_ENV] = authkey
+        # Le variabili dell'interprete integrato non valgono per quello esterno
+        env.pop('PYTHONHOME', None)
+        env.pop('PYTHONPATH', None)
+        
+        command = [python, WORKER_SCRIPT, 'serve']
+        if self.cache_dir:
+            command += ['--cache-dir', self.cache_dir]
+        
+        try:
+            self._process = subprocess.Popen(
+                command,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                env=env,
+                text=True,
+                encoding='utf-8',
+                creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+            )
+            threading.Thread(target=self._read_output, args=(self._process,), daemon=True).start()
+            
+            host, port = self._ready.get(timeout=self.startup_timeout_s)
+            self._conn = Client((host, port), authkey=authkey.encode('ascii'))
+        except (OSError, ValueError, EOFError, queue.Empty) as e:
+            print(f"⚠️ Avvio worker nesting non riuscito: {e or 'timeout'}")
+            self._terminate()
+            return False
+        
+        self._receiver = threading.Thread(target=self._receive, args=(self._conn,), daemon=True)
+        self._receiver.start()
+        return True
+    
+    def submit(self, parts, optimizer=None, **options):
+        """
+        Accoda un job di nesting, avviando il worker se necessario
+        
+        Args:
+            parts: Lista di dizionari con 'width', 'height', 'quantity', 'name'
+            optimizer: NestingOptimizer da cui copiare foglio e lama
+            **options: Opzioni di optimize()
+        
+        Returns:
+            int: Id del job (presente in tutti i suoi eventi)
+        
+        Raises:
+            RuntimeError: Se il worker non può essere avviato
+        """
+        if not self.start():
+            raise RuntimeError("Worker nesting non disponibile")
+        
+        self._next_job_id += 1
+        job = {
+            'id': self._next_job_id,
+            'parts': [dict(part) for part in parts],
+            'settings': (optimizer or NestingOptimizer())._settings(),
+            'options': options
+        }
+        self._send({'op': 'submit', 'job': job})
+        return job['id']
+    
+    def cancel(self, job_id):
+        """
+        Annulla un job in coda o in esecuzione (evento 'cancelled')
+        
+        Args:
+            job_id: Id restituito da submit()
+        """
+        if self._conn is not None:
+            self._send({'op': 'cancel', 'job_id': job_id})
+    
+    def stop(self, timeout_s=5.0):
+        """
+        Chiude il worker annullando i job in corso
+        
+        Args:
+            timeout_s: Attesa massima della chiusura prima di terminarlo
+        """
+        if self._conn is not None:
+            self._send({'op': 'shutdown'})
+        
+        if self._process is not None:
+            try:
+                self._process.wait(timeout_s)
+            except subprocess.TimeoutExpired:
+                pass
+        self._terminate()
+    
+    def _send(self, message):
+        """Invia un comando al worker"""
+        with self._send_lock:
+            try:
+                self._conn.send(message)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Worker nesting non raggiungibile: {e}")
+    
+    def _read_output(self, process):
+        """Legge l'indirizzo di ascolto e inoltra il resto dell'output del worker"""
+        for line in process.stdout:
+            line = line.rstrip('\n')
+            if line.startswith(READY_PREFIX + ' '):
+                _, host, port = line.split()
+                self._ready.put((host, int(port)))
+            elif line:
+                print(f"[nesting worker] {line}")
+    
+    def _receive(self, conn):
+        """Riceve gli eventi del worker (thread di ricezione)"""
+        while True:
+            try:
+                event = conn.recv()
+            except (EOFError, OSError):
+                return
+            except Exception as e:
+                # Dopo _terminate() qualsiasi errore è la chiusura della connessione
+                if not self._closing:
+                    print(f"⚠️ Connessione worker nesting interrotta: {e}")
+                return
+            if self.on_event is not None:
+                try:
+                    self.on_event(event)
+                except Exception as e:
+                    print(f"⚠️ Errore gestione evento nesting: {e}")
+    
+    def _terminate(self):
+        """
+        Chiude processo e connessione
+        
+        Il processo viene chiuso per primo: la sua uscita sblocca il thread
+        di ricezione, che viene atteso prima di chiudere la connessione.
+        """
+        self._closing = True
+        
+        if self._process is not None:
+            if self._process.poll() is None:
+                self._process.kill()
+                self._process.wait()
+            self._process = None
+        
+        receiver = self._receiver
+        if receiver is not None and receiver is not threading.current_thread():
+            receiver.join(RECEIVER_JOIN_TIMEOUT_S)
+        self._receiver = None
+        
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except OSError:
+                pass
+            self._conn = None
+
+
+def run_batch(jobs, output_dir, cache=None, compact=False):
+    """
+    Esegue una serie di job scrivendo risultati, SVG e istruzioni di taglio
+    
+    Per ogni job vengono scritti '<nome>.json' (risultato di run_job()),
+    '<nome>.svg', '<nome>.dxf' e '<nome>_tagli.txt' nella directory di
+    output.
+    
+    Args:
+        jobs: Lista di job (vedi run_job()), con 'name' opzionale
+        output_dir: Directory di output
+        cache: NestingCache opzionale
+        compact: Un solo disegno per ogni schema di taglio ripetuto
+    
+    Returns:
+        list: Riepilogo per job con 'name', 'sheets_count', 'efficiency_percent'
+            oppure 'error'
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    visualizer = NestingVisualizer()
+    summary = []
+    
+    for index, job in enumerate(jobs, 1):
+        name = job.get('name') or f"job_{index}"
+        print(f"⏳ [{index}/{len(jobs)}] {name}")
+        
+        def report(statistics):
+            print(f"   {statistics['parts_placed']}/{statistics['parts_total']} pezzi, "
+                  f"{statistics['sheets_closed']} pannelli")
+        
+        start = time.perf_counter()
+        try:
+            data = run_job(job, report, cache=cache)
+        except Exception as e:
+            print(f"❌ {name}: {e}")
+            summary.append({'name': name, 'error': str(e)})
+            continue
+        
+        base = os.path.join(output_dir, name)
+        with open(base + '.json', 'w', encoding='utf-8') as f:
+            json.dump(dict(data, name=name), f, separators=(',', ':'))
+        
+        result = restore_result(data)
+        settings = data['settings']
+        visualizer.sheet_width = settings['sheet_width']
+        visualizer.sheet_height = settings['sheet_height']
+        visualizer.create_svg(result, base + '.svg', compact=compact)
+        visualizer.create_dxf(result, base + '.dxf', compact=compact)
+        visualizer.export_cut_instructions(result, base + '_tagli.txt', compact=compact)
+        
+        efficiency = data['statistics']['efficiency_percent']
+        print(f"✅ {name}: {data['sheets_count']} pannelli, efficienza {efficiency}% "
+              f"({time.perf_counter() - start:.1f} s)")
+        summary.append({'name': name, 'sheets_count': data['sheets_count'], 'efficiency_percent': efficiency})
+    
+    return summary
+
+
+def main(argv=None):
+    """
+    Riga di comando del worker
+    
+    'serve' avvia il worker per il client dell'add-in (chiave in
+    AUTHKEY_ENV); 'batch' esegue un file JSON di job senza Fusion, ad
+    esempio per i lotti notturni.
+    
+    Args:
+        argv: Argomenti (default: sys.argv[1:])
+    
+    Returns:
+        int: Codice di uscita
+    """
+    parser = argparse.ArgumentParser(description="Worker di nesting FurnitureAI")
+    parser.add_argument('--cache-dir', help="Directory della cache dei risultati")
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    serve = commands.add_parser('serve', help="Attende i job dell'add-in su una connessione locale")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=0)
+    
+    batch = commands.add_parser('batch', help="Esegue un file JSON di job")
+    batch.add_argument('jobs_file', help="Lista di job oppure {'jobs': [...]}")
+    batch.add_argument('--output-dir', default='nesting_output')
+    batch.add_argument('--compact', action='store_true', help="Un disegno per schema ripetuto")
+    
+    args = parser.parse_args(argv)
+    cache = NestingCache(args.cache_dir) if args.cache_dir else None
+    
+    if args.command == 'serve':
+        authkey = os.environ.get(AUTHKEY_ENV)
+        if not authkey:
+            print(f"❌ Chiave di autenticazione mancante ({AUTHKEY_ENV})")
+            return 2
+        
+        def ready(address):
+            print(f"{READY_PREFIX} {address[0]} {address[1]}", flush=True)
+        
+        NestingWorker(args.host, args.port, authkey.encode('ascii'), cache).serve(ready)
+        return 0
+    
+    try:
+        with open(args.jobs_file, 'r', encoding='utf-8') as f:
+            jobs = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"❌ Errore lettura job: {e}")
+        return 2
+    if isinstance(jobs, dict):
+        jobs = jobs.get('jobs', [jobs])
+    
+    try:
+        summary = run_batch(jobs, args.output_dir, cache, args.compact)
+    except KeyboardInterrupt:
+        print("⚠️ Lotto annullato")
+        return 130
+    return 1 if any('error' in item for item in summary) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
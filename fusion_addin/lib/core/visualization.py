@@ -3,72 +3,356 @@ Visualizzatore di nesting per preview layout pannelli
 Genera rappresentazioni grafiche del layout ottimizzato
 """
 
+import hashlib
+import itertools
 import math
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+from xml.sax.saxutils import escape
+
+# Try relative import first (for Fusion 360), fallback to absolute (for testing)
+try:
+    from .cut_tree import cut_sequence, iter_nodes
+    from .nesting import NestingOptimizer, sheet_patterns
+except ImportError:
+    from cut_tree import cut_sequence, iter_nodes
+    from nesting import NestingOptimizer, sheet_patterns
+
+# Segnaposto a larghezza fissa per larghezza e altezza SVG, corretti a fine scrittura
+SVG_SIZE_PLACEHOLDER = '0000000000'
+
+# Buffer di scrittura dei file SVG (byte): i frammenti dei fogli sono piccoli
+SVG_BUFFER_SIZE = 256 * 1024
+
+# DXF R12 ASCII: codifica dei testi, buffer di scrittura (byte) e distanza
+# tra i pannelli impilati nel disegno (mm)
+DXF_ENCODING = 'cp1252'
+DXF_BUFFER_SIZE = 256 * 1024
+DXF_SHEET_GAP = 300
+
+# Colori ACI delle entità DXF
+DXF_COLORS = {'sheet': 7, 'part': 3, 'part-rotated': 5, 'kerf': 1, 'label': 7}
+
+# Frammenti renderizzati tenuti in cache (SVG, report e istruzioni per foglio)
+FRAGMENT_CACHE_SIZE = 2048
 
 class NestingVisualizer:
     """Visualizzatore di layout nesting"""
     
-    def __init__(self, sheet_width=2800, sheet_height=2070):
+    def __init__(self, sheet_width=2800, sheet_height=2070, fragment_cache_size=FRAGMENT_CACHE_SIZE):
         """
         Inizializza il visualizzatore
         
         Args:
             sheet_width: Larghezza pannello (mm)
             sheet_height: Altezza pannello (mm)
+            fragment_cache_size: Frammenti per foglio tenuti in cache tra
+                un export e l'altro (0 = nessuna cache, vedi _fragment())
         """
         self.sheet_width = sheet_width
         self.sheet_height = sheet_height
+        self.fragment_cache_size = fragment_cache_size
+        self._fragments = OrderedDict()
+        self.fragment_hits = 0
+        self.fragment_misses = 0
     
-    def create_svg(self, nesting_result, output_path):
+    def create_svg(self, nesting_result, output_path, draft=False, compact=False):
         """
         Crea un file SVG con la visualizzazione del nesting
         
         Args:
-            nesting_result: Risultato da NestingOptimizer.optimize()
+            nesting_result: Risultato da NestingOptimizer.optimize() oppure
+                stream da NestingOptimizer.optimize_iter()
             output_path: Path del file SVG di output
+            draft: Marca il disegno come bozza (vedi create_draft_svg())
+            compact: Disegna una sola volta i pannelli con layout identico,
+                con la quantità nell'etichetta (vedi _iter_layouts())
         
         Returns:
             bool: Successo operazione
         """
         try:
-            scale = 0.2  # Scala per visualizzazione (mm to px)
-            margin = 50  # Margine SVG
-            
-            sheets = nesting_result['sheets']
+            self._write_svg(output_path, self._iter_layouts(nesting_result, compact), draft)
+            return True
+        except Exception as e:
+            print(f"❌ Errore creazione SVG: {e}")
+            return False
+    
+    def create_svg_pages(self, nesting_result, output_path, sheets_per_page=1, draft=False, compact=False):
+        """
+        Crea un file SVG ogni sheets_per_page pannelli
+        
+        Per i lavori con centinaia di fogli, che in un solo SVG diventano
+        troppo pesanti per il browser. I file sono output_path con suffisso
+        di pagina ('taglio.svg' -> 'taglio_001.svg', 'taglio_002.svg', ...)
+        e ogni pagina viene scritta appena i suoi fogli sono disponibili.
+        
+        Args:
+            nesting_result: Risultato completo o stream (vedi create_svg())
+            output_path: Path base dei file SVG
+            sheets_per_page: Pannelli (o schemi, con compact) per file
+            draft: Marca i disegni come bozza
+            compact: Un solo disegno per layout ripetuto
+        
+        Returns:
+            list: Path dei file scritti, None in caso di errore
+        
+        Raises:
+            ValueError: Se sheets_per_page non è positivo
+        """
+        if sheets_per_page < 1:
+            raise ValueError(f"Pannelli per pagina non validi: {sheets_per_page}")
+        
+        root, ext = os.path.splitext(output_path)
+        layouts = iter(self._iter_layouts(nesting_result, compact))
+        paths = []
+        try:
+            for page in itertools.count(1):
+                first = next(layouts, None)
+                if first is None:
+                    break
+                path = f"{root}_{page:03d}{ext or '.svg'}"
+                page_layouts = itertools.chain([first], itertools.islice(layouts, sheets_per_page - 1))
+                self._write_svg(path, page_layouts, draft)
+                paths.append(path)
+            return paths
+        except Exception as e:
+            print(f"❌ Errore creazione SVG: {e}")
+            return None
+    
+    def _write_svg(self, output_path, layouts, draft=False):
+        """
+        Scrive un file SVG foglio per foglio
+        
+        I frammenti di ogni foglio vanno direttamente nel file bufferizzato;
+        le sagome dei pezzi sono definite una volta per file come <symbol>
+        e ripetute con <use>.
+        
+        Args:
+            output_path: Path del file SVG
+            layouts: Iterabile di (sheet, quantità, id) (vedi _iter_layouts())
+            draft: Marca il disegno come bozza
+        """
+        scale = 0.2  # Scala per visualizzazione (mm to px)
+        margin = 50  # Margine SVG
+        
+        with open(output_path, 'w', encoding='utf-8', buffering=SVG_BUFFER_SIZE) as f:
+            # Le dimensioni dipendono dai fogli (numero e formati), noti
+            # solo a fine stream: si scrivono segnaposti a larghezza fissa
+            header = self._generate_svg_header(SVG_SIZE_PLACEHOLDER, SVG_SIZE_PLACEHOLDER)
+            width_at = header.index(SVG_SIZE_PLACEHOLDER)
+            height_at = header.index(SVG_SIZE_PLACEHOLDER, width_at + 1)
             
-            # Calcola dimensioni totali SVG
-            svg_width = int(self.sheet_width * scale + 2 * margin)
-            svg_height = int((self.sheet_height * scale + margin) * len(sheets) + margin)
+            f.write(header[:width_at])
+            width_pos = f.tell()
+            f.write(header[width_at:height_at])
+            height_pos = f.tell()
+            f.write(header[height_at:])
             
-            # Genera SVG
-            svg_content = self._generate_svg_header(svg_width, svg_height)
+            if draft:
+                f.write(f'<text class="label" x="{margin}" y="{margin / 2}">'
+                        f'BOZZA - ottimizzazione in corso</text>\n')
             
-            # Aggiungi ogni foglio
+            # Scrivi ogni foglio appena disponibile
+            defined = set()
             y_offset = margin
-            for sheet in sheets:
-                svg_content += self._generate_sheet_svg(
-                    sheet,
-                    margin,
-                    y_offset,
-                    scale
-                )
-                y_offset += self.sheet_height * scale + margin
+            max_width = 0
+            for sheet, count, _ in layouts:
+                f.writelines(self._sheet_svg_fragments(sheet, margin, y_offset, scale, count, defined))
+                sheet_width, sheet_height = self._sheet_size(sheet)
+                y_offset += sheet_height * scale + margin
+                max_width = max(max_width, sheet_width)
             
-            svg_content += '</svg>'
+            f.write('</svg>')
             
-            # Salva file
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(svg_content)
+            svg_width = int((max_width or self.sheet_width) * scale + 2 * margin)
+            svg_height = int(y_offset)
+            f.seek(width_pos)
+            f.write(str(svg_width).zfill(len(SVG_SIZE_PLACEHOLDER)))
+            f.seek(height_pos)
+            f.write(str(svg_height).zfill(len(SVG_SIZE_PLACEHOLDER)))
+    
+    def create_dxf(self, nesting_result, output_path, compact=False):
+        """
+        Crea un file DXF (R12 ASCII) del nesting per CNC e sezionatrici
+        
+        Ogni pannello è un layer 'PANNELLO_001', 'PANNELLO_002', ... con
+        bordo del pannello, contorni dei pezzi (polilinee chiuse), etichette
+        e linee di taglio (asse della lama, solo con l'albero di taglio). Le
+        coordinate sono quelle del nesting in mm; i pannelli sono impilati
+        lungo Y a distanza DXF_SHEET_GAP. Le entità sono scritte foglio per
+        foglio in un file temporaneo, perché la tabella dei layer va scritta
+        prima e i fogli di uno stream non sono noti in anticipo.
+        
+        Args:
+            nesting_result: Risultato da NestingOptimizer.optimize() oppure
+                stream da NestingOptimizer.optimize_iter()
+            output_path: Path del file DXF di output
+            compact: Un solo layer per layout ripetuto (vedi _iter_layouts())
+        
+        Returns:
+            bool: Successo operazione
+        """
+        try:
+            layers = []
+            with tempfile.TemporaryFile('w+', encoding=DXF_ENCODING, errors='replace',
+                                        newline='', buffering=DXF_BUFFER_SIZE) as entities:
+                origin_y = 0
+                for sheet, count, _ in self._iter_layouts(nesting_result, compact):
+                    layer = f"PANNELLO_{sheet['id'] + 1:03d}"
+                    layers.append(layer)
+                    entities.write(self._dxf_sheet(sheet, count, layer, origin_y))
+                    origin_y += self._sheet_size(sheet)[1] + DXF_SHEET_GAP
+                
+                entities.seek(0)
+                with open(output_path, 'w', encoding=DXF_ENCODING, errors='replace',
+                          newline='\r\n', buffering=DXF_BUFFER_SIZE) as f:
+                    f.write(_dxf_header(layers))
+                    shutil.copyfileobj(entities, f, DXF_BUFFER_SIZE)
+                    f.write('0\nENDSEC\n0\nEOF\n')
             
             return True
         except Exception as e:
-            print(f"❌ Errore creazione SVG: {e}")
+            print(f"❌ Errore creazione DXF: {e}")
             return False
     
+    def _dxf_sheet(self, sheet, count, layer, origin_y):
+        """
+        Entità DXF di un pannello, in un'unica stringa
+        
+        Args:
+            sheet: Dizionario sheet dal nesting
+            count: Numero di pannelli con questo layout
+            layer: Nome del layer del pannello
+            origin_y: Y dell'angolo del pannello nel disegno (mm)
+        
+        Returns:
+            str: Coppie codice/valore delle entità
+        """
+        sheet_width, sheet_height = self._sheet_size(sheet)
+        out = []
+        
+        # Bordo pannello e titolo sopra il pannello
+        out.append(_dxf_polyline(layer, DXF_COLORS['sheet'], [
+            (0, origin_y), (sheet_width, origin_y),
+            (sheet_width, origin_y + sheet_height), (0, origin_y + sheet_height)
+        ]))
+        title = f'Pannello {sheet["id"] + 1}'
+        if 'stock' in sheet:
+            title += f' - {sheet["stock"]}'
+        if count > 1:
+            title += f' × {count}'
+        out.append(_dxf_text(layer, DXF_COLORS['label'], 0, origin_y + sheet_height + DXF_SHEET_GAP / 4,
+                             DXF_SHEET_GAP / 4, title, centered=False))
+        
+        # Pezzi: contorno ed etichetta centrata
+        for placement in sheet['placements']:
+            part_class = 'part-rotated' if placement.rotated else 'part'
+            x, y = placement.x, origin_y + placement.y
+            w, h = placement.width, placement.height
+            
+            outline = getattr(placement, 'outline', None)
+            if outline:
+                points = [(px, origin_y + py) for px, py in outline]
+            else:
+                points = [(x, y), (x + w, y), (x + w, y + h), (x, y + h)]
+            out.append(_dxf_polyline(layer, DXF_COLORS[part_class], points))
+            
+            label = f'{placement.name} {int(w)}x{int(h)}'
+            height = max(min(30, h / 4, w / (0.8 * len(label))), 1)
+            out.append(_dxf_text(layer, DXF_COLORS['label'], x + w / 2, y + h / 2, height, label))
+        
+        # Linee di taglio sull'asse della lama
+        if sheet.get('cut_tree') is not None:
+            for cut in cut_sequence(sheet['cut_tree']):
+                axis = cut['position'] + cut['kerf'] / 2
+                start, end = cut['start'], cut['start'] + cut['length']
+                if cut['kind'] == 'rip':
+                    out.append(_dxf_line(layer, DXF_COLORS['kerf'], start, origin_y + axis, end, origin_y + axis))
+                else:
+                    out.append(_dxf_line(layer, DXF_COLORS['kerf'], axis, origin_y + start, axis, origin_y + end))
+        
+        return ''.join(out)
+    
+    def create_draft_svg(self, parts, output_path, optimizer=None, allow_rotation=True):
+        """
+        Anteprima istantanea del layout mentre l'ottimizzazione completa è in corso
+        
+        Usa il motore 'skyline' in modalità 'single' (pochi millisecondi
+        anche per centinaia di pezzi); il risultato non è quello definitivo
+        ed è marcato come bozza.
+        
+        Args:
+            parts: Lista di dizionari con 'width', 'height', 'quantity', 'name'
+            output_path: Path del file SVG di output
+            optimizer: NestingOptimizer da cui copiare lama e margine
+            allow_rotation: Permetti rotazione pezzi di 90°
+        
+        Returns:
+            bool: Successo operazione
+        """
+        draft = NestingOptimizer(self.sheet_width, self.sheet_height)
+        if optimizer is not None:
+            draft.blade_width = optimizer.blade_width
+            draft.margin = optimizer.margin
+        
+        result = draft.optimize(parts, allow_rotation, engine='skyline', bin_mode='single')
+        return self.create_svg(result, output_path, draft=True)
+    
+    def _sheet_size(self, sheet):
+        """Formato di un foglio (width/height del foglio o formato standard)"""
+        return sheet.get('width', self.sheet_width), sheet.get('height', self.sheet_height)
+    
+    def _iter_sheets(self, nesting_result):
+        """
+        Itera i fogli di un risultato completo o di uno stream
+        
+        Args:
+            nesting_result: Dizionario di optimize() oppure iterabile di
+                elementi di optimize_iter() (o di sheet)
+        
+        Yields:
+            dict: Sheet
+        """
+        if isinstance(nesting_result, dict):
+            yield from nesting_result['sheets']
+            return
+        
+        for item in nesting_result:
+            yield item['sheet'] if 'sheet' in item else item
+    
+    def _iter_layouts(self, nesting_result, compact):
+        """
+        Itera i pannelli da rappresentare con la relativa quantità
+        
+        In modalità compatta i pannelli con layout identico diventano un
+        solo schema; uno stream viene consumato per intero prima di
+        restituire il primo schema.
+        
+        Args:
+            nesting_result: Risultato completo o stream (vedi _iter_sheets())
+            compact: Un solo elemento per ogni schema di taglio ripetuto
+        
+        Yields:
+            tuple: (sheet, quantità, id dei pannelli dello schema)
+        """
+        if not compact:
+            for sheet in self._iter_sheets(nesting_result):
+                yield sheet, 1, [sheet['id']]
+            return
+        
+        patterns = nesting_result.get('patterns') if isinstance(nesting_result, dict) else None
+        if patterns is None:
+            patterns = sheet_patterns(self._iter_sheets(nesting_result))
+        for pattern in patterns:
+            yield pattern['sheet'], pattern['count'], pattern['sheet_ids']
+    
     def _generate_svg_header(self, width, height):
         """Genera header SVG"""
         return f'''<?xml version="1.0" encoding="UTF-8"?>
-<svg width="{width}" height="{height}" xmlns="http://www.w3.org/2000/svg">
+<svg width="{width}" height="{height}" xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">
 <defs>
     <style>
         .sheet {{ fill: #f0f0f0; stroke: #333; stroke-width: 2; }}
@@ -79,64 +363,172 @@ class NestingVisualizer:
     </style>
 </defs>
 '''
+
+    def clear_cache(self):
+        """Svuota la cache dei frammenti renderizzati"""
+        self._fragments.clear()
+        self.fragment_hits = 0
+        self.fragment_misses = 0
+    
+    def _fragment(self, kind, content, render):
+        """
+        Frammento renderizzato di un foglio, dalla cache se il contenuto non è cambiato
+        
+        La chiave è l'hash del contenuto che il frammento rappresenta
+        (non l'id né la posizione del foglio), quindi dopo una piccola
+        modifica si renderizzano di nuovo solo i fogli cambiati.
+        
+        Args:
+            kind: Tipo di frammento ('svg', 'report', 'cut')
+            content: Tupla con tutto ciò da cui dipende il frammento
+            render: Funzione senza argomenti che produce il frammento
+        
+        Returns:
+            Frammento (stringa o tupla di stringhe)
+        """
+        key = hashlib.sha1(repr((kind, content)).encode('utf-8')).hexdigest()
+        fragment = self._fragments.get(key)
+        if fragment is not None:
+            self._fragments.move_to_end(key)
+            self.fragment_hits += 1
+            return fragment
+        
+        self.fragment_misses += 1
+        fragment = render()
+        if self.fragment_cache_size > 0:
+            self._fragments[key] = fragment
+            while len(self._fragments) > self.fragment_cache_size:
+                self._fragments.popitem(last=False)
+        return fragment
+    
+    def _placements_content(self, sheet, names=True):
+        """Contenuto dei pezzi di un foglio per la chiave dei frammenti, in ordine di disegno"""
+        return tuple(
+            (p.x, p.y, p.width, p.height, p.rotated, p.name if names else None, getattr(p, 'outline', None))
+            for p in sheet['placements']
+        )
     
-    def _generate_sheet_svg(self, sheet, x_offset, y_offset, scale):
+    def _generate_sheet_svg(self, sheet, x_offset, y_offset, scale, count=1):
         """
-        Genera SVG per un singolo foglio
+        Genera SVG per un singolo foglio, autonomo (simboli inclusi)
         
         Args:
             sheet: Dizionario sheet dal nesting
             x_offset: Offset X (px)
             y_offset: Offset Y (px)
             scale: Scala mm to px
+            count: Numero di pannelli con questo layout
         
         Returns:
             str: Contenuto SVG
         """
-        svg = f'<g id="sheet_{sheet["id"]}">\n'
+        return ''.join(self._sheet_svg_fragments(sheet, x_offset, y_offset, scale, count, set()))
+    
+    def _sheet_svg_fragments(self, sheet, x_offset, y_offset, scale, count, defined):
+        """
+        Frammenti SVG di un singolo foglio, da scrivere in sequenza
+        
+        Il foglio è un gruppo traslato in posizione: il contenuto (foglio e
+        pezzi) non dipende dalla posizione né dall'id ed è preso dalla cache
+        dei frammenti; etichetta e simboli mancanti nel file sono aggiunti
+        a ogni scrittura.
+        
+        Args:
+            sheet: Dizionario sheet dal nesting
+            x_offset: Offset X (px)
+            y_offset: Offset Y (px)
+            scale: Scala mm to px
+            count: Numero di pannelli con questo layout
+            defined: Id dei simboli già definiti nel file; aggiornato
+        
+        Yields:
+            str: Frammenti SVG
+        """
+        sheet_width, sheet_height = self._sheet_size(sheet)
+        symbols, body = self._fragment(
+            'svg',
+            (sheet_width, sheet_height, scale, self._placements_content(sheet, names=False)),
+            lambda: self._render_sheet_svg(sheet, sheet_width, sheet_height, scale)
+        )
         
-        # Rettangolo foglio
-        svg += f'  <rect class="sheet" x="{x_offset}" y="{y_offset}" '
-        svg += f'width="{self.sheet_width * scale}" height="{self.sheet_height * scale}" />\n'
+        yield f'<g id="sheet_{sheet["id"]}" transform="translate({x_offset},{y_offset})">\n'
         
         # Label foglio
-        svg += f'  <text class="label" x="{x_offset + 10}" y="{y_offset + 20}">'
-        svg += f'Pannello {sheet["id"] + 1}</text>\n'
+        label = f'Pannello {sheet["id"] + 1}'
+        if 'stock' in sheet:
+            label += f' - {sheet["stock"]}'
+        if count > 1:
+            label += f' × {count}'
+        
+        # Simboli usati dal foglio e non ancora definiti nel file
+        for symbol_id, definition in symbols:
+            if symbol_id not in defined:
+                defined.add(symbol_id)
+                yield definition
+        
+        yield body
+        yield f'  <text class="label" x="10" y="20">{escape(label)}</text>\n'
+        yield '</g>\n'
+    
+    def _render_sheet_svg(self, sheet, sheet_width, sheet_height, scale):
+        """
+        Renderizza foglio e pezzi con origine nell'angolo del foglio
+        
+        Ogni sagoma di pezzo (forma, misure e rotazione, con la quota) è un
+        <symbol> con id derivato dalla sagoma, richiamato con <use>.
+        
+        Returns:
+            tuple: (simboli usati come tuple (id, definizione), corpo SVG)
+        """
+        symbols = {}
+        body = [f'  <rect class="sheet" x="0" y="0" width="{sheet_width * scale}" height="{sheet_height * scale}" />\n']
         
         # Parti piazzate
         for placement in sheet['placements']:
             part_class = 'part-rotated' if placement.rotated else 'part'
-            
-            x = x_offset + placement.x * scale
-            y = y_offset + placement.y * scale
             w = placement.width * scale
             h = placement.height * scale
             
-            # Rettangolo parte
-            svg += f'  <rect class="{part_class}" x="{x}" y="{y}" '
-            svg += f'width="{w}" height="{h}" />\n'
-            
-            # Dimensioni
-            dim_text = f'{int(placement.width)}x{int(placement.height)}'
-            if placement.rotated:
-                dim_text += ' ↻'
+            # Parte sagomata (PolygonNestingOptimizer): contorno relativo al pezzo
+            outline = getattr(placement, 'outline', None)
+            points = None
+            if outline:
+                points = ' '.join(
+                    f'{(px - placement.x) * scale},{(py - placement.y) * scale}' for px, py in outline
+                )
             
-            # Centra il testo
-            text_x = x + w / 2
-            text_y = y + h / 2
+            shape = (part_class, w, h, points)
+            symbol_id = 'part_' + hashlib.sha1(repr(shape).encode('utf-8')).hexdigest()[:12]
+            if symbol_id not in symbols:
+                symbols[symbol_id] = self._part_symbol(symbol_id, placement, part_class, w, h, points)
             
-            svg += f'  <text class="text" x="{text_x}" y="{text_y}" '
-            svg += f'text-anchor="middle" dominant-baseline="middle">{dim_text}</text>\n'
+            body.append(f'  <use xlink:href="#{symbol_id}" x="{placement.x * scale}" y="{placement.y * scale}" />\n')
+        
+        return tuple(symbols.items()), ''.join(body)
+    
+    def _part_symbol(self, symbol_id, placement, part_class, w, h, points):
+        """Definizione <symbol> di una sagoma di pezzo con la sua quota"""
+        if points:
+            shape = f'<polygon class="{part_class}" points="{points}" />'
+        else:
+            shape = f'<rect class="{part_class}" width="{w}" height="{h}" />'
         
-        svg += '</g>\n'
-        return svg
+        # Dimensioni, centrate nel pezzo
+        dim_text = f'{int(placement.width)}x{int(placement.height)}'
+        if placement.rotated:
+            dim_text += ' ↻'
+        
+        return (f'  <defs><symbol id="{symbol_id}" overflow="visible">{shape}'
+                f'<text class="text" x="{w / 2}" y="{h / 2}" '
+                f'text-anchor="middle" dominant-baseline="middle">{escape(dim_text)}</text></symbol></defs>\n')
     
-    def generate_text_report(self, nesting_result):
+    def generate_text_report(self, nesting_result, compact=False):
         """
         Genera report testuale del nesting
         
         Args:
             nesting_result: Risultato da NestingOptimizer.optimize()
+            compact: Un solo dettaglio per ogni schema di taglio ripetuto
         
         Returns:
             str: Report formattato
@@ -157,17 +549,21 @@ class NestingVisualizer:
         report.append(f"  Area scarto: {stats['waste_area_m2']} m²")
         report.append(f"  Efficienza: {stats['efficiency_percent']}%")
         report.append(f"  Scarto: {stats['waste_percent']}%")
+        if 'total_cost' in stats:
+            report.append(f"  Costo pannelli: {stats['total_cost']}")
         report.append("")
         
         # Dettaglio per pannello
-        for sheet in nesting_result['sheets']:
-            report.append(f"PANNELLO {sheet['id'] + 1}:")
-            report.append(f"  Parti piazzate: {len(sheet['placements'])}")
-            
-            for i, placement in enumerate(sheet['placements'], 1):
-                rotated_str = " (ruotato)" if placement.rotated else ""
-                report.append(f"    {i}. {placement.name}: {int(placement.width)}x{int(placement.height)} mm{rotated_str}")
-                report.append(f"       Posizione: ({int(placement.x)}, {int(placement.y)}) mm")
+        for sheet, count, _ in self._iter_layouts(nesting_result, compact):
+            quantity = f" × {count}" if count > 1 else ""
+            report.append(f"PANNELLO {sheet['id'] + 1}{quantity}:")
+            if 'stock' in sheet:
+                sheet_width, sheet_height = self._sheet_size(sheet)
+                report.append(f"  Formato: {sheet['stock']} ({int(sheet_width)} x {int(sheet_height)} mm)")
+            report.extend(self._fragment(
+                'report', self._placements_content(sheet),
+                lambda: self._render_report_lines(sheet)
+            ))
             
             report.append("")
         
@@ -175,13 +571,25 @@ class NestingVisualizer:
         
         return '\n'.join(report)
     
-    def export_cut_instructions(self, nesting_result, output_path):
+    def _render_report_lines(self, sheet):
+        """Righe del report per i pezzi di un foglio"""
+        lines = [f"  Parti piazzate: {len(sheet['placements'])}"]
+        for i, placement in enumerate(sheet['placements'], 1):
+            rotated_str = " (ruotato)" if placement.rotated else ""
+            lines.append(f"    {i}. {placement.name}: {int(placement.width)}x{int(placement.height)} mm{rotated_str}")
+            lines.append(f"       Posizione: ({int(placement.x)}, {int(placement.y)}) mm")
+        return tuple(lines)
+    
+    def export_cut_instructions(self, nesting_result, output_path, compact=False):
         """
         Esporta istruzioni di taglio in formato testo
         
         Args:
-            nesting_result: Risultato nesting
+            nesting_result: Risultato nesting oppure stream da
+                NestingOptimizer.optimize_iter()
             output_path: Path file output
+            compact: Istruzioni una sola volta per ogni schema di taglio
+                ripetuto, con quantità e pannelli (vedi _iter_layouts())
         
         Returns:
             bool: Successo
@@ -191,20 +599,27 @@ class NestingVisualizer:
                 f.write("ISTRUZIONI DI TAGLIO - FurnitureAI Professional\n")
                 f.write("=" * 60 + "\n\n")
                 
-                for sheet in nesting_result['sheets']:
+                for sheet, count, sheet_ids in self._iter_layouts(nesting_result, compact):
                     f.write(f"PANNELLO #{sheet['id'] + 1}\n")
+                    if count > 1:
+                        numbers = ', '.join(str(sheet_id + 1) for sheet_id in sheet_ids)
+                        f.write(f"Ripetere × {count} (pannelli {numbers})\n")
+                    if 'stock' in sheet:
+                        sheet_width, sheet_height = self._sheet_size(sheet)
+                        f.write(f"Formato: {sheet['stock']} ({int(sheet_width)} x {int(sheet_height)} mm)\n")
                     f.write("-" * 60 + "\n")
                     
-                    # Ordina per Y poi X (taglia dal basso verso l'alto)
-                    placements = sorted(sheet['placements'], key=lambda p: (p.y, p.x))
-                    
-                    for i, placement in enumerate(placements, 1):
-                        f.write(f"\nTaglio #{i}:\n")
-                        f.write(f"  Nome: {placement.name}\n")
-                        f.write(f"  Dimensioni: {int(placement.width)} x {int(placement.height)} mm\n")
-                        if placement.rotated:
-                            f.write(f"  ⚠️  RUOTATO 90°\n")
-                        f.write(f"  Posizione: X={int(placement.x)} mm, Y={int(placement.y)} mm\n")
+                    tree = sheet.get('cut_tree')
+                    tree_content = None
+                    if tree is not None:
+                        tree_content = tuple(
+                            (node['kind'], node['x'], node['y'], node['width'], node['height'], node['offset'])
+                            for node in iter_nodes(tree, 'cut')
+                        )
+                    f.write(self._fragment(
+                        'cut', (self._placements_content(sheet), tree_content),
+                        lambda: self._render_cut_instructions(sheet)
+                    ))
                     
                     f.write("\n" + "=" * 60 + "\n\n")
             
@@ -212,3 +627,113 @@ class NestingVisualizer:
         except Exception as e:
             print(f"❌ Errore export istruzioni: {e}")
             return False
+    
+    def _render_cut_instructions(self, sheet):
+        """
+        Istruzioni dei pezzi e sequenza dei tagli di un pannello
+        
+        Args:
+            sheet: Dizionario sheet dal nesting
+        
+        Returns:
+            str: Testo delle istruzioni
+        """
+        lines = []
+        
+        # Ordina per Y poi X (taglia dal basso verso l'alto)
+        placements = sorted(sheet['placements'], key=lambda p: (p.y, p.x))
+        
+        for i, placement in enumerate(placements, 1):
+            lines.append(f"\nTaglio #{i}:\n")
+            lines.append(f"  Nome: {placement.name}\n")
+            lines.append(f"  Dimensioni: {int(placement.width)} x {int(placement.height)} mm\n")
+            if placement.rotated:
+                lines.append(f"  ⚠️  RUOTATO 90°\n")
+            lines.append(f"  Posizione: X={int(placement.x)} mm, Y={int(placement.y)} mm\n")
+        
+        if sheet.get('cut_tree') is not None:
+            self._write_cut_sequence(lines, sheet['cut_tree'])
+        
+        return ''.join(lines)
+    
+    def _write_cut_sequence(self, lines, tree):
+        """
+        Aggiunge la sequenza dei tagli a ghigliottina di un pannello
+        
+        Args:
+            lines: Lista delle righe di output
+            tree: Albero di taglio del pannello
+        """
+        lines.append("\nSEQUENZA TAGLI SEGA:\n")
+        
+        for i, cut in enumerate(cut_sequence(tree), 1):
+            if cut['rotate']:
+                lines.append("  ↻ Ruota i pezzi di 90°\n")
+            kind = "Taglio longitudinale" if cut['kind'] == 'rip' else "Taglio trasversale"
+            axis = 'Y' if cut['kind'] == 'rip' else 'X'
+            lines.append(
+                f"  {i:3d}. {kind}: {axis}={int(cut['position'])} mm, "
+                f"lunghezza {int(cut['length'])} mm\n"
+            )
+
+
+def _dxf_number(value):
+    """Numero DXF con al più 3 decimali"""
+    return f'{value:.3f}'.rstrip('0').rstrip('.')
+
+
+def _dxf_header(layers):
+    """
+    Sezioni HEADER e TABLES (tipo linea e layer) e apertura di ENTITIES
+    
+    Args:
+        layers: Nomi dei layer, uno per pannello
+    
+    Returns:
+        str: Inizio del file DXF
+    """
+    out = [
+        '0\nSECTION\n2\nHEADER\n',
+        '9\n$ACADVER\n1\nAC1009\n',
+        f'9\n$DWGCODEPAGE\n3\nANSI_{DXF_ENCODING[2:]}\n',
+        '0\nENDSEC\n',
+        '0\nSECTION\n2\nTABLES\n',
+        '0\nTABLE\n2\nLTYPE\n70\n1\n',
+        '0\nLTYPE\n2\nCONTINUOUS\n70\n0\n3\nSolid line\n72\n65\n73\n0\n40\n0.0\n',
+        '0\nENDTAB\n',
+        f'0\nTABLE\n2\nLAYER\n70\n{len(layers) + 1}\n',
+        '0\nLAYER\n2\n0\n70\n0\n62\n7\n6\nCONTINUOUS\n'
+    ]
+    for layer in layers:
+        out.append(f'0\nLAYER\n2\n{layer}\n70\n0\n62\n7\n6\nCONTINUOUS\n')
+    out.append('0\nENDTAB\n0\nENDSEC\n')
+    out.append('0\nSECTION\n2\nENTITIES\n')
+    return ''.join(out)
+
+
+def _dxf_polyline(layer, color, points):
+    """Polilinea chiusa R12 (POLYLINE, VERTEX, SEQEND)"""
+    out = [f'0\nPOLYLINE\n8\n{layer}\n62\n{color}\n66\n1\n10\n0\n20\n0\n30\n0\n70\n1\n']
+    for x, y in points:
+        out.append(f'0\nVERTEX\n8\n{layer}\n10\n{_dxf_number(x)}\n20\n{_dxf_number(y)}\n30\n0\n')
+    out.append(f'0\nSEQEND\n8\n{layer}\n')
+    return ''.join(out)
+
+
+def _dxf_line(layer, color, x1, y1, x2, y2):
+    """Segmento LINE"""
+    return (f'0\nLINE\n8\n{layer}\n62\n{color}\n'
+            f'10\n{_dxf_number(x1)}\n20\n{_dxf_number(y1)}\n30\n0\n'
+            f'11\n{_dxf_number(x2)}\n21\n{_dxf_number(y2)}\n31\n0\n')
+
+
+def _dxf_text(layer, color, x, y, height, text, centered=True):
+    """Testo TEXT, centrato sul punto o allineato a sinistra"""
+    text = text.replace('\n', ' ')
+    out = (f'0\nTEXT\n8\n{layer}\n62\n{color}\n'
+           f'10\n{_dxf_number(x)}\n20\n{_dxf_number(y)}\n30\n0\n'
+           f'40\n{_dxf_number(height)}\n1\n{text}\n')
+    if centered:
+        # Allineamento al centro (72=1, 73=2) sul punto 11/21
+        out += f'72\n1\n73\n2\n11\n{_dxf_number(x)}\n21\n{_dxf_number(y)}\n31\n0\n'
+    return out
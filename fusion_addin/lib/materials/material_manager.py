@@ -48,6 +48,7 @@ class MaterialManager:
                     "color": "Bianco",
                     "finish": "Opaco",
                     "thickness_available": [18, 19, 25],
+                    "sheet_size": [2800, 2070],
                     "price_per_m2": 25
                 },
                 "oak_natural": {
@@ -57,6 +58,7 @@ class MaterialManager:
                     "color": "Rovere",
                     "finish": "Strutturato",
                     "thickness_available": [18, 19],
+                    "sheet_size": [2800, 2070],
                     "price_per_m2": 32
                 }
             },
@@ -5,8 +5,15 @@ Versione: 3.0
 
 import adsk.core
 import adsk.fusion
+import importlib.util
 import os
+import sys
 import traceback
+import types
+
+# Moduli comando caricati come package (vedi _load_command_module()):
+# allo stop dell'add-in ne viene chiamato l'hook stop()
+_command_modules = {}
 
 
 class UIManager:
@@ -27,7 +34,7 @@ class UIManager:
         # Icons base path
         addon_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
         self.icons_base_path = os.path.join(addon_path, 'resources', 'icons')
-        
+    
     def create_ui(self):
         """Crea tab e comandi"""
         try:
@@ -62,7 +69,7 @@ class UIManager:
             
             if not self.ia_enabled:
                 self.app.log("ATTENZIONE: Comandi IA disabilitati")
-            
+        
         except Exception as e:
             self.app.log(f"Errore creazione UI: {e}")
             self.app.log(traceback.format_exc())
@@ -609,7 +616,7 @@ class UIManager:
             panel.controls.addCommand(cmd_def)
             
             return cmd_def
-            
+        
         except Exception as e:
             self.app.log(f"❌ Errore creazione comando {cmd_id}: {e}")
             import traceback
@@ -669,6 +676,19 @@ class UIManager:
         
         return found  # Non logga più qui, viene gestito in _create_command
     
+    def stop_commands(self):
+        """Chiama l'hook stop() dei moduli comando caricati (es. worker nesting)"""
+        for module_name, module in list(_command_modules.items()):
+            stop = getattr(module, 'stop', None)
+            if stop is None:
+                continue
+            try:
+                stop()
+                self.app.log(f"✓ Comando {module_name} fermato")
+            except Exception as e:
+                self.app.log(f"Errore stop {module_name}: {e}")
+        _command_modules.clear()
+    
     def cleanup(self):
         """Rimuovi UI"""
         try:
@@ -717,12 +737,72 @@ class UIManager:
             self.handlers.clear()
             
             self.app.log("✓ UIManager cleanup completato")
-            
+        
         except Exception as e:
             self.app.log(f"Errore cleanup UI: {e}")
             self.app.log(traceback.format_exc())
 
 
+# ═══════════════════════════════════════════════════════════
+# CARICAMENTO COMANDI
+# ═══════════════════════════════════════════════════════════
+
+def _load_command_module(module_name, reload=False):
+    """
+    Carica un modulo di lib/commands come fusion_addin.lib.commands.<nome>
+    
+    Il nome completo del package permette gli import relativi verso core
+    ("from ..core"). Il modulo resta registrato in _command_modules.
+    
+    Args:
+        module_name: Nome del file senza estensione (es. 'nesting_command')
+        reload: Riesegue il modulo anche se già caricato
+    
+    Returns:
+        module: Modulo comando
+    
+    Raises:
+        ImportError: Se il modulo non può essere caricato
+    """
+    if not reload and module_name in _command_modules:
+        return _command_modules[module_name]
+    
+    addon_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    lib_dir_path = os.path.join(addon_path, 'fusion_addin', 'lib')
+    commands_dir_path = os.path.join(lib_dir_path, 'commands')
+    full_name = f'fusion_addin.lib.commands.{module_name}'
+    
+    # NON usare submodule_search_locations - rende il comando un package
+    spec = importlib.util.spec_from_file_location(
+        full_name, os.path.join(commands_dir_path, f'{module_name}.py')
+    )
+    if not spec or not spec.loader:
+        raise ImportError(f"Impossibile creare spec per {module_name}")
+    
+    # Assicura che i package parent esistano in sys.modules
+    # (CRITICO: anche fusion_addin.lib.core per permettere "from ..core")
+    packages = (
+        ('fusion_addin', os.path.join(addon_path, 'fusion_addin')),
+        ('fusion_addin.lib', lib_dir_path),
+        ('fusion_addin.lib.commands', commands_dir_path),
+        ('fusion_addin.lib.core', os.path.join(lib_dir_path, 'core')),
+    )
+    for package_name, package_path in packages:
+        if package_name not in sys.modules:
+            package = types.ModuleType(package_name)
+            package.__path__ = [package_path]
+            package.__package__ = package_name
+            sys.modules[package_name] = package
+    
+    # Registra modulo in sys.modules per import relativi, poi eseguilo
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[full_name] = module
+    spec.loader.exec_module(module)
+    
+    _command_modules[module_name] = module
+    return module
+
+
 # ═══════════════════════════════════════════════════════════
 # COMMAND HANDLER
 # ═══════════════════════════════════════════════════════════
@@ -769,7 +849,7 @@ class CommandHandler(adsk.core.CommandCreatedEventHandler):
                     
                     self.app.log("   ✓ ConfiguraIA eseguito")
                     return
-                    
+                
                 except Exception as e:
                     self.app.log(f"   ❌ Errore ConfiguraIA: {e}")
                     import traceback
@@ -788,65 +868,15 @@ class CommandHandler(adsk.core.CommandCreatedEventHandler):
             if self.cmd_id == 'FAI_Wizard':
                 self.app.log("   → Avvio Wizard command")
                 try:
-                    import sys
-                    import os
-                    import importlib.util
-                    import types
-                    
-                    addon_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-                    commands_dir_path = os.path.join(addon_path, 'fusion_addin', 'lib', 'commands')
-                    core_dir_path = os.path.join(addon_path, 'fusion_addin', 'lib', 'core')
+                    module = _load_command_module('wizard_command', reload=True)
                     
-                    # Path assoluto del file wizard_command.py
-                    wizard_path = os.path.join(commands_dir_path, 'wizard_command.py')
-                    
-                    # Import con spec per supportare import relativi
-                    # NON usare submodule_search_locations - rende wizard_command un package
-                    spec = importlib.util.spec_from_file_location(
-                        'fusion_addin.lib.commands.wizard_command',  # Nome modulo completo
-                        wizard_path
-                    )
-                    
-                    if spec and spec.loader:
-                        # Registra modulo in sys.modules per import relativi
-                        module = importlib.util.module_from_spec(spec)
-                        sys.modules['fusion_addin.lib.commands.wizard_command'] = module
-                        
-                        # Assicura che i package parent esistano in sys.modules
-                        if 'fusion_addin' not in sys.modules:
-                            fusion_addin_module = types.ModuleType('fusion_addin')
-                            fusion_addin_module.__path__ = [os.path.join(addon_path, 'fusion_addin')]
-                            fusion_addin_module.__package__ = 'fusion_addin'
-                            sys.modules['fusion_addin'] = fusion_addin_module
-                        if 'fusion_addin.lib' not in sys.modules:
-                            lib_module = types.ModuleType('fusion_addin.lib')
-                            lib_module.__path__ = [os.path.join(addon_path, 'fusion_addin', 'lib')]
-                            lib_module.__package__ = 'fusion_addin.lib'
-                            sys.modules['fusion_addin.lib'] = lib_module
-                        if 'fusion_addin.lib.commands' not in sys.modules:
-                            commands_module = types.ModuleType('fusion_addin.lib.commands')
-                            commands_module.__path__ = [commands_dir_path]
-                            commands_module.__package__ = 'fusion_addin.lib.commands'
-                            sys.modules['fusion_addin.lib.commands'] = commands_module
-                        # CRITICO: Crea anche fusion_addin.lib.core per permettere "from ..core"
-                        if 'fusion_addin.lib.core' not in sys.modules:
-                            core_module = types.ModuleType('fusion_addin.lib.core')
-                            core_module.__path__ = [core_dir_path]
-                            core_module.__package__ = 'fusion_addin.lib.core'
-                            sys.modules['fusion_addin.lib.core'] = core_module
-                        
-                        # Esegui modulo
-                        spec.loader.exec_module(module)
-                        
-                        # Crea istanza comando ed esegui
-                        cmd_instance = module.WizardCommand()
-                        cmd_instance.execute()
-                        
-                        self.app.log("   ✓ Wizard eseguito")
-                        return
-                    else:
-                        raise ImportError("Impossibile creare spec per wizard_command")
+                    # Crea istanza comando ed esegui
+                    cmd_instance = module.WizardCommand()
+                    cmd_instance.execute()
                     
+                    self.app.log("   ✓ Wizard eseguito")
+                    return
+                
                 except Exception as e:
                     self.app.log(f"   ❌ Errore Wizard: {e}")
                     import traceback
@@ -860,6 +890,22 @@ class CommandHandler(adsk.core.CommandCreatedEventHandler):
                     )
                     return
             
+            # CASO SPECIALE: Nesting (import relativi verso core)
+            if self.cmd_id == 'FAI_Nesting':
+                self.app.log("   → Avvio Nesting command")
+                try:
+                    _load_command_module('nesting_command').execute()
+                    self.app.log("   ✓ Nesting eseguito")
+                except Exception as e:
+                    self.app.log(f"   ❌ Errore Nesting: {e}")
+                    self.app.log(traceback.format_exc())
+                    self.app.userInterface.messageBox(
+                        'Errore apertura Nesting.\n\n'
+                        f'Dettagli: {str(e)}',
+                        'Errore'
+                    )
+                return
+            
             # Import modulo comando generico
             import sys
             import os
@@ -0,0 +1,316 @@
+"""
+Test suite per lista tagli
+Corpi Fusion simulati: adsk viene sostituito da moduli vuoti se assente
+"""
+
+import csv
+import json
+import os
+import sys
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+# Mock adsk module for testing (CutList non usa l'API oltre ai corpi passati)
+for module_name in ('adsk', 'adsk.core', 'adsk.fusion'):
+    sys.modules.setdefault(module_name, type(sys)(module_name))
+
+# Aggiungi path per import
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lib', 'core'))
+
+import cutlist
+from cutlist import CutList, CutListSnapshot, mark_design_changed
+
+
+class MockPoint:
+    def __init__(self, x, y, z):
+        self.x, self.y, self.z = x, y, z
+
+
+class MockBox:
+    def __init__(self, width, height, depth):
+        # Fusion lavora in cm
+        self.minPoint = MockPoint(0, 0, 0)
+        self.maxPoint = MockPoint(width / 10, height / 10, depth / 10)
+
+
+class MockAttribute:
+    def __init__(self, value):
+        self.value = value
+
+
+class MockAttributes:
+    def __init__(self, values):
+        self.values = values
+
+    def itemByName(self, group, name):
+        value = self.values.get((group, name))
+        return MockAttribute(value) if value is not None else None
+
+
+class MockMaterial:
+    def __init__(self, name):
+        self.name = name
+
+
+class MockBody:
+    """Corpo che conta le letture del bounding box (costose in Fusion)"""
+
+    box_queries = 0
+
+    def __init__(self, name, width, height, thickness=18, material='Bianco', grain=None):
+        self.name = name
+        self.isVisible = True
+        self.material = MockMaterial(material)
+        self.attributes = MockAttributes({('FurnitureAI', 'grain'): grain})
+        self._box = MockBox(width, height, thickness)
+
+    @property
+    def boundingBox(self):
+        MockBody.box_queries += 1
+        return self._box
+
+
+class MockParameter:
+    def __init__(self, name, expression):
+        self.name = name
+        self.expression = expression
+
+
+class MockTimeline:
+    def __init__(self):
+        self.count = 10
+        self.markerPosition = 10
+
+
+class MockDesign:
+    def __init__(self, timeline=True):
+        self.timeline = MockTimeline() if timeline else None
+        self.allParameters = [MockParameter('larghezza', '600 mm')]
+
+
+class MockComponent:
+    def __init__(self, bodies, design=None):
+        self.bRepBodies = bodies
+        self.occurrences = []
+        self.parentDesign = design or MockDesign()
+        self.entityToken = 'root'
+
+
+def kitchen_bodies():
+    """Corpi di due basi cucina e un pannello impiallacciato"""
+    bodies = []
+    for i in range(2):
+        bodies += [
+            MockBody(f'Fianco_{i}_sx', 720, 560),
+            MockBody(f'Fianco_{i}_dx', 720, 560),
+            MockBody(f'Anta_{i}', 720, 560),
+            MockBody(f'Ripiano_{i}', 564, 540),
+        ]
+    bodies.append(MockBody('Fianco_rovere', 720, 560, material='Rovere', grain='length'))
+    bodies.append(MockBody('Fianco_vena', 720, 560, grain='length'))
+    return bodies
+
+
+class CutListTestCase(unittest.TestCase):
+    """Helper comuni per i test lista tagli"""
+
+    def setUp(self):
+        """Setup test"""
+        MockBody.box_queries = 0
+        self.bodies = kitchen_bodies()
+        self.component = MockComponent(self.bodies)
+        self.cutlist = CutList(self.component)
+
+    def rows(self, cutlist_parts):
+        """Righe aggregate come {(materiale, primo nome): parte}"""
+        return {
+            (material, part['names'][0]): part
+            for material, thicknesses in cutlist_parts.items()
+            for parts in thicknesses.values()
+            for part in parts
+        }
+
+
+class TestPartAggregation(CutListTestCase):
+    """Test aggregazione per firma parte"""
+
+    def test_signature_grouping(self):
+        """Test stesse misure con bordi o venatura diversi non aggregate"""
+        result = self.cutlist.generate()
+        rows = self.rows(result['parts'])
+
+        sides = rows[('Bianco', 'Fianco_0_sx')]
+        self.assertEqual(sides['quantity'], 4)
+        self.assertEqual(list(sides['names']), ['Fianco_0_sx', 'Fianco_0_dx', 'Fianco_1_sx', 'Fianco_1_dx'])
+
+        # Ante: stesse misure dei fianchi ma bordate su tre lati
+        self.assertEqual(rows[('Bianco', 'Anta_0')]['quantity'], 2)
+        # Venatura diversa: riga separata
+        self.assertEqual(rows[('Bianco', 'Fianco_vena')]['quantity'], 1)
+        self.assertEqual(rows[('Bianco', 'Fianco_vena')]['grain'], 'length')
+        self.assertEqual(rows[('Rovere', 'Fianco_rovere')]['quantity'], 1)
+
+        self.assertEqual(sum(part['quantity'] for part in rows.values()), len(self.bodies))
+        self.assertEqual(result['total_parts'], len(self.bodies))
+        self.assertTrue(all(part['quantity'] == 1 for part in self.cutlist.parts))
+
+    def test_large_assembly(self):
+        """Test aggregazione di molti corpi con poche misure distinte"""
+        bodies = [MockBody(f'Ripiano_{i}', 400 + (i % 50) * 10, 500) for i in range(5000)]
+        result = CutList(MockComponent(bodies)).generate()
+
+        parts = result['parts']['Bianco'][18]
+        self.assertEqual(len(parts), 50)
+        self.assertTrue(all(part['quantity'] == 100 for part in parts))
+
+
+class TestCutListSnapshot(CutListTestCase):
+    """Test snapshot condivisa tra export e statistiche"""
+
+    def test_snapshot_read_only(self):
+        """Test snapshot immutabile"""
+        snapshot = self.cutlist.snapshot()
+        self.assertIsInstance(snapshot, CutListSnapshot)
+
+        with self.assertRaises(TypeError):
+            snapshot.parts['Nuovo'] = {}
+        part = snapshot.parts['Bianco'][18][0]
+        with self.assertRaises(TypeError):
+            part['quantity'] = 99
+        with self.assertRaises(AttributeError):
+            part['names'].append('altro')
+        with self.assertRaises(TypeError):
+            snapshot.statistics['by_material']['Bianco'] = 0
+
+    def test_generate_returns_plain_copy(self):
+        """Test generate() restituisce dati modificabili e serializzabili"""
+        result = self.cutlist.generate()
+        json.dumps(result)
+
+        part = result['parts']['Bianco'][18][0]
+        part['quantity'] = 99
+        part['names'].append('altro')
+        result['parts']['Nuovo'] = {}
+
+        snapshot = self.cutlist.snapshot()
+        self.assertNotIn('Nuovo', snapshot.parts)
+        self.assertEqual(snapshot.parts['Bianco'][18][0]['quantity'], 4)
+        self.assertNotIn('altro', snapshot.parts['Bianco'][18][0]['names'])
+
+    def test_exports_share_one_traversal(self):
+        """Test export e statistiche ripetuti senza rileggere i corpi"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'tagli.csv')
+            self.assertTrue(self.cutlist.export_to_csv(path))
+            self.cutlist.generate()
+            self.assertTrue(self.cutlist.export_to_csv(path))
+            self.assertEqual(MockBody.box_queries, len(self.bodies))
+
+            with open(path, newline='', encoding='utf-8') as f:
+                rows = list(csv.reader(f))
+
+        self.assertEqual(rows[0][-2:], ['Venatura', 'Nome'])
+        names = {row[-1]: row for row in rows[1:] if len(row) == 12}
+        self.assertEqual(names['Fianco_vena'][-2], 'Lunghezza')
+        self.assertEqual(names['Anta_0, Anta_1'][4], '2')
+
+    def test_invalidation_token(self):
+        """Test snapshot ricalcolata quando il design cambia"""
+        design = self.component.parentDesign
+        first = self.cutlist.snapshot()
+        self.assertIs(self.cutlist.snapshot(), first)
+
+        # Nuova feature nella timeline
+        design.timeline.count += 1
+        second = self.cutlist.snapshot()
+        self.assertIsNot(second, first)
+        self.assertEqual(MockBody.box_queries, 2 * len(self.bodies))
+
+        # Quota modificata (comando terminato)
+        design.allParameters[0].expression = '800 mm'
+        mark_design_changed()
+        self.assertIsNot(self.cutlist.snapshot(), second)
+
+        # Timeline riportata indietro
+        third = self.cutlist.snapshot()
+        design.timeline.markerPosition -= 1
+        self.assertIsNot(self.cutlist.snapshot(), third)
+
+        # Materiale riassegnato e corpo nascosto (fuori dalla timeline)
+        fourth = self.cutlist.snapshot()
+        self.bodies[0].material = MockMaterial('Rovere')
+        mark_design_changed()
+        fifth = self.cutlist.snapshot()
+        self.assertIsNot(fifth, fourth)
+        self.assertIn('Rovere', fifth.parts)
+        self.bodies[1].isVisible = False
+        mark_design_changed()
+        sixth = self.cutlist.snapshot()
+        self.assertIsNot(sixth, fifth)
+        self.assertEqual(sixth.total_parts, len(self.bodies) - 1)
+
+        # Invalidazione esplicita
+        self.cutlist.invalidate()
+        self.assertIsNot(self.cutlist.snapshot(), sixth)
+
+    def test_token_does_not_walk_bodies(self):
+        """Test token calcolato senza leggere corpi e parametri"""
+        self.cutlist.snapshot()
+        self.component.parentDesign.allParameters = None
+        self.component.bRepBodies = None
+        self.assertIsNotNone(self.cutlist.snapshot().token)
+
+    def test_watch_design_changes(self):
+        """Test eventi di comando e documento che invalidano le snapshot"""
+        class Event:
+            def __init__(self):
+                self.handlers = []
+
+            def add(self, handler):
+                self.handlers.append(handler)
+
+            def remove(self, handler):
+                self.handlers.remove(handler)
+
+        class Handler:
+            def __init__(self):
+                pass
+
+        app = SimpleNamespace(
+            userInterface=SimpleNamespace(commandTerminated=Event()),
+            documentActivated=Event()
+        )
+        core = SimpleNamespace(ApplicationCommandEventHandler=Handler, DocumentEventHandler=Handler)
+        patcher = mock.patch.object(cutlist, 'adsk', SimpleNamespace(core=core))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(cutlist.unwatch_design_changes)
+
+        self.assertTrue(cutlist.watch_design_changes(app))
+        self.assertTrue(cutlist.watch_design_changes(app))
+        self.assertEqual(len(app.userInterface.commandTerminated.handlers), 1)
+
+        first = self.cutlist.snapshot()
+        self.assertIs(self.cutlist.snapshot(), first)
+        app.userInterface.commandTerminated.handlers[0].notify(None)
+        second = self.cutlist.snapshot()
+        self.assertIsNot(second, first)
+        app.documentActivated.handlers[0].notify(None)
+        self.assertIsNot(self.cutlist.snapshot(), second)
+
+        cutlist.unwatch_design_changes()
+        self.assertEqual(app.userInterface.commandTerminated.handlers, [])
+        self.assertEqual(app.documentActivated.handlers, [])
+
+    def test_direct_design_not_cached(self):
+        """Test design senza timeline: snapshot sempre ricalcolata"""
+        cutlist = CutList(MockComponent(self.bodies, MockDesign(timeline=False)))
+        first = cutlist.snapshot()
+        self.assertIsNone(first.token)
+        self.assertIsNot(cutlist.snapshot(), first)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,1599 @@
+"""
+Test suite per ottimizzatore nesting
+Test senza dipendenze Fusion 360
+"""
+
+import unittest
+from unittest import mock
+import sys
+import os
+import bisect
+import json
+import math
+import random
+import tempfile
+import threading
+import time
+
+# Aggiungi path per import
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lib', 'core'))
+
+import nesting
+from nesting import NestingOptimizer, PartTable, Rectangle, Placement, MAXRECTS_HEURISTICS, BIN_MODES
+from nesting import layout_signature, sheet_patterns
+from nesting_session import NestingSession
+from nesting_cache import NestingCache
+from nesting_pipeline import NestingPipeline, DEFAULT_SHEET_SIZE
+import nesting_polygon
+from nesting_polygon import PolygonNestingOptimizer
+from nesting_benchmark import (
+    generate_dataset, furniture_parts, run_suite, compare_reports, check_budgets, main as benchmark_main
+)
+from nesting_worker import NestingWorkerClient, NestingCancelled, run_job, restore_result, main as worker_main
+from furniture_types import FURNITURE_TYPES
+from cut_tree import iter_nodes, serialize_cut_tree, deserialize_cut_tree
+
+
+def _overlaps(a, b):
+    """Verifica sovrapposizione tra due placement"""
+    return not (
+        a.x + a.width <= b.x or b.x + b.width <= a.x or
+        a.y + a.height <= b.y or b.y + b.height <= a.y
+    )
+
+
+def _segments_cross(p, q, r, s):
+    """Verifica se due segmenti si attraversano (contatto escluso)"""
+    def orient(a, b, c):
+        return (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+    return (orient(r, s, p) * orient(r, s, q) < -1e-9 and
+            orient(p, q, r) * orient(p, q, s) < -1e-9)
+
+
+def _point_in_polygon(polygon, x, y):
+    """Test ray casting di un punto in un poligono qualsiasi"""
+    inside = False
+    for (x1, y1), (x2, y2) in zip(polygon, polygon[1:] + polygon[:1]):
+        if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+    return inside
+
+
+def _polygons_overlap(a, b):
+    """Verifica sovrapposizione tra due sagome"""
+    a, b = list(a), list(b)
+    for p, q in zip(a, a[1:] + a[:1]):
+        for r, s in zip(b, b[1:] + b[:1]):
+            if _segments_cross(p, q, r, s):
+                return True
+    return _point_in_polygon(b, *_interior_point(a)) or _point_in_polygon(a, *_interior_point(b))
+
+
+def _interior_point(polygon):
+    """Punto interno di un poligono anche concavo (metà della prima corda orizzontale)"""
+    ys = sorted({y for _, y in polygon})
+    y = (ys[0] + ys[1]) / 2
+    xs = sorted(
+        x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+        for (x1, y1), (x2, y2) in zip(polygon, polygon[1:] + polygon[:1])
+        if (y1 > y) != (y2 > y)
+    )
+    return ((xs[0] + xs[1]) / 2, y)
+
+
+class NestingTestCase(unittest.TestCase):
+    """Helper comuni per i test nesting"""
+    
+    KITCHEN_PARTS = [
+        {'width': 720, 'height': 560, 'quantity': 12, 'name': 'Fianco'},
+        {'width': 764, 'height': 540, 'quantity': 10, 'name': 'Ripiano'},
+        {'width': 796, 'height': 716, 'quantity': 8, 'name': 'Anta'},
+        {'width': 764, 'height': 100, 'quantity': 12, 'name': 'Traverso'},
+        {'width': 2000, 'height': 600, 'quantity': 3, 'name': 'Top'},
+    ]
+    
+    def assertValidLayout(self, optimizer, result, expected_parts):
+        """Verifica che il layout sia dentro il foglio e senza sovrapposizioni"""
+        placed = 0
+        for sheet in result['sheets']:
+            placements = sheet['placements']
+            placed += len(placements)
+            sheet_width = sheet.get('width', optimizer.sheet_width)
+            sheet_height = sheet.get('height', optimizer.sheet_height)
+            for p in placements:
+                self.assertGreaterEqual(p.x, optimizer.margin)
+                self.assertGreaterEqual(p.y, optimizer.margin)
+                self.assertLessEqual(p.x + p.width, sheet_width - optimizer.margin)
+                self.assertLessEqual(p.y + p.height, sheet_height - optimizer.margin)
+            for i, a in enumerate(placements):
+                for b in placements[i + 1:]:
+                    self.assertFalse(_overlaps(a, b), f"Sovrapposizione {a} / {b}")
+        self.assertEqual(placed, expected_parts)
+
+
+class TestGuillotineEngine(NestingTestCase):
+    """Test motore guillotine (default)"""
+    
+    def test_default_engine(self):
+        """Test layout valido con motore di default"""
+        optimizer = NestingOptimizer()
+        result = optimizer.optimize(self.KITCHEN_PARTS)
+        
+        self.assertEqual(result['parts_count'], 45)
+        self.assertValidLayout(optimizer, result, 45)
+    
+    def test_identical_parts_fill_strips(self):
+        """Test pezzi uguali riempiono le fasce come MaxRects e staged"""
+        cases = [
+            ([{'width': 300, 'height': 100, 'quantity': 500, 'name': 'Listello'}], False),
+            ([{'width': 40, 'height': 40, 'quantity': 3000, 'name': 'Tassello'}], True),
+        ]
+        for parts, allow_rotation in cases:
+            optimizer = NestingOptimizer()
+            guillotine = optimizer.optimize(parts, allow_rotation=allow_rotation)
+            self.assertValidLayout(optimizer, guillotine, parts[0]['quantity'])
+            
+            for engine in ('maxrects', 'staged'):
+                other = optimizer.optimize(parts, allow_rotation=allow_rotation, engine=engine)
+                self.assertLessEqual(guillotine['sheets_count'], other['sheets_count'] + 1)
+        
+        # Tra due pezzi resta sempre almeno una lama
+        placements = guillotine['sheets'][0]['placements'][:300]
+        kerf = optimizer.blade_width
+        for i, a in enumerate(placements):
+            for b in placements[i + 1:]:
+                self.assertTrue(
+                    a.x + a.width + kerf <= b.x or b.x + b.width + kerf <= a.x or
+                    a.y + a.height + kerf <= b.y or b.y + b.height + kerf <= a.y,
+                    f"Lama mancante tra {a} e {b}"
+                )
+    
+    def test_unknown_engine(self):
+        """Test motore sconosciuto"""
+        with self.assertRaises(ValueError):
+            NestingOptimizer().optimize(self.KITCHEN_PARTS, engine='sconosciuto')
+
+
+class TestCutTree(NestingTestCase):
+    """Test albero di taglio del motore guillotine"""
+    
+    def setUp(self):
+        """Setup test"""
+        self.optimizer = NestingOptimizer()
+        self.result = self.optimizer.optimize(self.KITCHEN_PARTS)
+    
+    def test_parts_are_tree_leaves(self):
+        """Test ogni pezzo è una foglia dell'albero con la stessa geometria"""
+        for sheet in self.result['sheets']:
+            parts = [node['placement'] for node in iter_nodes(sheet['cut_tree'], 'part')]
+            self.assertEqual(sorted(parts), sorted(sheet['placements']))
+            
+            for node in iter_nodes(sheet['cut_tree'], 'part'):
+                p = node['placement']
+                self.assertEqual((node['x'], node['y'], node['width'], node['height']),
+                                 (p.x, p.y, p.width, p.height))
+    
+    def test_free_space_is_disjoint(self):
+        """Test rettangoli liberi = foglie libere disgiunte dell'albero"""
+        for sheet in self.result['sheets']:
+            free = sheet['free_rectangles']
+            self.assertEqual(
+                sorted(id(n) for n in free),
+                sorted(id(n) for n in iter_nodes(sheet['cut_tree'], 'free'))
+            )
+            
+            boxes = [Placement(n['x'], n['y'], n['width'], n['height'], 0, '', False) for n in free]
+            boxes.extend(sheet['placements'])
+            for i, a in enumerate(boxes):
+                for b in boxes[i + 1:]:
+                    self.assertFalse(_overlaps(a, b), f"Sovrapposizione {a} / {b}")
+    
+    def test_program_round_trip(self):
+        """Test programma sega JSON compatto serializzato e ricaricato"""
+        for sheet in self.result['sheets']:
+            program = self.optimizer.saw_program(sheet)['program']
+            loaded = json.loads(json.dumps(program))
+            
+            tree = deserialize_cut_tree(
+                loaded, lambda x, y, w, h, type_id, rotated: Placement(
+                    x, y, w, h, type_id, self.result['part_table'].names[type_id], rotated
+                )
+            )
+            self.assertEqual(serialize_cut_tree(tree, self.optimizer.blade_width), program)
+            self.assertEqual(
+                sorted(n['placement'] for n in iter_nodes(tree, 'part')),
+                sorted(sheet['placements'])
+            )
+    
+    def test_sequence_groups_by_stage(self):
+        """Test una rotazione per stadio e guida che avanza in un solo verso"""
+        for sheet in self.result['sheets']:
+            program = self.optimizer.saw_program(sheet)
+            sequence = program['sequence']
+            
+            self.assertEqual(len(sequence), sum(1 for _ in iter_nodes(sheet['cut_tree'], 'cut')))
+            
+            stages = [cut['stage'] for cut in sequence]
+            self.assertEqual(stages, sorted(stages))
+            self.assertEqual(program['rotations'], stages[-1])
+            for cut, following in zip(sequence, sequence[1:]):
+                if following['stage'] == cut['stage']:
+                    self.assertEqual(following['kind'], cut['kind'])
+    
+    def test_cache_restores_tree(self):
+        """Test l'albero di taglio sopravvive alla cache su disco"""
+        with tempfile.TemporaryDirectory() as tmp:
+            optimizer = NestingOptimizer(cache=NestingCache(tmp))
+            first = optimizer.optimize(self.KITCHEN_PARTS)
+            cached = optimizer.optimize(self.KITCHEN_PARTS)
+        
+        self.assertTrue(cached['from_cache'])
+        for sheet, cached_sheet in zip(first['sheets'], cached['sheets']):
+            self.assertEqual(optimizer.saw_program(cached_sheet), optimizer.saw_program(sheet))
+            self.assertEqual(len(cached_sheet['free_rectangles']), len(sheet['free_rectangles']))
+    
+    def test_maxrects_has_no_tree(self):
+        """Test i fogli MaxRects non hanno programma sega"""
+        result = self.optimizer.optimize(self.KITCHEN_PARTS, engine='maxrects')
+        
+        with self.assertRaises(ValueError):
+            self.optimizer.saw_program(result['sheets'][0])
+
+
+class TestStagedEngine(NestingTestCase):
+    """Test motore a stadi per sezionatrici"""
+    
+    def test_valid_layout_within_stages(self):
+        """Test layout valido e sequenza di taglio entro il numero di stadi"""
+        for max_stages in (2, 3):
+            optimizer = NestingOptimizer()
+            optimizer.max_stages = max_stages
+            result = optimizer.optimize(self.KITCHEN_PARTS, engine='staged')
+            
+            self.assertValidLayout(optimizer, result, 45)
+            for sheet in result['sheets']:
+                sequence = optimizer.saw_program(sheet)['sequence']
+                self.assertLessEqual(max(cut['stage'] for cut in sequence), max_stages)
+    
+    def test_repeated_strips_use_memo(self):
+        """Test fasce uguali riusano la composizione memorizzata"""
+        parts = [{'width': 700, 'height': 500, 'quantity': 200, 'name': 'Fianco'}]
+        optimizer = NestingOptimizer()
+        
+        with mock.patch('nesting._bounded_subset_sum', wraps=nesting._bounded_subset_sum) as knapsack:
+            result = optimizer.optimize(parts, engine='staged')
+        
+        self.assertValidLayout(optimizer, result, 200)
+        self.assertLess(knapsack.call_count, 10)
+    
+    def test_large_job_bounded_work(self):
+        """Test job da 500 pezzi: zaini per fascia e colonna, non per pezzo"""
+        rng = random.Random(3)
+        parts = [
+            {'width': rng.randint(100, 1200), 'height': rng.randint(50, 700), 'quantity': 2, 'name': f'P{i}'}
+            for i in range(250)
+        ]
+        optimizer = NestingOptimizer()
+        
+        # Il tempo è verificato da nesting_benchmark (TIME_BUDGETS)
+        with mock.patch('nesting._bounded_subset_sum', wraps=nesting._bounded_subset_sum) as knapsack, \
+                mock.patch.object(NestingOptimizer, '_build_strip', autospec=True,
+                                  side_effect=NestingOptimizer._build_strip) as strips, \
+                mock.patch.object(NestingOptimizer, '_stack_column', autospec=True,
+                                  side_effect=NestingOptimizer._stack_column) as columns:
+            result = optimizer.optimize(parts, engine='staged')
+        
+        self.assertValidLayout(optimizer, result, 500)
+        self.assertLess(strips.call_count, 500)
+        self.assertLessEqual(knapsack.call_count, 2 * strips.call_count + columns.call_count)
+    
+    def test_stream_matches_optimize(self):
+        """Test optimize_iter() con motore a stadi"""
+        optimizer = NestingOptimizer()
+        result = optimizer.optimize(self.KITCHEN_PARTS, engine='staged')
+        streamed = [item['sheet'] for item in optimizer.optimize_iter(self.KITCHEN_PARTS, engine='staged')]
+        
+        self.assertEqual([s['placements'] for s in streamed], [s['placements'] for s in result['sheets']])
+    
+    def test_invalid_options(self):
+        """Test stadi non supportati e sessione incrementale"""
+        optimizer = NestingOptimizer()
+        optimizer.max_stages = 4
+        with self.assertRaises(ValueError):
+            optimizer.optimize(self.KITCHEN_PARTS, engine='staged')
+        with self.assertRaises(ValueError):
+            NestingSession(engine='staged')
+
+
+class TestSkylineEngine(NestingTestCase):
+    """Test motore skyline per anteprime rapide"""
+    
+    def test_all_modes_valid(self):
+        """Test layout valido in tutte le modalità e senza rotazione"""
+        optimizer = NestingOptimizer()
+        for bin_mode in BIN_MODES:
+            for allow_rotation in (True, False):
+                result = optimizer.optimize(
+                    self.KITCHEN_PARTS, allow_rotation, engine='skyline', bin_mode=bin_mode
+                )
+                self.assertValidLayout(optimizer, result, 45)
+    
+    def test_skyline_stays_compact(self):
+        """Test profilo ordinato e senza segmenti adiacenti alla stessa quota"""
+        optimizer = NestingOptimizer()
+        result = optimizer.optimize(self.KITCHEN_PARTS, engine='skyline')
+        
+        for sheet in result['sheets']:
+            xs, ys = sheet['skyline']
+            self.assertEqual(xs[0], optimizer.margin)
+            self.assertEqual(list(xs), sorted(set(xs)))
+            for k in range(1, len(ys)):
+                self.assertNotEqual(ys[k], ys[k - 1])
+            for p in sheet['placements']:
+                # Nessun pezzo sopra il profilo
+                i = bisect.bisect_right(xs, p.x) - 1
+                self.assertGreaterEqual(ys[i], p.y + p.height)
+    
+    def test_large_job_bounded_work(self):
+        """Test 1000 pezzi: ogni pezzo cercato solo sul foglio aperto"""
+        rng = random.Random(5)
+        parts = [
+            {'width': rng.randint(100, 1200), 'height': rng.randint(50, 700), 'quantity': 4, 'name': f'P{i}'}
+            for i in range(250)
+        ]
+        optimizer = NestingOptimizer()
+        
+        # Il tempo è verificato da nesting_benchmark (TIME_BUDGETS)
+        with mock.patch.object(NestingOptimizer, '_skyline_find_placement', autospec=True,
+                               side_effect=NestingOptimizer._skyline_find_placement) as find:
+            result = optimizer.optimize(parts, engine='skyline')
+        
+        self.assertEqual(sum(len(s['placements']) for s in result['sheets']), 1000)
+        self.assertLessEqual(find.call_count, 1000 + result['sheets_count'])
+    
+    def test_session_rebuilds_skyline(self):
+        """Test sessione skyline dopo rimozione pezzi"""
+        session = NestingSession(engine='skyline')
+        session.add_parts(self.KITCHEN_PARTS)
+        session.remove_parts([{'name': 'Anta', 'quantity': 4}])
+        session.add_parts([{'width': 796, 'height': 716, 'quantity': 4, 'name': 'Anta'}])
+        
+        self.assertValidLayout(session.optimizer, session.result(), 45)
+
+
+class TestTailRepack(NestingTestCase):
+    """Test ripasso branch-and-bound sugli ultimi fogli"""
+    
+    def test_eliminates_sheets(self):
+        """Test fogli eliminati riportati nelle statistiche"""
+        optimizer = NestingOptimizer()
+        greedy = optimizer.optimize(self.KITCHEN_PARTS)
+        result = optimizer.optimize(self.KITCHEN_PARTS, repack_time_s=1.0)
+        
+        eliminated = result['statistics']['sheets_eliminated']
+        self.assertGreaterEqual(eliminated, 1)
+        self.assertEqual(result['sheets_count'], greedy['sheets_count'] - eliminated)
+        self.assertEqual(greedy['statistics']['sheets_eliminated'], 0)
+        self.assertValidLayout(optimizer, result, 45)
+        
+        # I fogli guillotine restano tagliabili a ghigliottina
+        for sheet_id, sheet in enumerate(result['sheets']):
+            self.assertEqual(sheet['id'], sheet_id)
+            parts = [node['placement'] for node in iter_nodes(sheet['cut_tree'], 'part')]
+            self.assertEqual(sorted(parts), sorted(sheet['placements']))
+    
+    def test_maxrects_sheets(self):
+        """Test ripasso su fogli senza albero di taglio"""
+        rng = random.Random(6)
+        parts = [
+            {'width': rng.randint(100, 1200), 'height': rng.randint(50, 700), 'quantity': 2, 'name': f'P{i}'}
+            for i in range(20)
+        ]
+        optimizer = NestingOptimizer()
+        result = optimizer.optimize(parts, engine='skyline', repack_time_s=1.0)
+        
+        self.assertEqual(result['statistics']['sheets_eliminated'], 1)
+        self.assertValidLayout(optimizer, result, 40)
+    
+    def test_time_cap(self):
+        """Test ricerca interrotta allo scadere del tempo massimo"""
+        rng = random.Random(7)
+        parts = [
+            {'width': rng.randint(100, 1200), 'height': rng.randint(50, 700), 'quantity': 2, 'name': f'P{i}'}
+            for i in range(150)
+        ]
+        optimizer = NestingOptimizer()
+        greedy = optimizer.optimize(parts)
+        
+        # Orologio simulato: 10 ms per lettura, cioè per nodo della ricerca
+        # (il tempo reale è verificato da nesting_benchmark, TIME_BUDGETS)
+        clock = mock.Mock(side_effect=[i * 0.01 for i in range(10000)])
+        with mock.patch.object(nesting, 'time', mock.Mock(perf_counter=clock)):
+            result = optimizer.optimize(parts, repack_time_s=0.05)
+        
+        self.assertLessEqual(clock.call_count, 10)
+        self.assertValidLayout(optimizer, result, greedy['parts_count'])
+        self.assertEqual(result['sheets_count'], greedy['sheets_count'] - result['statistics']['sheets_eliminated'])
+
+
+class TestMixedStock(NestingTestCase):
+    """Test magazzino con formati di pannello diversi"""
+    
+    STOCK = [
+        {'name': 'Standard', 'width': 2800, 'height': 2070, 'cost': 30},
+        {'name': 'Lungo', 'width': 4100, 'height': 2070, 'cost': 42},
+        {'name': 'Stretto', 'width': 3050, 'height': 1300, 'cost': 22},
+        {'name': 'Sfrido', 'width': 1200, 'height': 800, 'count': 1, 'cost': 0},
+    ]
+    
+    def setUp(self):
+        """Setup test"""
+        rng = random.Random(4)
+        self.parts = [
+            {'width': rng.randint(100, 1200), 'height': rng.randint(50, 700), 'quantity': 2, 'name': f'P{i}'}
+            for i in range(60)
+        ]
+    
+    def test_cheaper_than_single_format(self):
+        """Test costo non superiore al solo formato standard"""
+        optimizer = NestingOptimizer(stock=self.STOCK)
+        result = optimizer.optimize_stock(self.parts)
+        standard = optimizer.optimize_stock(self.parts, stock=self.STOCK[:1])
+        
+        self.assertValidLayout(optimizer, result, 120)
+        self.assertLessEqual(result['statistics']['total_cost'], standard['statistics']['total_cost'])
+        self.assertEqual(result['statistics']['by_stock']['Sfrido']['sheets'], 1)
+        for sheet in result['sheets']:
+            entry = next(e for e in self.STOCK if e['name'] == sheet['stock'])
+            self.assertEqual((sheet['width'], sheet['height']), (entry['width'], entry['height']))
+    
+    def test_sequential_matches_parallel(self):
+        """Test valutazione sequenziale uguale a quella in parallelo"""
+        optimizer = NestingOptimizer(stock=self.STOCK)
+        parallel = optimizer.optimize_stock(self.parts)
+        with mock.patch('nesting._processes_available', return_value=False):
+            sequential = optimizer.optimize_stock(self.parts)
+        
+        self.assertEqual(
+            [(s['stock'], s['placements']) for s in sequential['sheets']],
+            [(s['stock'], s['placements']) for s in parallel['sheets']]
+        )
+    
+    def test_pool_receives_pieces_once(self):
+        """Test pezzi inviati al pool solo all'avvio, poi solo maschere"""
+        calls = []
+        
+        class InlineExecutor:
+            def __init__(self, max_workers, initializer, initargs):
+                initializer(*initargs)
+            
+            def map(self, fn, *args):
+                calls.append(args)
+                return map(fn, *args)
+            
+            def shutdown(self, wait=True, cancel_futures=False):
+                pass
+        
+        optimizer = NestingOptimizer(stock=self.STOCK)
+        with mock.patch('nesting._processes_available', return_value=False):
+            sequential = optimizer.optimize_stock(self.parts)
+        with mock.patch('nesting._processes_available', return_value=True), \
+                mock.patch('nesting.ProcessPoolExecutor', InlineExecutor):
+            pooled = optimizer.optimize_stock(self.parts, workers=2)
+        
+        self.assertTrue(calls)
+        for entries, masks in calls:
+            self.assertTrue(all(isinstance(mask, bytes) for mask in masks))
+        self.assertEqual(
+            [(s['stock'], s['placements']) for s in pooled['sheets']],
+            [(s['stock'], s['placements']) for s in sequential['sheets']]
+        )
+    
+    def test_single_worker_skips_pool(self):
+        """Test nessun pool di processi con un solo worker"""
+        optimizer = NestingOptimizer(stock=self.STOCK)
+        with mock.patch('nesting._processes_available', return_value=True), \
+                mock.patch('nesting.ProcessPoolExecutor') as executor:
+            result = optimizer.optimize_stock(self.parts, workers=1)
+        
+        executor.assert_not_called()
+        self.assertValidLayout(optimizer, result, 120)
+    
+    def test_limited_stock(self):
+        """Test magazzino esaurito: i pezzi rimasti non vengono piazzati"""
+        optimizer = NestingOptimizer()
+        stock = [{'width': 2800, 'height': 2070, 'count': 1}]
+        result = optimizer.optimize_stock(self.parts, stock=stock)
+        
+        self.assertEqual(result['sheets_count'], 1)
+        self.assertLess(sum(len(s['placements']) for s in result['sheets']), 120)
+    
+    def test_invalid_options(self):
+        """Test formati non validi e motori non supportati"""
+        optimizer = NestingOptimizer()
+        with self.assertRaises(ValueError):
+            optimizer.optimize_stock(self.parts, stock=[])
+        with self.assertRaises(ValueError):
+            optimizer.optimize_stock(self.parts, stock=[{'width': 10, 'height': 2070}])
+        with self.assertRaises(ValueError):
+            optimizer.optimize_stock(self.parts, engine='staged')
+
+
+class TestRepeatedPatterns(NestingTestCase):
+    """Test schemi di taglio ripetuti (produzione in serie)"""
+    
+    CABINET = [
+        {'width': 720, 'height': 560, 'quantity': 2, 'name': 'Fianco'},
+        {'width': 764, 'height': 540, 'quantity': 3, 'name': 'Ripiano'},
+        {'width': 796, 'height': 716, 'quantity': 2, 'name': 'Anta'},
+        {'width': 764, 'height': 100, 'quantity': 2, 'name': 'Traverso'},
+        {'width': 800, 'height': 560, 'quantity': 1, 'name': 'Fondo'},
+    ]
+    
+    def batch(self, count):
+        """Parti di count mobili identici"""
+        return [dict(part, quantity=part['quantity'] * count) for part in self.CABINET]
+    
+    def test_patterns_group_identical_sheets(self):
+        """Test raggruppamento dei fogli con layout identico"""
+        optimizer = NestingOptimizer()
+        result = optimizer.optimize(self.batch(10))
+        patterns = result['patterns']
+        
+        self.assertEqual(sum(p['count'] for p in patterns), result['sheets_count'])
+        self.assertEqual(
+            sorted(i for p in patterns for i in p['sheet_ids']), list(range(result['sheets_count']))
+        )
+        signatures = set()
+        for pattern in patterns:
+            signature = layout_signature(pattern['sheet'])
+            for sheet_id in pattern['sheet_ids']:
+                self.assertEqual(layout_signature(result['sheets'][sheet_id]), signature)
+            signatures.add(signature)
+        self.assertEqual(len(signatures), len(patterns))
+    
+    def test_signature_ignores_placement_order(self):
+        """Test forma canonica indipendente dall'ordine dei pezzi"""
+        result = NestingOptimizer().optimize(self.CABINET)
+        sheet = result['sheets'][0]
+        shuffled = dict(sheet, id=99, placements=list(reversed(sheet['placements'])))
+        
+        patterns = sheet_patterns([sheet, shuffled])
+        self.assertEqual(len(patterns), 1)
+        self.assertEqual(patterns[0]['sheet_ids'], [sheet['id'], 99])
+    
+    def test_reuse_patterns(self):
+        """Test sottoinsieme ripetuto impaccato una volta e riusato"""
+        optimizer = NestingOptimizer()
+        plain = optimizer.optimize(self.batch(12))
+        result = optimizer.optimize(self.batch(12), reuse_patterns=True)
+        
+        self.assertValidLayout(optimizer, result, plain['parts_count'])
+        self.assertLessEqual(result['sheets_count'], plain['sheets_count'])
+        self.assertLess(len(result['patterns']), len(plain['patterns']))
+        self.assertTrue(any(p['count'] > 1 for p in result['patterns']))
+        
+        for sheet_id, sheet in enumerate(result['sheets']):
+            self.assertEqual(sheet['id'], sheet_id)
+            parts = [node['placement'] for node in iter_nodes(sheet['cut_tree'], 'part')]
+            self.assertEqual(sorted(parts), sorted(sheet['placements']))
+        
+        # Le copie di uno schema sono indipendenti
+        pattern = next(p for p in result['patterns'] if p['count'] > 1)
+        first, second = (result['sheets'][i] for i in pattern['sheet_ids'][:2])
+        self.assertIsNot(first['cut_tree'], second['cut_tree'])
+        self.assertIsNot(first['placements'], second['placements'])
+        for leaf in second['free_rectangles']:
+            self.assertIn(leaf, list(iter_nodes(second['cut_tree'], 'free')))
+    
+    def test_patterns_within_tolerance(self):
+        """Test layout a schemi scartato se costa più fogli del packing normale"""
+        optimizer = NestingOptimizer()
+        parts = [dict(p, quantity=p['quantity'] * 4) for p in generate_dataset('kitchen', 100)]
+        plain = optimizer.optimize(parts)
+        result = optimizer.optimize(parts, reuse_patterns=True)
+        stats = result['statistics']
+        
+        self.assertGreater(stats['pattern_sheets'], stats['plain_sheets'])
+        self.assertFalse(stats['patterns_used'])
+        self.assertEqual(stats['plain_sheets'], plain['sheets_count'])
+        self.assertEqual(result['sheets_count'], plain['sheets_count'])
+        self.assertValidLayout(optimizer, result, plain['parts_count'])
+        
+        # Schemi tenuti quando non costano fogli
+        kept = optimizer.optimize(self.batch(12), reuse_patterns=True)['statistics']
+        self.assertTrue(kept['patterns_used'])
+        self.assertLessEqual(kept['pattern_sheets'], kept['plain_sheets'])
+        self.assertNotIn('patterns_used', plain['statistics'])
+    
+    def test_reuse_patterns_with_repack(self):
+        """Test ripasso sui fogli copiati"""
+        optimizer = NestingOptimizer()
+        result = optimizer.optimize(self.batch(6), engine='skyline', reuse_patterns=True, repack_time_s=0.5)
+        self.assertValidLayout(optimizer, result, 60)
+    
+    def test_no_common_divisor(self):
+        """Test quantità senza divisore comune: packing dell'intero job"""
+        optimizer = NestingOptimizer()
+        plain = optimizer.optimize(self.KITCHEN_PARTS)
+        result = optimizer.optimize(self.KITCHEN_PARTS, reuse_patterns=True)
+        
+        self.assertEqual(
+            [s['placements'] for s in result['sheets']],
+            [s['placements'] for s in plain['sheets']]
+        )
+
+
+class TestPolygonNesting(NestingTestCase):
+    """Test nesting di parti sagomate con no-fit polygon"""
+    
+    @staticmethod
+    def arch(width, height, rise, steps=16):
+        """Sagoma di anta ad arco"""
+        points = [(0, 0), (width, 0), (width, height - rise)]
+        for i in range(1, steps):
+            angle = math.pi * i / steps
+            points.append((width / 2 + width / 2 * math.cos(angle), height - rise + rise * math.sin(angle)))
+        points.append((0, height - rise))
+        return points
+    
+    def shaped_parts(self):
+        """Ante ad arco, top a mezzaluna, angoli triangolari e fianchi"""
+        half_round = [(300 + 300 * math.cos(math.pi * i / 16), 300 * math.sin(math.pi * i / 16)) for i in range(17)]
+        return [
+            {'outline': self.arch(400, 700, 150), 'quantity': 10, 'name': 'Anta ad arco'},
+            {'outline': half_round, 'quantity': 8, 'name': 'Top mezzaluna'},
+            {'outline': [(0, 0), (600, 0), (0, 500)], 'quantity': 12, 'name': 'Angolo'},
+            {'width': 720, 'height': 560, 'quantity': 6, 'name': 'Fianco'},
+        ]
+    
+    def assertValidPolygonLayout(self, optimizer, result, expected_parts):
+        """Verifica sagome dentro i margini e senza sovrapposizioni"""
+        placed = 0
+        for sheet in result['sheets']:
+            placements = sheet['placements']
+            placed += len(placements)
+            for p in placements:
+                xs = [x for x, _ in p.outline]
+                ys = [y for _, y in p.outline]
+                self.assertGreaterEqual(min(xs), optimizer.margin - 1e-6)
+                self.assertGreaterEqual(min(ys), optimizer.margin - 1e-6)
+                # Lama riservata anche verso i bordi destro e superiore
+                self.assertLessEqual(max(xs) + optimizer.blade_width, sheet['width'] - optimizer.margin + 1e-6)
+                self.assertLessEqual(max(ys) + optimizer.blade_width, sheet['height'] - optimizer.margin + 1e-6)
+                self.assertAlmostEqual(max(xs) - min(xs), p.width)
+            for i, a in enumerate(placements):
+                for b in placements[i + 1:]:
+                    self.assertFalse(_polygons_overlap(a.outline, b.outline), f"Sovrapposizione {a.name} / {b.name}")
+        self.assertEqual(placed, expected_parts)
+    
+    def test_beats_bounding_box_nesting(self):
+        """Test sagome più fitte del nesting dei riquadri di ingombro"""
+        parts = self.shaped_parts()
+        optimizer = PolygonNestingOptimizer()
+        result = optimizer.optimize(parts)
+        self.assertValidPolygonLayout(optimizer, result, 36)
+        
+        boxes = []
+        for part in parts:
+            if 'outline' in part:
+                xs = [x for x, _ in part['outline']]
+                ys = [y for _, y in part['outline']]
+                boxes.append(dict(part, width=max(xs) - min(xs), height=max(ys) - min(ys)))
+            else:
+                boxes.append(part)
+        boxed = NestingOptimizer().optimize(boxes, engine='maxrects', bin_mode='best_fit')
+        
+        self.assertLess(result['sheets_count'], boxed['sheets_count'])
+        stats = result['statistics']
+        self.assertLess(stats['used_area_m2'], stats['bounding_box_area_m2'])
+    
+    def test_rectangles_fast_path(self):
+        """Test coppie di rettangoli senza inviluppi convessi"""
+        optimizer = PolygonNestingOptimizer()
+        with mock.patch('nesting_polygon._convex_hull', wraps=nesting_polygon._convex_hull) as hull:
+            result = optimizer.optimize(self.KITCHEN_PARTS)
+        
+        hull.assert_not_called()
+        self.assertValidPolygonLayout(optimizer, result, 45)
+        
+        # Lo spazio tra due pezzi affiancati è la lama
+        placements = result['sheets'][0]['placements']
+        gaps = [b.x - (a.x + a.width) for a in placements for b in placements
+                if a.y == b.y and b.x > a.x]
+        self.assertEqual(min(gaps), optimizer.blade_width)
+    
+    def test_nfp_cache_bounded_lru(self):
+        """Test cache NFP per coppia e rotazione, limitata"""
+        optimizer = PolygonNestingOptimizer()
+        optimizer.optimize(self.shaped_parts())
+        misses = optimizer.nfp_misses
+        self.assertGreater(optimizer.nfp_hits, misses)
+        
+        result = optimizer.optimize(self.shaped_parts())
+        self.assertEqual(optimizer.nfp_misses, misses)
+        self.assertEqual(result['statistics']['nfp_cache_misses'], misses)
+        
+        small = PolygonNestingOptimizer(nfp_cache_size=8)
+        small_result = small.optimize(self.shaped_parts())
+        self.assertLessEqual(len(small._nfp_cache), 8)
+        self.assertEqual(small_result['sheets_count'], result['sheets_count'])
+    
+    def test_concave_parts_use_notches(self):
+        """Test pezzi nella rientranza di un top ad angolo a L"""
+        corner = [(0, 0), (1000, 0), (1000, 300), (300, 300), (300, 1000), (0, 1000)]
+        optimizer = PolygonNestingOptimizer(1050, 1050)
+        result = optimizer.optimize([
+            {'outline': corner, 'quantity': 1, 'name': 'Top ad angolo'},
+            {'width': 500, 'height': 500, 'quantity': 1, 'name': 'Ripiano'}
+        ])
+        
+        self.assertEqual(result['sheets_count'], 1)
+        self.assertValidPolygonLayout(optimizer, result, 2)
+        
+        # Sagome concave tra loro: L e U ruotate
+        u_shape = [(0, 0), (900, 0), (900, 600), (600, 600), (600, 200), (300, 200), (300, 600), (0, 600)]
+        optimizer = PolygonNestingOptimizer()
+        result = optimizer.optimize([
+            {'outline': corner, 'quantity': 8, 'name': 'Top ad angolo'},
+            {'outline': u_shape, 'quantity': 6, 'name': 'Frontale a U'},
+            {'width': 250, 'height': 250, 'quantity': 10, 'name': 'Tassello'}
+        ])
+        self.assertValidPolygonLayout(optimizer, result, 24)
+    
+    def test_full_sheets_skipped(self):
+        """Test fogli pieni scartati senza cercare posizioni"""
+        optimizer = PolygonNestingOptimizer()
+        parts = [{'width': 1000, 'height': 1000, 'quantity': 60, 'name': 'Ripiano'}]
+        with mock.patch.object(PolygonNestingOptimizer, '_place_in_sheet', autospec=True,
+                               side_effect=PolygonNestingOptimizer._place_in_sheet) as place:
+            result = optimizer.optimize(parts)
+        
+        self.assertValidPolygonLayout(optimizer, result, 60)
+        # Ogni copia prova al massimo l'ultimo foglio e uno nuovo
+        self.assertLessEqual(place.call_count, 60 + result['sheets_count'])
+    
+    def test_without_rotation(self):
+        """Test sagome non ruotate con rotazione disattivata"""
+        optimizer = PolygonNestingOptimizer()
+        result = optimizer.optimize(self.shaped_parts(), allow_rotation=False)
+        
+        self.assertValidPolygonLayout(optimizer, result, 36)
+        for sheet in result['sheets']:
+            self.assertTrue(all(p.rotation == 0 for p in sheet['placements']))
+    
+    def test_invalid_parts(self):
+        """Test sagome non valide"""
+        optimizer = PolygonNestingOptimizer()
+        with self.assertRaises(ValueError):
+            optimizer.optimize([{'outline': [(0, 0), (100, 0)]}])
+        with self.assertRaises(ValueError):
+            optimizer.optimize([{'outline': [(0, 0), (100, 0), (200, 0)]}])
+        with self.assertRaises(ValueError):
+            optimizer.optimize([{'name': 'Senza misure'}])
+
+
+class TestMaxRectsEngine(NestingTestCase):
+    """Test motore MaxRects"""
+    
+    def test_all_heuristics_valid(self):
+        """Test layout valido per ogni euristica"""
+        optimizer = NestingOptimizer()
+        for heuristic in MAXRECTS_HEURISTICS:
+            result = optimizer.optimize(self.KITCHEN_PARTS, engine='maxrects', heuristic=heuristic)
+            self.assertValidLayout(optimizer, result, 45)
+    
+    def test_not_worse_than_guillotine(self):
+        """Test MaxRects non usa più pannelli del guillotine"""
+        optimizer = NestingOptimizer()
+        guillotine = optimizer.optimize(self.KITCHEN_PARTS)
+        maxrects = optimizer.optimize(self.KITCHEN_PARTS, engine='maxrects')
+        
+        self.assertLessEqual(maxrects['sheets_count'], guillotine['sheets_count'])
+    
+    def test_free_rectangles_pruned(self):
+        """Test nessun rettangolo libero contenuto in un altro"""
+        optimizer = NestingOptimizer()
+        result = optimizer.optimize(self.KITCHEN_PARTS, engine='maxrects')
+        
+        for sheet in result['sheets']:
+            free = sheet['free_rectangles']
+            for i, a in enumerate(free):
+                for j, b in enumerate(free):
+                    if i == j:
+                        continue
+                    contained = (
+                        b['x'] <= a['x'] and b['y'] <= a['y'] and
+                        b['x'] + b['width'] >= a['x'] + a['width'] and
+                        b['y'] + b['height'] >= a['y'] + a['height']
+                    )
+                    self.assertFalse(contained)
+    
+    def test_unknown_heuristic(self):
+        """Test euristica sconosciuta"""
+        with self.assertRaises(ValueError):
+            NestingOptimizer().optimize(self.KITCHEN_PARTS, engine='maxrects', heuristic='random')
+
+
+class TestOpenBinModes(NestingTestCase):
+    """Test modalità open-bin su più fogli"""
+    
+    def test_all_modes_valid(self):
+        """Test layout valido per ogni modalità e motore"""
+        optimizer = NestingOptimizer()
+        for engine in ('guillotine', 'maxrects'):
+            for bin_mode in BIN_MODES:
+                result = optimizer.optimize(self.KITCHEN_PARTS, engine=engine, bin_mode=bin_mode)
+                self.assertValidLayout(optimizer, result, 45)
+    
+    def test_best_fit_reuses_earlier_sheets(self):
+        """Test best-fit riempie i vuoti dei fogli precedenti"""
+        optimizer = NestingOptimizer()
+        parts = [
+            {'width': 2700, 'height': 1500, 'quantity': 3, 'name': 'Grande'},
+            {'width': 2700, 'height': 400, 'quantity': 3, 'name': 'Striscia'},
+        ]
+        single = optimizer.optimize(parts, engine='maxrects')
+        best_fit = optimizer.optimize(parts, engine='maxrects', bin_mode='best_fit')
+        
+        self.assertEqual(single['sheets_count'], 4)
+        self.assertEqual(best_fit['sheets_count'], 3)
+    
+    def test_free_index_rejects_oversized(self):
+        """Test indice rettangolo libero più grande"""
+        optimizer = NestingOptimizer()
+        sheet = optimizer._new_sheet(0)
+        sheet['max_free'] = (500, 500, 250000)
+        
+        small = Rectangle(400, 400, 'a', 1, 'a')
+        large = Rectangle(600, 100, 'b', 1, 'b')
+        self.assertTrue(optimizer._may_fit(small, sheet, True))
+        self.assertFalse(optimizer._may_fit(large, sheet, True))
+    
+    def test_unknown_bin_mode(self):
+        """Test modalità sconosciuta"""
+        with self.assertRaises(ValueError):
+            NestingOptimizer().optimize(self.KITCHEN_PARTS, bin_mode='any_fit')
+
+
+class TestParallelSearch(NestingTestCase):
+    """Test ricerca multi-start"""
+    
+    def test_parallel_not_worse_than_greedy(self):
+        """Test ricerca parallela non peggiora il greedy di default"""
+        optimizer = NestingOptimizer()
+        greedy = optimizer.optimize(self.KITCHEN_PARTS)
+        best = optimizer.optimize_parallel(self.KITCHEN_PARTS, time_budget_s=10, workers=2)
+        
+        self.assertLessEqual(best['sheets_count'], greedy['sheets_count'])
+        self.assertGreater(best['strategies_evaluated'], 0)
+        self.assertIn('strategy', best)
+        self.assertValidLayout(optimizer, best, 45)
+    
+    def test_sequential_fallback(self):
+        """Test fallback sequenziale senza processi worker"""
+        optimizer = NestingOptimizer()
+        with mock.patch('nesting._processes_available', return_value=False):
+            best = optimizer.optimize_parallel(self.KITCHEN_PARTS, time_budget_s=0)
+        
+        # Budget esaurito: almeno una strategia viene comunque valutata
+        self.assertEqual(best['strategies_evaluated'], 1)
+        self.assertValidLayout(optimizer, best, 45)
+    
+    def test_strategy_matches_optimize(self):
+        """Test strategia del pool uguale a optimize() con gli stessi parametri"""
+        optimizer = NestingOptimizer()
+        strategy = optimizer._parallel_strategies(1)[-1]
+        result = nesting._optimize_strategy(optimizer._settings(), self.KITCHEN_PARTS, True, strategy)
+        expected = optimizer.optimize(self.KITCHEN_PARTS, **strategy)
+        
+        self.assertEqual(result['strategy'], strategy)
+        self.assertEqual(result['statistics'], expected['statistics'])
+        self.assertEqual(
+            [s['placements'] for s in result['sheets']],
+            [s['placements'] for s in expected['sheets']]
+        )
+    
+    def test_strategy_stops_with_search(self):
+        """Test strategia interrotta al pezzo successivo alla fine della ricerca"""
+        checks = []
+        
+        class Stop:
+            def is_set(self):
+                checks.append(1)
+                return len(checks) > 10
+        
+        optimizer = NestingOptimizer()
+        strategy = optimizer._parallel_strategies(0)[0]
+        with mock.patch('nesting._search_stop', Stop()):
+            result = nesting._optimize_strategy(optimizer._settings(), self.KITCHEN_PARTS, True, strategy)
+        
+        self.assertIsNone(result)
+        self.assertEqual(len(checks), 11)
+    
+    def test_pool_idle_after_return(self):
+        """Test nessun processo del pool resta occupato dopo il ritorno"""
+        parts = [
+            {'width': 300, 'height': 200, 'quantity': 3000, 'name': 'Cassetto'},
+            {'width': 120, 'height': 90, 'quantity': 3000, 'name': 'Listello'},
+        ]
+        optimizer = NestingOptimizer()
+        optimizer.optimize_parallel(parts, time_budget_s=0.5, workers=2, random_starts=0)
+        
+        # Senza interruzione le strategie in corso durerebbero ancora secondi
+        deadline = time.perf_counter() + 3
+        while nesting.multiprocessing.active_children() and time.perf_counter() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(nesting.multiprocessing.active_children(), [])
+
+
+class TestPartTable(NestingTestCase):
+    """Test tabella compatta dei tipi di parte"""
+    
+    def test_counts_and_area(self):
+        """Test quantità e area totale"""
+        table = PartTable.from_parts(self.KITCHEN_PARTS)
+        
+        self.assertEqual(len(table), 5)
+        self.assertEqual(table.total_count(), 45)
+        self.assertEqual(table.total_area(), sum(
+            p['width'] * p['height'] * p['quantity'] for p in self.KITCHEN_PARTS
+        ))
+    
+    def test_pieces_share_type_objects(self):
+        """Test i pezzi riusano il Rectangle del tipo"""
+        table = PartTable.from_parts(self.KITCHEN_PARTS)
+        pieces = list(table.iter_pieces())
+        
+        self.assertEqual(len(pieces), 45)
+        self.assertEqual(len({id(p) for p in pieces}), 5)
+        # Area decrescente: prima i Top
+        self.assertEqual(pieces[0].name, 'Top')
+    
+    def test_placements_reference_type_index(self):
+        """Test i placement riferiscono il tipo per indice"""
+        optimizer = NestingOptimizer()
+        table = PartTable.from_parts(self.KITCHEN_PARTS)
+        result = optimizer.optimize(table, engine='maxrects')
+        
+        self.assertIs(result['part_table'], table)
+        for sheet in result['sheets']:
+            for p in sheet['placements']:
+                self.assertIs(p.name, table.names[p.id])
+    
+    def test_random_order_is_seeded(self):
+        """Test ordine casuale riproducibile"""
+        table = PartTable.from_parts(self.KITCHEN_PARTS)
+        first = [p.id for p in table.iter_pieces('random', seed=3)]
+        second = [p.id for p in table.iter_pieces('random', seed=3)]
+        
+        self.assertEqual(first, second)
+        self.assertEqual(sorted(first), sorted(p.id for p in table.iter_pieces()))
+
+
+class TestStreamingApi(NestingTestCase):
+    """Test API in streaming"""
+    
+    def test_stream_matches_optimize(self):
+        """Test lo stream produce gli stessi fogli di optimize()"""
+        optimizer = NestingOptimizer()
+        result = optimizer.optimize(self.KITCHEN_PARTS)
+        items = list(optimizer.optimize_iter(self.KITCHEN_PARTS))
+        
+        self.assertEqual([item['sheet']['placements'] for item in items],
+                         [sheet['placements'] for sheet in result['sheets']])
+        self.assertEqual(items[-1]['statistics']['parts_placed'], 45)
+        self.assertEqual(items[-1]['statistics']['sheets_closed'], result['sheets_count'])
+    
+    def test_sheets_yielded_before_end(self):
+        """Test i fogli vengono restituiti appena chiusi"""
+        optimizer = NestingOptimizer()
+        stream = optimizer.optimize_iter(self.KITCHEN_PARTS, engine='maxrects',
+                                         bin_mode='best_fit', max_open_sheets=2)
+        first = next(stream)
+        
+        self.assertEqual(first['sheet']['id'], 0)
+        self.assertLess(first['statistics']['parts_placed'], 45)
+        rest = list(stream)
+        self.assertEqual(rest[-1]['statistics']['parts_placed'], 45)
+        self.assertEqual([item['sheet']['id'] for item in rest], list(range(1, len(rest) + 1)))
+
+
+class TestLowerBounds(NestingTestCase):
+    """Test limiti inferiori sul numero di pannelli"""
+    
+    def test_area_bound(self):
+        """Test limite L1 sull'area"""
+        optimizer = NestingOptimizer()
+        parts = [{'width': 500, 'height': 500, 'quantity': 30, 'name': 'Quadrato'}]
+        l1, l2 = optimizer.lower_bounds(parts)
+        
+        # 30 x 504² = 7.62 m² su 2780x2050 = 5.70 m² -> 2 pannelli
+        self.assertEqual(l1, 2)
+        self.assertEqual(l2, 2)
+    
+    def test_large_item_bound(self):
+        """Test limite L2 sui pezzi grandi"""
+        optimizer = NestingOptimizer()
+        parts = [
+            {'width': 1500, 'height': 1100, 'quantity': 3, 'name': 'Grande'},
+            {'width': 200, 'height': 200, 'quantity': 1, 'name': 'Piccolo'},
+        ]
+        l1, l2 = optimizer.lower_bounds(parts, allow_rotation=False)
+        
+        self.assertEqual(l1, 1)
+        self.assertEqual(l2, 3)
+        self.assertEqual(optimizer.optimize(parts, allow_rotation=False)['sheets_count'], 3)
+    
+    def test_bound_never_exceeds_result(self):
+        """Test il limite non supera mai il risultato"""
+        optimizer = NestingOptimizer()
+        for engine in ('guillotine', 'maxrects'):
+            stats = optimizer.optimize(self.KITCHEN_PARTS, engine=engine)['statistics']
+            self.assertLessEqual(stats['lower_bound_sheets'], stats['total_sheets'])
+            self.assertEqual(stats['gap_to_lower_bound'], stats['total_sheets'] - stats['lower_bound_sheets'])
+    
+    def test_parallel_stops_at_bound(self):
+        """Test la ricerca si ferma al limite inferiore"""
+        optimizer = NestingOptimizer()
+        parts = [{'width': 600, 'height': 400, 'quantity': 4, 'name': 'Ripiano'}]
+        with mock.patch('nesting._processes_available', return_value=False):
+            best = optimizer.optimize_parallel(parts, time_budget_s=30)
+        
+        self.assertTrue(best['reached_lower_bound'])
+        self.assertEqual(best['strategies_evaluated'], 1)
+
+
+class TestAnytimeSearch(NestingTestCase):
+    """Test ottimizzazione anytime"""
+    
+    def test_progressive_results_improve(self):
+        """Test ogni risultato è migliore del precedente"""
+        optimizer = NestingOptimizer()
+        results = list(optimizer.optimize_progressive(self.KITCHEN_PARTS, deadline_s=0.5))
+        
+        self.assertGreaterEqual(len(results), 1)
+        self.assertEqual(results[0]['iteration'], 0)
+        ranks = [optimizer._solution_rank(r['sheets']) for r in results]
+        self.assertEqual(ranks, sorted(ranks, reverse=True))
+        self.assertEqual(len(set(ranks)), len(ranks))
+        for result in results:
+            self.assertValidLayout(optimizer, result, 45)
+    
+    def test_callback_can_accept(self):
+        """Test il callback può fermare la ricerca"""
+        optimizer = NestingOptimizer()
+        seen = []
+        best = optimizer.optimize_anytime(
+            self.KITCHEN_PARTS, deadline_s=5, callback=lambda r: seen.append(r) or True
+        )
+        
+        self.assertEqual(len(seen), 1)
+        self.assertIs(best, seen[0])
+        self.assertEqual(best['iteration'], 0)
+    
+    def test_not_worse_than_greedy(self):
+        """Test il risultato finale non peggiora il greedy"""
+        optimizer = NestingOptimizer()
+        greedy = optimizer.optimize(self.KITCHEN_PARTS, engine='maxrects', bin_mode='best_fit')
+        best = optimizer.optimize_anytime(self.KITCHEN_PARTS, deadline_s=0.3)
+        
+        self.assertLessEqual(best['sheets_count'], greedy['sheets_count'])
+
+
+class TestNestingSession(NestingTestCase):
+    """Test sessione di nesting incrementale"""
+    
+    def test_add_parts_fills_existing_sheets(self):
+        """Test un pezzo extra usa lo spazio dei fogli esistenti"""
+        session = NestingSession()
+        session.add_parts(self.KITCHEN_PARTS)
+        sheets_before = len(session.sheets)
+        
+        touched = session.add_parts([{'width': 764, 'height': 540, 'quantity': 1, 'name': 'Ripiano extra'}])
+        
+        self.assertEqual(len(touched), 1)
+        self.assertEqual(len(session.sheets), sheets_before)
+        self.assertValidLayout(session.optimizer, session.result(), 46)
+    
+    def test_released_sheets_are_stable(self):
+        """Test i fogli rilasciati non cambiano"""
+        session = NestingSession()
+        session.add_parts(self.KITCHEN_PARTS)
+        released = session.sheets[0]
+        snapshot = list(released['placements'])
+        session.release_sheets([released['id']])
+        
+        session.add_parts([{'width': 300, 'height': 200, 'quantity': 20, 'name': 'Cassetto'}])
+        # I fianchi del foglio rilasciato non si possono rimuovere
+        movable = 12 - sum(p.name == 'Fianco' for p in snapshot)
+        with self.assertRaises(ValueError):
+            session.remove_parts([{'name': 'Fianco', 'quantity': movable + 1}])
+        self.assertEqual(session.result()['parts_count'], 65)
+        
+        self.assertEqual(session.remove_parts([{'name': 'Fianco', 'quantity': movable}]), movable)
+        session.repack()
+        
+        self.assertEqual(released['placements'], snapshot)
+        self.assertIn(released, session.sheets)
+    
+    def test_remove_parts_keeps_layout(self):
+        """Test la rimozione non sposta gli altri pezzi"""
+        session = NestingSession()
+        session.add_parts(self.KITCHEN_PARTS)
+        others = {
+            sheet['id']: [p for p in sheet['placements'] if p.name != 'Traverso']
+            for sheet in session.sheets
+        }
+        
+        removed = session.remove_parts([{'name': 'Traverso', 'quantity': 12}])
+        
+        self.assertEqual(removed, 12)
+        for sheet in session.sheets:
+            self.assertEqual(sheet['placements'], others[sheet['id']])
+        self.assertEqual(session.result()['parts_count'], 33)
+        
+        # Troppi pezzi richiesti: errore e layout invariato
+        layout = [list(sheet['placements']) for sheet in session.sheets]
+        with self.assertRaises(ValueError):
+            session.remove_parts([{'name': 'Anta', 'quantity': 2}, {'name': 'Traverso', 'quantity': 1}])
+        self.assertEqual([sheet['placements'] for sheet in session.sheets], layout)
+        self.assertEqual(session.result()['parts_count'], 33)
+        
+        # Lo spazio liberato è di nuovo disponibile
+        session.add_parts([{'width': 764, 'height': 100, 'quantity': 12, 'name': 'Traverso'}])
+        self.assertEqual(len(session.sheets), len(others))
+    
+    def test_matches_full_optimize(self):
+        """Test sessione e optimize() producono lo stesso numero di fogli"""
+        session = NestingSession()
+        session.add_parts(self.KITCHEN_PARTS)
+        result = NestingOptimizer().optimize(self.KITCHEN_PARTS, engine='maxrects', bin_mode='best_fit')
+        
+        self.assertEqual(session.result()['sheets_count'], result['sheets_count'])
+        self.assertEqual(set(session.result()), set(result))
+        self.assertEqual(sum(p['count'] for p in session.result()['patterns']), result['sheets_count'])
+
+
+class TestNestingCache(NestingTestCase):
+    """Test cache su disco dei risultati"""
+    
+    def setUp(self):
+        """Setup test"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = NestingCache(self.tmp.name)
+    
+    def tearDown(self):
+        """Cleanup test"""
+        self.tmp.cleanup()
+    
+    def test_repeat_job_hits_cache(self):
+        """Test un job ripetuto viene letto dalla cache"""
+        optimizer = NestingOptimizer(cache=self.cache)
+        first = optimizer.optimize(self.KITCHEN_PARTS, engine='maxrects')
+        second = optimizer.optimize(list(reversed(self.KITCHEN_PARTS)), engine='maxrects')
+        
+        self.assertFalse(first['from_cache'])
+        self.assertTrue(second['from_cache'])
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(self.cache.misses, 1)
+        # Stesso layout; gli id si riferiscono alla lista di ciascun chiamante
+        for a, b in zip(first['sheets'], second['sheets']):
+            self.assertEqual(
+                [p._replace(id=None) for p in a['placements']],
+                [p._replace(id=None) for p in b['placements']]
+            )
+            for placement in b['placements']:
+                self.assertEqual(second['part_table'].names[placement.id], placement.name)
+        self.assertEqual(first['statistics'], second['statistics'])
+    
+    def test_cache_keeps_caller_ids(self):
+        """Test id e ordine dei piazzamenti uguali con e senza cache"""
+        parts = self.KITCHEN_PARTS + [dict(self.KITCHEN_PARTS[0], quantity=1)]
+        plain = NestingOptimizer().optimize(parts)
+        stored = NestingOptimizer(cache=self.cache).optimize(parts)
+        cached = NestingOptimizer(cache=self.cache).optimize(parts)
+        
+        self.assertTrue(cached['from_cache'])
+        for result in (stored, cached):
+            self.assertEqual(
+                [s['placements'] for s in result['sheets']],
+                [s['placements'] for s in plain['sheets']]
+            )
+            self.assertEqual(list(result['part_table'].names), [p['name'] for p in parts])
+        
+        # Tipi duplicati: ogni tipo riceve esattamente la sua quantità
+        placed = [0] * len(parts)
+        for sheet in cached['sheets']:
+            for placement in sheet['placements']:
+                placed[placement.id] += 1
+        self.assertEqual(placed, [p['quantity'] for p in parts])
+    
+    def test_repack_budget_not_in_key(self):
+        """Test il tempo del ripasso non fa parte della chiave"""
+        optimizer = NestingOptimizer(cache=self.cache)
+        optimizer.optimize(self.KITCHEN_PARTS, repack_time_s=0.1)
+        self.assertTrue(optimizer.optimize(self.KITCHEN_PARTS, repack_time_s=0.2)['from_cache'])
+        self.assertFalse(optimizer.optimize(self.KITCHEN_PARTS)['from_cache'])
+    
+    def test_parameters_change_key(self):
+        """Test lama, margine e motore fanno parte della chiave"""
+        optimizer = NestingOptimizer(cache=self.cache)
+        optimizer.optimize(self.KITCHEN_PARTS)
+        optimizer.blade_width = 3
+        optimizer.optimize(self.KITCHEN_PARTS)
+        optimizer.optimize(self.KITCHEN_PARTS, engine='maxrects')
+        
+        self.assertEqual(self.cache.hits, 0)
+        self.assertEqual(self.cache.stats()['entries'], 3)
+    
+    def test_lru_eviction(self):
+        """Test le voci meno recenti vengono eliminate"""
+        cache = NestingCache(self.tmp.name, max_entries=2)
+        cache.put('a', {'v': 1})
+        cache.put('b', {'v': 2})
+        os.utime(os.path.join(self.tmp.name, 'a.json'), (1, 1))
+        os.utime(os.path.join(self.tmp.name, 'b.json'), (2, 2))
+        cache.get('a')
+        cache.put('c', {'v': 3})
+        
+        self.assertEqual(cache.stats()['entries'], 2)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), {'v': 1})
+    
+    def test_failed_write_leaves_no_temp_file(self):
+        """Test scrittura fallita: nessun file temporaneo orfano"""
+        with self.assertLogs('FurnitureAI.NestingCache', 'WARNING'):
+            self.assertFalse(self.cache.put('a', {'v': {1, 2}}))
+        
+        self.assertEqual(os.listdir(self.tmp.name), [])
+        self.assertIsNone(self.cache.get('a'))
+
+
+class TestNestingWorker(NestingTestCase):
+    """Test worker di nesting fuori processo"""
+    
+    BIG_PARTS = [
+        {'width': 300, 'height': 200, 'quantity': 3000, 'name': 'Cassetto'},
+        {'width': 120, 'height': 90, 'quantity': 3000, 'name': 'Listello'},
+    ]
+    
+    def setUp(self):
+        """Setup test"""
+        self.tmp = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        """Cleanup test"""
+        self.tmp.cleanup()
+    
+    def test_run_job_matches_optimize(self):
+        """Test job in streaming uguale a optimize() e ricostruibile"""
+        progress = []
+        data = run_job(
+            {'parts': self.KITCHEN_PARTS, 'options': {'engine': 'maxrects', 'bin_mode': 'best_fit'}},
+            progress.append
+        )
+        expected = NestingOptimizer().optimize(self.KITCHEN_PARTS, engine='maxrects', bin_mode='best_fit')
+        
+        json.dumps(data)
+        result = restore_result(data)
+        self.assertEqual(result['statistics'], expected['statistics'])
+        self.assertEqual(
+            [s['placements'] for s in result['sheets']],
+            [s['placements'] for s in expected['sheets']]
+        )
+        self.assertEqual(progress, [])
+    
+    def test_run_job_cache_shared_with_optimize(self):
+        """Test stessa chiave di cache di optimize()"""
+        cache = NestingCache(self.tmp.name)
+        NestingOptimizer(cache=cache).optimize(self.KITCHEN_PARTS, repack_time_s=0.1)
+        data = run_job({'parts': self.KITCHEN_PARTS, 'options': {'repack_time_s': 0.1}}, cache=cache)
+        
+        self.assertTrue(data['from_cache'])
+        self.assertEqual(cache.hits, 1)
+    
+    def test_run_job_cancelled(self):
+        """Test annullamento verificato a ogni pezzo"""
+        checks = []
+        
+        def cancelled():
+            checks.append(1)
+            return len(checks) > 2
+        
+        with self.assertRaises(NestingCancelled):
+            run_job({'parts': self.KITCHEN_PARTS}, cancelled=cancelled)
+        self.assertEqual(len(checks), 3)
+    
+    def test_worker_process(self):
+        """Test job accodati, annullati e completati dal processo worker"""
+        events = []
+        finished = threading.Event()
+        
+        def on_event(event):
+            events.append(event)
+            if event['job_id'] == 3 and event['event'] in ('done', 'error'):
+                finished.set()
+        
+        client = NestingWorkerClient(on_event)
+        try:
+            slow = client.submit(self.BIG_PARTS, engine='maxrects', bin_mode='best_fit')
+            queued = client.submit(self.KITCHEN_PARTS)
+            client.cancel(queued)
+            client.cancel(slow)
+            last = client.submit(self.KITCHEN_PARTS, NestingOptimizer(3050, 1300), engine='skyline')
+            self.assertTrue(finished.wait(30))
+        finally:
+            client.stop()
+        
+        self.assertFalse(client.running)
+        final = {}
+        for event in events:
+            final[event['job_id']] = event
+        self.assertEqual(final[slow]['event'], 'cancelled')
+        self.assertEqual(final[queued]['event'], 'cancelled')
+        self.assertEqual(final[last]['event'], 'done')
+        
+        result = restore_result(final[last]['result'])
+        expected = NestingOptimizer(3050, 1300).optimize(self.KITCHEN_PARTS, engine='skyline')
+        self.assertEqual(result['sheets_count'], expected['sheets_count'])
+        self.assertValidLayout(NestingOptimizer(3050, 1300), result, 45)
+    
+    def test_worker_exits_when_client_closes(self):
+        """Test processo worker chiuso alla disconnessione del client"""
+        started = threading.Event()
+        
+        def on_event(event):
+            if event['event'] == 'started':
+                started.set()
+        
+        client = NestingWorkerClient(on_event)
+        try:
+            client.submit(self.BIG_PARTS, engine='maxrects', bin_mode='best_fit')
+            self.assertTrue(started.wait(30))
+            process = client._process
+            
+            # Connessione chiusa senza 'shutdown' (es. Fusion terminato)
+            client._closing = True
+            client._conn.close()
+            self.assertEqual(process.wait(10), 0)
+        finally:
+            client._terminate()
+        
+        self.assertFalse(client.running)
+    
+    def test_stop_during_job_is_clean(self):
+        """Test stop() con un job in corso senza errori nel thread di ricezione"""
+        errors = []
+        started = threading.Event()
+        client = NestingWorkerClient(lambda event: event['event'] == 'started' and started.set())
+        
+        with mock.patch('threading.excepthook', errors.append):
+            client.submit(self.BIG_PARTS, engine='maxrects', bin_mode='best_fit')
+            self.assertTrue(started.wait(30))
+            receiver = client._receiver
+            client.stop()
+        
+        self.assertFalse(receiver.is_alive())
+        self.assertEqual(errors, [])
+        self.assertFalse(client.running)
+    
+    def test_restart_after_worker_died(self):
+        """Test start() chiude connessione e processo del worker terminato"""
+        client = NestingWorkerClient()
+        try:
+            self.assertTrue(client.start())
+            old_conn, old_process = client._conn, client._process
+            old_process.kill()
+            old_process.wait()
+            
+            self.assertTrue(client.start())
+            self.assertIsNot(client._process, old_process)
+            self.assertTrue(old_conn.closed)
+        finally:
+            client.stop()
+    
+    def test_batch_command_line(self):
+        """Test lotto da riga di comando senza Fusion"""
+        jobs_file = os.path.join(self.tmp.name, 'jobs.json')
+        with open(jobs_file, 'w', encoding='utf-8') as f:
+            json.dump({'jobs': [
+                {'name': 'cucina', 'parts': self.KITCHEN_PARTS},
+                {'name': 'stretto', 'parts': self.KITCHEN_PARTS, 'settings': {'sheet_height': 1300}},
+                {'name': 'errato', 'parts': self.KITCHEN_PARTS, 'options': {'engine': 'nessuno'}},
+            ]}, f)
+        output = os.path.join(self.tmp.name, 'out')
+        
+        with mock.patch('builtins.print'):
+            code = worker_main(['batch', jobs_file, '--output-dir', output])
+        
+        self.assertEqual(code, 1)
+        self.assertEqual(
+            sorted(os.listdir(output)),
+            ['cucina.dxf', 'cucina.json', 'cucina.svg', 'cucina_tagli.txt',
+             'stretto.dxf', 'stretto.json', 'stretto.svg', 'stretto_tagli.txt']
+        )
+        with open(os.path.join(output, 'stretto.json'), 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['settings']['sheet_height'], 1300)
+
+
+class TestNestingBenchmark(NestingTestCase):
+    """Test suite di benchmark del nesting"""
+    
+    CASES = [
+        {'dataset': 'kitchen', 'parts': 40, 'engine': 'guillotine'},
+        {'dataset': 'uniform', 'parts': 60, 'engine': 'skyline'}
+    ]
+    
+    def test_datasets(self):
+        """Test dataset deterministici con il numero di pezzi richiesto"""
+        for dataset in ('kitchen', 'furniture', 'uniform', 'skewed'):
+            parts = generate_dataset(dataset, 137, seed=3)
+            self.assertEqual(sum(p['quantity'] for p in parts), 137)
+            self.assertEqual(parts, generate_dataset(dataset, 137, seed=3))
+            self.assertNotEqual(parts, generate_dataset(dataset, 137, seed=4))
+        
+        with self.assertRaises(ValueError):
+            generate_dataset('sconosciuto', 10)
+        with self.assertRaises(ValueError):
+            generate_dataset('uniform', 0)
+    
+    def test_kitchen_from_catalog(self):
+        """Test mobili da cucina generati dal catalogo"""
+        base = FURNITURE_TYPES['base_cucina']['dimensioni_default']
+        parts = furniture_parts('base_cucina')
+        sides = [p for p in parts if p['name'].endswith('Fianco')]
+        self.assertEqual(sides[0]['quantity'], 2)
+        self.assertEqual(sides[0]['width'], base['profondita'])
+        self.assertTrue(any(p['name'].endswith('Anta') for p in parts))
+        
+        names = {p['name'].split(' - ')[0] for p in generate_dataset('kitchen', 300)}
+        kitchen = {info['nome'] for info in FURNITURE_TYPES.values() if info['categoria'] == 'cucina'}
+        self.assertTrue(all(any(name.startswith(k) for k in kitchen) for name in names))
+    
+    def test_report(self):
+        """Test report JSON con tempi, memoria e qualità"""
+        report = run_suite(self.CASES)
+        report = json.loads(json.dumps(report))
+        
+        self.assertEqual([r['name'] for r in report['results']], ['kitchen-40-guillotine', 'uniform-60-skyline'])
+        for record in report['results']:
+            self.assertGreater(record['wall_time_s'], 0)
+            self.assertGreater(record['peak_memory_kb'], 0)
+            self.assertGreaterEqual(record['sheets_count'], record['lower_bound_sheets'])
+            self.assertEqual(record['gap_to_lower_bound'], record['sheets_count'] - record['lower_bound_sheets'])
+        self.assertEqual(report['results'][0]['parts'], 40)
+        
+        skipped = run_suite(self.CASES, measure_memory=False, max_parts=50)
+        self.assertEqual(len(skipped['results']), 1)
+        self.assertIsNone(skipped['results'][0]['peak_memory_kb'])
+    
+    def test_compare_thresholds(self):
+        """Test regressioni oltre le soglie"""
+        baseline = {'results': [{
+            'name': 'uniform-1000-skyline', 'wall_time_s': 1.0, 'peak_memory_kb': 1000,
+            'sheets_count': 70, 'efficiency_percent': 72.0
+        }]}
+        same = json.loads(json.dumps(baseline))
+        self.assertEqual(compare_reports(same, baseline), [])
+        
+        worse = json.loads(json.dumps(baseline))
+        worse['results'][0].update(wall_time_s=2.0, peak_memory_kb=2000, sheets_count=71, efficiency_percent=70.0)
+        self.assertEqual(len(compare_reports(worse, baseline)), 4)
+        self.assertEqual(len(compare_reports(worse, baseline, {
+            'time_ratio': 3, 'memory_ratio': 3, 'sheets_increase': 1, 'efficiency_drop': 5
+        })), 0)
+        
+        # Tempi trascurabili e casi senza baseline non sono confrontati
+        fast = {'results': [dict(baseline['results'][0], wall_time_s=0.01)]}
+        slow = {'results': [dict(baseline['results'][0], wall_time_s=0.04)]}
+        self.assertEqual(compare_reports(slow, fast), [])
+        self.assertEqual(compare_reports(worse, {'results': []}), [])
+    
+    def test_time_budgets(self):
+        """Test tempi massimi assoluti, anche relativi a un caso di riferimento"""
+        budgets = {
+            'uniform-500-staged': {'max_s': 1.0},
+            'uniform-300-guillotine-repack_time_s=0.05': {'max_s': 0.25, 'over': 'uniform-300-guillotine'}
+        }
+        report = {'results': [
+            {'name': 'uniform-500-staged', 'wall_time_s': 0.4},
+            {'name': 'uniform-300-guillotine', 'wall_time_s': 0.5},
+            {'name': 'uniform-300-guillotine-repack_time_s=0.05', 'wall_time_s': 0.7}
+        ]}
+        self.assertEqual(check_budgets(report, budgets), [])
+        
+        report['results'][0]['wall_time_s'] = 1.5
+        report['results'][2]['wall_time_s'] = 0.8
+        self.assertEqual(len(check_budgets(report, budgets)), 2)
+        
+        # Casi non eseguiti o senza riferimento non sono verificati
+        self.assertEqual(check_budgets({'results': report['results'][2:]}, budgets), [])
+        self.assertEqual(check_budgets({'results': []}), [])
+    
+    def test_cli_fails_on_regression(self):
+        """Test codice di uscita della riga di comando"""
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'report.json')
+            args = ['--max-parts', '10', '--no-memory', '--output', output]
+            with mock.patch('sys.stdout'):
+                self.assertEqual(benchmark_main(args), 0)
+            with open(output, encoding='utf-8') as f:
+                report = json.load(f)
+            self.assertTrue(report['results'])
+            
+            # Baseline con un foglio in meno: regressione
+            for record in report['results']:
+                record['sheets_count'] -= 1
+            baseline = os.path.join(tmp, 'baseline.json')
+            with open(baseline, 'w', encoding='utf-8') as f:
+                json.dump(report, f)
+            with mock.patch('sys.stdout'):
+                self.assertEqual(benchmark_main(['--max-parts', '10', '--no-memory', '--baseline', baseline]), 1)
+                self.assertEqual(benchmark_main(['--max-parts', '10', '--no-memory', '--baseline', baseline,
+                                                 '--sheets-increase', '1']), 0)
+
+
+class TestNestingPipeline(NestingTestCase):
+    """Test pipeline per materiale e spessore"""
+    
+    LIBRARY = {
+        'panels': {
+            'oak_natural': {'name': 'Rovere Naturale', 'sheet_size': [3050, 1300]},
+            'melamine_white': {'name': 'Melamina Bianco', 'sheet_size': [2800, 2070]},
+        }
+    }
+    
+    CUTLIST = {
+        'parts': {
+            'Melamina Bianco': {
+                18: [
+                    {'name': 'Fianco', 'length': 720, 'width': 560, 'quantity': 8},
+                    {'name': 'Ripiano', 'length': 764, 'width': 540, 'quantity': 6},
+                ],
+                8: [
+                    {'name': 'Schienale', 'length': 796, 'width': 716, 'quantity': 4},
+                ],
+            },
+            'Rovere Naturale': {
+                18: [
+                    {'name': 'Anta', 'length': 796, 'width': 716, 'quantity': 6},
+                ],
+            },
+            'Non Assegnato': {
+                18: [
+                    {'name': 'Zoccolo', 'length': 2400, 'width': 100, 'quantity': 2},
+                ],
+            },
+        },
+        'statistics': {},
+        'total_parts': 26
+    }
+    
+    def test_one_job_per_material_thickness(self):
+        """Test un job per ogni coppia materiale/spessore"""
+        pipeline = NestingPipeline(self.LIBRARY)
+        jobs = pipeline.build_jobs(self.CUTLIST)
+        
+        self.assertEqual(len(jobs), 4)
+        sizes = {(j['material'], j['thickness']): (j['sheet_width'], j['sheet_height']) for j in jobs}
+        self.assertEqual(sizes[('Rovere Naturale', 18)], (3050, 1300))
+        self.assertEqual(sizes[('Non Assegnato', 18)], DEFAULT_SHEET_SIZE)
+    
+    def test_run_covers_all_boards(self):
+        """Test il report unificato copre tutti i pezzi"""
+        pipeline = NestingPipeline(self.LIBRARY, workers=2)
+        report = pipeline.run(self.CUTLIST, engine='maxrects')
+        
+        self.assertEqual(len(report['jobs']), 4)
+        self.assertEqual(sum(j['result']['parts_count'] for j in report['jobs']), 26)
+        self.assertEqual(report['statistics']['total_sheets'], report['sheets_count'])
+        self.assertIn('Rovere Naturale', report['statistics']['by_material'])
+        
+        for job in report['jobs']:
+            optimizer = NestingOptimizer(*job['sheet_size'])
+            self.assertValidLayout(optimizer, job['result'], job['result']['parts_count'])
+
+
+if __name__ == '__main__':
+    unittest.main()
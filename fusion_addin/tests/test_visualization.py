@@ -0,0 +1,401 @@
+"""
+Test suite per visualizzatore nesting
+Test senza dipendenze Fusion 360
+"""
+
+import unittest
+from unittest import mock
+import sys
+import os
+import tempfile
+import xml.etree.ElementTree as ET
+
+# Aggiungi path per import
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lib', 'core'))
+
+from cut_tree import cut_sequence
+from nesting import NestingOptimizer
+from nesting_polygon import PolygonNestingOptimizer
+from visualization import NestingVisualizer
+
+
+SVG = '{http://www.w3.org/2000/svg}'
+XLINK_HREF = '{http://www.w3.org/1999/xlink}href'
+
+PARTS = [
+    {'width': 720, 'height': 560, 'quantity': 12, 'name': 'Fianco'},
+    {'width': 764, 'height': 540, 'quantity': 10, 'name': 'Ripiano'},
+    {'width': 796, 'height': 716, 'quantity': 8, 'name': 'Anta'},
+]
+
+
+class VisualizationTestCase(unittest.TestCase):
+    """Helper comuni per i test visualizzazione"""
+    
+    def setUp(self):
+        """Setup test"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.optimizer = NestingOptimizer()
+        self.visualizer = NestingVisualizer()
+    
+    def tearDown(self):
+        """Cleanup test"""
+        self.tmp.cleanup()
+    
+    def path(self, name):
+        """Path nel direttorio temporaneo"""
+        return os.path.join(self.tmp.name, name)
+    
+    def read(self, name):
+        """Legge un file di output"""
+        with open(self.path(name), 'r', encoding='utf-8') as f:
+            return f.read()
+
+
+class TestStreamingExport(VisualizationTestCase):
+    """Test export da stream optimize_iter()"""
+    
+    def test_svg_from_stream_matches_result(self):
+        """Test SVG da stream identico a quello da risultato completo"""
+        result = self.optimizer.optimize(PARTS)
+        stream = self.optimizer.optimize_iter(PARTS)
+        
+        self.assertTrue(self.visualizer.create_svg(result, self.path('full.svg')))
+        self.assertTrue(self.visualizer.create_svg(stream, self.path('stream.svg')))
+        
+        self.assertEqual(self.read('full.svg'), self.read('stream.svg'))
+        root = ET.fromstring(self.read('stream.svg').encode('utf-8'))
+        sheets = [g for g in root if g.tag.endswith('g')]
+        self.assertEqual(len(sheets), result['sheets_count'])
+        self.assertEqual(float(root.get('height')), int((2070 * 0.2 + 50) * len(sheets) + 50))
+    
+    def test_cut_instructions_from_stream(self):
+        """Test istruzioni di taglio da stream"""
+        result = self.optimizer.optimize(PARTS)
+        
+        self.visualizer.export_cut_instructions(result, self.path('full.txt'))
+        self.visualizer.export_cut_instructions(self.optimizer.optimize_iter(PARTS), self.path('stream.txt'))
+        
+        self.assertEqual(self.read('full.txt'), self.read('stream.txt'))
+    
+    def test_cut_instructions_include_saw_sequence(self):
+        """Test sequenza tagli sega per i fogli guillotine"""
+        result = self.optimizer.optimize(PARTS)
+        self.visualizer.export_cut_instructions(result, self.path('cuts.txt'))
+        text = self.read('cuts.txt')
+        
+        self.assertEqual(text.count("SEQUENZA TAGLI SEGA"), result['sheets_count'])
+        
+        rotations = sum(self.optimizer.saw_program(s)['rotations'] for s in result['sheets'])
+        self.assertEqual(text.count("Ruota i pezzi"), rotations)
+
+
+
+class TestMixedStockSvg(VisualizationTestCase):
+    """Test visualizzazione di pannelli di formati diversi"""
+    
+    def test_svg_uses_sheet_sizes(self):
+        """Test dimensioni SVG e pannelli dal formato di ogni foglio"""
+        stock = [
+            {'name': 'Lungo', 'width': 4100, 'height': 2070, 'count': 1},
+            {'name': 'Stretto', 'width': 3050, 'height': 1300}
+        ]
+        result = self.optimizer.optimize_stock(PARTS, stock=stock)
+        self.assertTrue(self.visualizer.create_svg(result, self.path('stock.svg')))
+        
+        root = ET.fromstring(self.read('stock.svg').encode('utf-8'))
+        widths = [s['width'] for s in result['sheets']]
+        heights = [s['height'] for s in result['sheets']]
+        self.assertEqual(float(root.get('width')), int(max(widths) * 0.2 + 100))
+        self.assertEqual(float(root.get('height')), int(sum(h * 0.2 + 50 for h in heights) + 50))
+        
+        rects = [g.find('{http://www.w3.org/2000/svg}rect') for g in root if g.tag.endswith('g')]
+        self.assertEqual([float(r.get('width')) for r in rects], [w * 0.2 for w in widths])
+    
+    def test_labels_escaped(self):
+        """Test nomi formato con caratteri XML in file singolo e a pagine"""
+        stock = [{'name': 'Rovere <18> & "Noce"', 'width': 2800, 'height': 2070}]
+        result = self.optimizer.optimize_stock(PARTS, stock=stock)
+        self.assertTrue(self.visualizer.create_svg(result, self.path('stock.svg')))
+        paths = self.visualizer.create_svg_pages(result, self.path('pagine.svg'), sheets_per_page=2)
+        
+        for name in ['stock.svg'] + [os.path.basename(path) for path in paths]:
+            root = ET.fromstring(self.read(name).encode('utf-8'))
+            labels = [t.text for t in root.iter(SVG + 'text') if t.get('class') == 'label']
+            self.assertTrue(labels)
+            self.assertTrue(all(label.endswith(' - Rovere <18> & "Noce"') for label in labels))
+
+
+class TestCompactExport(VisualizationTestCase):
+    """Test export compatto degli schemi di taglio ripetuti"""
+    
+    def setUp(self):
+        """Setup test"""
+        super().setUp()
+        batch = [dict(part, quantity=part['quantity'] * 4) for part in PARTS]
+        self.result = self.optimizer.optimize(batch, reuse_patterns=True)
+    
+    def test_compact_svg(self):
+        """Test un gruppo SVG per schema con la quantità nell'etichetta"""
+        self.assertTrue(self.visualizer.create_svg(self.result, self.path('compact.svg'), compact=True))
+        
+        root = ET.fromstring(self.read('compact.svg').encode('utf-8'))
+        sheets = [g for g in root if g.tag.endswith('g')]
+        patterns = self.result['patterns']
+        self.assertEqual(len(sheets), len(patterns))
+        self.assertLess(len(sheets), self.result['sheets_count'])
+        self.assertEqual(self.read('compact.svg').count(' × '), sum(1 for p in patterns if p['count'] > 1))
+    
+    def test_compact_cut_instructions_from_stream(self):
+        """Test istruzioni compatte uguali da risultato e da stream"""
+        self.visualizer.export_cut_instructions(self.result, self.path('full.txt'), compact=True)
+        self.visualizer.export_cut_instructions(iter(self.result['sheets']), self.path('stream.txt'), compact=True)
+        text = self.read('full.txt')
+        
+        self.assertEqual(text, self.read('stream.txt'))
+        self.assertEqual(text.count("PANNELLO #"), len(self.result['patterns']))
+        self.assertEqual(text.count("SEQUENZA TAGLI SEGA"), len(self.result['patterns']))
+        self.assertIn("Ripetere × ", text)
+
+
+class TestPolygonSvg(VisualizationTestCase):
+    """Test visualizzazione di parti sagomate"""
+    
+    def test_outlines_drawn_as_polygons(self):
+        """Test sagome disegnate come poligoni, rettangoli invariati"""
+        parts = [
+            {'outline': [(0, 0), (600, 0), (0, 500)], 'quantity': 4, 'name': 'Angolo'},
+            {'width': 720, 'height': 560, 'quantity': 2, 'name': 'Fianco'},
+        ]
+        result = PolygonNestingOptimizer().optimize(parts)
+        self.assertTrue(self.visualizer.create_svg(result, self.path('shapes.svg')))
+        
+        root = ET.fromstring(self.read('shapes.svg').encode('utf-8'))
+        symbols = {symbol.get('id'): symbol for symbol in root.iter(SVG + 'symbol')}
+        uses = list(root.iter(SVG + 'use'))
+        self.assertEqual(len(uses), 6)
+        
+        placements = [p for sheet in result['sheets'] for p in sheet['placements']]
+        for use, placement in zip(uses, placements):
+            polygon = symbols[use.get(XLINK_HREF)[1:]].find(SVG + 'polygon')
+            points = polygon.get('points').split()
+            self.assertEqual(len(points), len(placement.outline))
+
+
+class TestPagedSvg(VisualizationTestCase):
+    """Test SVG in più file e sagome riusate"""
+    
+    def sheet_groups(self, name):
+        """Gruppi dei pannelli di un file SVG"""
+        root = ET.fromstring(self.read(name).encode('utf-8'))
+        return [g for g in root if g.tag.endswith('g')]
+    
+    def test_symbols_reused(self):
+        """Test un solo <symbol> per sagoma e un <use> per pezzo"""
+        result = self.optimizer.optimize(PARTS)
+        self.assertTrue(self.visualizer.create_svg(result, self.path('layout.svg')))
+        
+        root = ET.fromstring(self.read('layout.svg').encode('utf-8'))
+        symbols = [symbol.get('id') for symbol in root.iter(SVG + 'symbol')]
+        uses = [use.get(XLINK_HREF) for use in root.iter(SVG + 'use')]
+        
+        shapes = {(p.width, p.height, p.rotated) for sheet in result['sheets'] for p in sheet['placements']}
+        self.assertEqual(len(symbols), len(shapes))
+        self.assertEqual(len(set(symbols)), len(symbols))
+        self.assertEqual(len(uses), result['parts_count'])
+        self.assertEqual({href[1:] for href in uses}, set(symbols))
+    
+    def test_pages(self):
+        """Test N pannelli per file, da risultato o stream"""
+        result = self.optimizer.optimize(PARTS)
+        sheets_count = result['sheets_count']
+        self.assertGreater(sheets_count, 2)
+        
+        paths = self.visualizer.create_svg_pages(result, self.path('taglio.svg'), sheets_per_page=2)
+        self.assertEqual(len(paths), (sheets_count + 1) // 2)
+        self.assertEqual(os.path.basename(paths[0]), 'taglio_001.svg')
+        
+        ids = []
+        for path in paths:
+            groups = self.sheet_groups(os.path.basename(path))
+            self.assertLessEqual(len(groups), 2)
+            ids += [g.get('id') for g in groups]
+            # Ogni pagina definisce i propri simboli
+            root = ET.fromstring(self.read(os.path.basename(path)).encode('utf-8'))
+            defined = {symbol.get('id') for symbol in root.iter(SVG + 'symbol')}
+            self.assertTrue(all(use.get(XLINK_HREF)[1:] in defined for use in root.iter(SVG + 'use')))
+        self.assertEqual(ids, [f"sheet_{sheet['id']}" for sheet in result['sheets']])
+        
+        stream_paths = self.visualizer.create_svg_pages(
+            self.optimizer.optimize_iter(PARTS), self.path('stream.svg'), sheets_per_page=1
+        )
+        self.assertEqual(len(stream_paths), sheets_count)
+        
+        with self.assertRaises(ValueError):
+            self.visualizer.create_svg_pages(result, self.path('x.svg'), sheets_per_page=0)
+
+
+class TestFragmentCache(VisualizationTestCase):
+    """Test cache dei frammenti per contenuto del foglio"""
+    
+    def edited(self, result, sheet_index):
+        """Copia del risultato con un pezzo rinominato in un foglio"""
+        sheets = [dict(sheet) for sheet in result['sheets']]
+        sheet = sheets[sheet_index]
+        first = sheet['placements'][0]
+        sheet['placements'] = [first._replace(name=first.name + ' bis')] + sheet['placements'][1:]
+        return dict(result, sheets=sheets)
+    
+    def export(self, visualizer, result, name):
+        """Esporta SVG, report e istruzioni e restituisce i tre testi"""
+        self.assertTrue(visualizer.create_svg(result, self.path(name + '.svg')))
+        self.assertTrue(visualizer.export_cut_instructions(result, self.path(name + '.txt')))
+        report = visualizer.generate_text_report(result)
+        return self.read(name + '.svg'), self.read(name + '.txt'), report
+    
+    def test_reexport_only_changed_sheets(self):
+        """Test nuovo export: renderizzati solo i fogli cambiati"""
+        result = self.optimizer.optimize(PARTS, engine='guillotine')
+        sheets_count = result['sheets_count']
+        distinct = len(result['patterns'])
+        
+        first = self.export(self.visualizer, result, 'a')
+        misses = self.visualizer.fragment_misses
+        self.assertLessEqual(misses, 3 * distinct)
+        
+        # Stesso risultato: tutto dalla cache, output identico
+        self.assertEqual(self.export(self.visualizer, result, 'b'), first)
+        self.assertEqual(self.visualizer.fragment_misses, misses)
+        self.assertGreaterEqual(self.visualizer.fragment_hits, 3 * sheets_count - misses)
+        
+        # Un pezzo rinominato: SVG invariato, report e istruzioni di un solo foglio
+        edited = self.edited(result, sheets_count - 1)
+        with mock.patch.object(self.visualizer, '_render_sheet_svg', wraps=self.visualizer._render_sheet_svg) as svg, \
+                mock.patch.object(self.visualizer, '_render_cut_instructions',
+                                  wraps=self.visualizer._render_cut_instructions) as cut:
+            svg_text, cut_text, report = self.export(self.visualizer, edited, 'c')
+        svg.assert_not_called()
+        self.assertEqual(cut.call_count, 1)
+        self.assertEqual(svg_text, first[0])
+        self.assertIn(edited['sheets'][-1]['placements'][0].name, cut_text)
+        
+        # Senza cache l'output è lo stesso
+        uncached = NestingVisualizer(fragment_cache_size=0)
+        self.assertEqual(self.export(uncached, edited, 'd'), (svg_text, cut_text, report))
+        self.assertEqual(len(uncached._fragments), 0)
+    
+    def test_cache_independent_of_sheet_position(self):
+        """Test fogli spostati o rinumerati riusano i frammenti"""
+        result = self.optimizer.optimize(PARTS)
+        self.visualizer.create_svg(result, self.path('a.svg'))
+        misses = self.visualizer.fragment_misses
+        
+        shifted = [dict(sheet, id=sheet['id'] + 1) for sheet in reversed(result['sheets'])]
+        self.assertTrue(self.visualizer.create_svg(dict(result, sheets=shifted), self.path('b.svg')))
+        self.assertEqual(self.visualizer.fragment_misses, misses)
+        
+        root = ET.fromstring(self.read('b.svg').encode('utf-8'))
+        defined = {symbol.get('id') for symbol in root.iter(SVG + 'symbol')}
+        self.assertTrue(all(use.get(XLINK_HREF)[1:] in defined for use in root.iter(SVG + 'use')))
+    
+    def test_cache_bounded(self):
+        """Test cache limitata e svuotabile"""
+        visualizer = NestingVisualizer(fragment_cache_size=2)
+        visualizer.create_svg(self.optimizer.optimize(PARTS), self.path('a.svg'))
+        self.assertLessEqual(len(visualizer._fragments), 2)
+        
+        visualizer.clear_cache()
+        self.assertEqual(len(visualizer._fragments), 0)
+        self.assertEqual(visualizer.fragment_misses, 0)
+
+
+class TestDxfExport(VisualizationTestCase):
+    """Test export DXF R12"""
+    
+    def read_dxf(self, name):
+        """Coppie (codice, valore) di un file DXF"""
+        with open(self.path(name), 'r', encoding='cp1252') as f:
+            lines = f.read().splitlines()
+        return [(int(lines[i]), lines[i + 1]) for i in range(0, len(lines) - 1, 2)]
+    
+    def entities(self, pairs):
+        """Entità della sezione ENTITIES come (tipo, {codice: [valori]})"""
+        start = pairs.index((2, 'ENTITIES')) + 1
+        result = []
+        for code, value in pairs[start:]:
+            if code == 0:
+                result.append((value, {}))
+            else:
+                result[-1][1].setdefault(code, []).append(value)
+        return result[:-2]  # ENDSEC, EOF
+    
+    def test_layers_and_entities(self):
+        """Test un layer per pannello con bordo, pezzi, etichette e tagli"""
+        result = self.optimizer.optimize(PARTS, engine='guillotine')
+        self.assertTrue(self.visualizer.create_dxf(result, self.path('layout.dxf')))
+        
+        pairs = self.read_dxf('layout.dxf')
+        self.assertEqual(pairs[:4], [(0, 'SECTION'), (2, 'HEADER'), (9, '$ACADVER'), (1, 'AC1009')])
+        self.assertEqual(pairs[-2:], [(0, 'ENDSEC'), (0, 'EOF')])
+        self.assertLess(pairs.index((2, 'TABLES')), pairs.index((2, 'ENTITIES')))
+        
+        layers = [value for (code, value), previous in zip(pairs[1:], pairs) if code == 2 and previous == (0, 'LAYER')]
+        sheets = result['sheets']
+        self.assertEqual(layers, ['0'] + [f"PANNELLO_{sheet['id'] + 1:03d}" for sheet in sheets])
+        
+        entities = self.entities(pairs)
+        for index, sheet in enumerate(sheets):
+            layer = layers[index + 1]
+            on_layer = [(kind, data) for kind, data in entities if data[8] == [layer]]
+            count = lambda kind: sum(1 for k, _ in on_layer if k == kind)
+            self.assertEqual(count('POLYLINE'), 1 + len(sheet['placements']))
+            self.assertEqual(count('VERTEX'), 4 * (1 + len(sheet['placements'])))
+            self.assertEqual(count('TEXT'), 1 + len(sheet['placements']))
+            self.assertEqual(count('LINE'), len(cut_sequence(sheet['cut_tree'])))
+        
+        # I pezzi del primo pannello sono nel pannello, alle coordinate del nesting
+        vertices = [data for kind, data in entities if kind == 'VERTEX' and data[8] == [layers[1]]]
+        xs = [float(v[10][0]) for v in vertices]
+        ys = [float(v[20][0]) for v in vertices]
+        self.assertEqual((min(xs), max(xs)), (0, 2800))
+        self.assertEqual((min(ys), max(ys)), (0, 2070))
+        first = sheets[0]['placements'][0]
+        self.assertEqual((float(vertices[4][10][0]), float(vertices[4][20][0])), (first.x, first.y))
+    
+    def test_stream_compact_and_shapes(self):
+        """Test DXF da stream, compatto e con parti sagomate"""
+        result = self.optimizer.optimize(PARTS)
+        self.assertTrue(self.visualizer.create_dxf(result, self.path('full.dxf')))
+        self.assertTrue(self.visualizer.create_dxf(self.optimizer.optimize_iter(PARTS), self.path('stream.dxf')))
+        self.assertEqual(self.read_dxf('full.dxf'), self.read_dxf('stream.dxf'))
+        
+        batch = [dict(part, quantity=part['quantity'] * 4) for part in PARTS]
+        repeated = self.optimizer.optimize(batch, reuse_patterns=True)
+        self.assertTrue(self.visualizer.create_dxf(repeated, self.path('compact.dxf'), compact=True))
+        texts = [data[1][0] for kind, data in self.entities(self.read_dxf('compact.dxf')) if kind == 'TEXT']
+        self.assertTrue(any('×' in text for text in texts if text.startswith('Pannello')))
+        
+        shapes = PolygonNestingOptimizer().optimize([{'outline': [(0, 0), (600, 0), (0, 500)], 'quantity': 2}])
+        self.assertTrue(self.visualizer.create_dxf(shapes, self.path('shapes.dxf')))
+        kinds = [kind for kind, _ in self.entities(self.read_dxf('shapes.dxf'))]
+        self.assertEqual(kinds.count('VERTEX'), 4 + 2 * 3)
+
+
+class TestDraftPreview(VisualizationTestCase):
+    """Test anteprima istantanea"""
+    
+    def test_draft_svg(self):
+        """Test bozza SVG marcata e con un gruppo per pannello"""
+        self.assertTrue(self.visualizer.create_draft_svg(PARTS, self.path('draft.svg'), self.optimizer))
+        
+        text = self.read('draft.svg')
+        self.assertIn('BOZZA', text)
+        
+        expected = self.optimizer.optimize(PARTS, engine='skyline')
+        root = ET.fromstring(text.encode('utf-8'))
+        sheets = [g for g in root if g.tag.endswith('g')]
+        self.assertEqual(len(sheets), expected['sheets_count'])
+
+
+if __name__ == '__main__':
+    unittest.main()